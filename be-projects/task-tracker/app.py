@@ -4,22 +4,254 @@ Task Tracker Web Application
 A web-based version of the task tracker using Flask
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
-from task_manager import TaskManager
-from datetime import datetime
+from flask import (Flask, Response, abort, g, has_request_context, render_template, request, redirect,
+                   url_for, flash, jsonify, make_response, session, stream_with_context)
+from werkzeug.http import unquote_etag
+from werkzeug.local import LocalProxy
+from task_manager import TaskManager, VALID_STATUSES
+from metrics import REGISTRY
+from response_encoding import (EncodedBodyCache, FastJSONProvider, compress, encoded_etag, identity_etag,
+                               is_compressible, negotiate_encoding)
+from workspaces import WorkspacePool, open_workspace
+from ndjson_io import iter_ndjson, import_tasks
+from config import Config
+from datetime import datetime, timezone
+from functools import partial, wraps
+import hmac
+import json
 import os
+import time
 
 app = Flask(__name__)
-app.secret_key = 'task-tracker-secret-key-2024'
+app.config.from_object(Config)
+app.json = FastJSONProvider(app)
+# Encoded /api/tasks bodies by store version and URL
+body_cache = EncodedBodyCache(Config.RESPONSE_CACHE_MB << 20)
 
 # Initialize task manager
-task_manager = TaskManager()
+default_task_manager = TaskManager.from_config(Config)
+workspaces = WorkspacePool(partial(open_workspace, Config), Config.MAX_LOADED_WORKSPACES)
+# Requests with these methods only read, so they never create a workspace
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+# Endpoints of admin_only views, which never create a workspace either
+ADMIN_ENDPOINTS = set()
+
+def current_task_manager():
+    """Return the task manager of the workspace being requested, or the default list."""
+    if has_request_context() and 'task_manager' in g:
+        return g.task_manager
+    return default_task_manager
+
+# Routes use the list of the current request: /w/<name>/... for a workspace
+task_manager = LocalProxy(current_task_manager)
+
+@app.url_value_preprocessor
+def load_workspace(endpoint, values):
+    """Load the workspace named in the URL for the rest of the request.
+
+    Reads of a workspace that does not exist get 404; its first write creates it.
+    """
+    if values and 'workspace' in values:
+        name = values.pop('workspace')
+        try:
+            create = request.method not in READ_METHODS and endpoint not in ADMIN_ENDPOINTS
+            g.task_manager = workspaces.acquire(name, create=create)
+        except ValueError:
+            abort(404)
+        g.workspace = name
+
+@app.teardown_request
+def release_workspace(exception=None):
+    """Let the workspace pool evict the request's workspace again."""
+    if 'workspace' in g:
+        workspaces.release(g.pop('workspace'))
+
+@app.url_defaults
+def add_workspace(endpoint, values):
+    """Keep links and redirects inside the workspace being requested."""
+    if 'workspace' in g and 'workspace' not in values and app.url_map.is_endpoint_expecting(endpoint, 'workspace'):
+        values['workspace'] = g.workspace
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'task_tracker_http_request_seconds', 'Latency of HTTP requests by route', ['method', 'route'])
+REQUESTS = REGISTRY.counter(
+    'task_tracker_http_requests', 'HTTP requests by route and status code', ['method', 'route', 'status'])
+# Other methods are labelled OTHER, so clients cannot create new series
+METRIC_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+def store_file_size():
+    """Return the size of the store file, if it exists yet."""
+    try:
+        return {(): os.path.getsize(task_manager.file_path)}
+    except OSError:
+        return {}
+
+REGISTRY.gauge('task_tracker_tasks', 'Number of tasks by status', ['status'],
+               lambda: {(status,): count for status, count in task_manager.count_tasks().items()
+                        if status in VALID_STATUSES})
+REGISTRY.gauge('task_tracker_store_file_bytes', 'Size of the store file', callback=store_file_size)
+REGISTRY.gauge('task_tracker_store_version', 'Current store version, bumped by every committed change',
+               callback=lambda: {(): task_manager.store_version})
+REGISTRY.gauge('task_tracker_loaded_workspaces', 'Workspaces currently loaded in memory',
+               callback=lambda: {(): len(workspaces)})
+
+@app.before_request
+def start_request_timer():
+    """Note when the request started, for the latency metrics."""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and record its latency by route pattern."""
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    method = request.method if request.method in METRIC_METHODS else 'OTHER'
+    # Requests rejected while matching the URL never start the timer
+    if 'request_started' in g:
+        REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - g.request_started)
+    REQUESTS.labels(method, route, str(response.status_code)).inc()
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Expose request, store and lock metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.after_request
+def compress_response(response):
+    """Compress large responses with gzip or deflate for clients that accept it.
+
+    Compressed variants of cached ``/api/tasks`` bodies are cached as well.
+    Each encoding gets its own strong ETag, since the bodies differ.
+    """
+    if not app.config['COMPRESS_RESPONSES'] or not is_compressible(response, app.config['COMPRESS_MIN_BYTES']):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    key = g.get('body_cache_key')
+    entry = body_cache.get(key) if key else None
+    body = entry['bodies'].get(encoding) if entry else None
+    if body is None:
+        body = compress(response.get_data(), encoding, app.config['COMPRESS_LEVEL'])
+        if key:
+            body_cache.add_variant(key, encoding, body)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(encoded_etag(etag, encoding))
+    return response
+
+@app.before_request
+def refresh_tasks():
+    """Pick up changes made by other worker processes sharing the store."""
+    task_manager.refresh()
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+TIME_FILTERS = ['created_after', 'created_before', 'updated_since']
+
+def get_listing_args(default_limit=PAGE_SIZE):
+    """Read sort, order, limit and cursor arguments from the query string."""
+    sort = request.args.get('sort', 'id')
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("Invalid order. Must be one of: asc, desc")
+    limit = request.args.get('limit', default_limit, type=int)
+    if limit is not None:
+        limit = min(limit, MAX_PAGE_SIZE)
+    return {
+        'sort': sort,
+        'descending': order == 'desc',
+        'limit': limit,
+        'cursor': request.args.get('cursor')
+    }
+
+def get_tag_filters():
+    """Read the ``tag`` (repeatable) and ``filter`` arguments from the query string."""
+    return {'tags': request.args.getlist('tag'), 'filter_expression': request.args.get('filter') or None}
+
+def not_modified(etag, last_modified):
+    """Return a 304 response if the client's copy of this store version is current.
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since`` and matches
+    the ETag of any encoding of the body; the 304 carries the tag the client
+    sent. Pages with pending flash messages are always sent in full so the
+    messages show.
+    """
+    if session.get('_flashes'):
+        return None
+    if request.if_none_match:
+        held = next((tag for tag in request.if_none_match if identity_etag(tag) == etag), None)
+        matched = held is not None or request.if_none_match.star_tag
+        etag = held or etag
+    elif request.if_modified_since:
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    return set_validators(Response(status=304), etag, last_modified)
+
+def set_validators(response, etag, last_modified):
+    """Attach the store version's ETag and Last-Modified headers to a response."""
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def page_validators():
+    """Return the ETag and Last-Modified of task pages.
+
+    Pages show per-day statistics, so they also change at local midnight.
+    """
+    etag, last_modified = task_manager.version_info()
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).astimezone(timezone.utc)
+    return f"{etag}-{midnight.date().isoformat()}", max(last_modified, midnight)
+
+def render_task_page(status=None):
+    """Render one page of the task list, optionally filtered by status.
+
+    The ``tag`` and ``filter`` query arguments narrow the list as they do
+    for ``/api/tasks``.
+
+    Answers conditional requests for an unchanged store with 304 Not Modified.
+    """
+    args = get_listing_args()
+    with task_manager.reading():
+        validators = page_validators()
+        cached = not_modified(*validators)
+        if cached:
+            return cached
+        tag_filters = get_tag_filters()
+        tasks, next_cursor = task_manager.page_tasks(status, **args, **tag_filters)
+        stats = task_manager.stats(days=1)
+    order = 'desc' if args['descending'] else 'asc'
+    # Links to other orders and pages keep the tag filters
+    list_args = {'tag': tag_filters['tags'], 'filter': tag_filters['filter_expression']}
+    next_url = None
+    if next_cursor:
+        next_url = url_for(request.endpoint, **dict(request.view_args, sort=args['sort'], order=order,
+                                                    limit=args['limit'], cursor=next_cursor, **list_args))
+    response = make_response(render_template('index.html', tasks=tasks, stats=stats,
+                                             current_filter=status, sort=args['sort'], order=order,
+                                             next_url=next_url, is_first_page=not args['cursor'],
+                                             list_args=list_args))
+    return set_validators(response, *validators)
 
 @app.route('/')
 def index():
-    """Main page showing all tasks."""
-    tasks = task_manager.list_tasks()
-    return render_template('index.html', tasks=tasks)
+    """Main page showing the first page of tasks."""
+    try:
+        return render_task_page()
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('index'))
+
+def parse_tag_input(text):
+    """Split the comma-separated tags of a form field."""
+    return [tag.strip() for tag in text.split(',') if tag.strip()]
 
 @app.route('/add', methods=['GET', 'POST'])
 def add_task():
@@ -28,7 +260,7 @@ def add_task():
         description = request.form.get('description', '').strip()
         if description:
             try:
-                task_id = task_manager.add_task(description)
+                task_id = task_manager.add_task(description, parse_tag_input(request.form.get('tags', '')))
                 flash(f'Task added successfully! (ID: {task_id})', 'success')
                 return redirect(url_for('index'))
             except ValueError as e:
@@ -50,7 +282,10 @@ def edit_task(task_id):
         description = request.form.get('description', '').strip()
         if description:
             try:
-                if task_manager.update_task(task_id, description):
+                with task_manager.batch():
+                    updated = task_manager.update_task(task_id, description) and \
+                        task_manager.set_tags(task_id, parse_tag_input(request.form.get('tags', '')))
+                if updated:
                     flash('Task updated successfully!', 'success')
                     return redirect(url_for('index'))
                 else:
@@ -93,24 +328,189 @@ def change_status(task_id, status):
 
 @app.route('/filter/<status>')
 def filter_tasks(status):
-    """Filter tasks by status."""
+    """Filter tasks by status, and by tags with ``?tag=`` or ``?filter=``."""
     valid_statuses = ['todo', 'in-progress', 'done']
     if status not in valid_statuses:
         flash('Invalid status filter', 'error')
         return redirect(url_for('index'))
     
-    tasks = task_manager.list_tasks(status)
-    return render_template('index.html', tasks=tasks, current_filter=status)
+    try:
+        return render_task_page(status)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('filter_tasks', status=status))
 
 @app.route('/api/tasks', methods=['GET'])
 def api_get_tasks():
-    """API endpoint to get all tasks."""
-    tasks = task_manager.list_tasks()
+    """API endpoint to get tasks.
+
+    Supports ``status``, ``sort`` (id, createdAt, updatedAt, status), ``order``
+    (asc, desc), ``limit`` and ``cursor`` query parameters, and the time
+    windows ``created_after``, ``created_before`` and ``updated_since``
+    (ISO 8601 timestamps), which combine with each other and with
+    ``status``. ``tag`` (repeatable) keeps tasks carrying every given tag,
+    and ``filter`` takes a boolean expression such as
+    ``status=todo AND tag=backend AND NOT tag=blocked``; both are answered
+    from bitmap indexes and combine with the other filters. Without ``limit``
+    every matching task is returned. When more tasks remain, the cursor for
+    the next page is sent in the ``X-Next-Cursor`` and ``Link`` headers.
+    Responses carry ``ETag`` and ``Last-Modified`` headers, and conditional
+    requests for an unchanged store get 304 Not Modified. Encoded bodies are
+    cached per store version and URL, so repeated requests between changes
+    skip listing and encoding.
+
+    With ``as_of`` (an ISO 8601 date or time) the tasks as they were at that
+    time are returned from the task history, in ID order; only ``status``
+    applies to such listings.
+    """
+    if 'as_of' in request.args:
+        try:
+            return jsonify(task_manager.tasks_as_of(request.args['as_of'], request.args.get('status')))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    try:
+        args = get_listing_args(default_limit=None)
+        with task_manager.reading():
+            validators = task_manager.version_info()
+            cached = not_modified(*validators)
+            if cached:
+                return cached
+            g.body_cache_key = (validators[0], request.full_path)
+            entry = body_cache.get(g.body_cache_key)
+            if entry is None:
+                if args['limit'] is None:
+                    args['limit'] = max(task_manager.count_tasks()['total'], 1)
+                filters = {name: request.args.get(name) for name in TIME_FILTERS}
+                tasks, next_cursor = task_manager.page_tasks(request.args.get('status'), **args, **filters,
+                                                             **get_tag_filters())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if entry is None:
+        response = jsonify(tasks)
+        headers = {}
+        if next_cursor:
+            next_url = url_for('api_get_tasks', **dict(request.args.to_dict(), cursor=next_cursor))
+            headers = {'X-Next-Cursor': next_cursor, 'Link': f'<{next_url}>; rel="next"'}
+        body_cache.put(g.body_cache_key, response.get_data(), headers)
+    else:
+        response = app.response_class(entry['bodies']['identity'], mimetype='application/json')
+        headers = entry['headers']
+    response.headers.update(headers)
+    return set_validators(response, *validators)
+
+SSE_HEARTBEAT_SECONDS = 15
+
+def format_event(event, data, event_id=None):
+    """Format one Server-Sent Event."""
+    lines = [f'id: {event_id}'] if event_id else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, separators=(",", ":"))}']
+    return '\n'.join(lines) + '\n\n'
+
+def stream_changes(since):
+    """Yield change feed entries as Server-Sent Events as they are committed.
+
+    Without ``since`` the stream starts at the current version. A ``reset``
+    event tells the client that its copy is too old and must be reloaded.
+    """
+    if since is None:
+        since = task_manager.version_info()[0]
+    last_sent = time.monotonic()
+    # Other processes' changes only arrive through refresh(), so poll shared stores
+    wait_seconds = 1 if task_manager.version_stamp is not None else SSE_HEARTBEAT_SECONDS
+    while True:
+        task_manager.refresh()
+        feed = task_manager.changes_since(since)
+        if feed['reset']:
+            yield format_event('reset', {'version': feed['version']}, feed['version'])
+        for change in feed['changes']:
+            yield format_event('change', change, feed['version'])
+        if feed['reset'] or feed['changes']:
+            last_sent = time.monotonic()
+        since = feed['version']
+        if not task_manager.wait_for_change(since, wait_seconds) and \
+                time.monotonic() - last_sent >= SSE_HEARTBEAT_SECONDS:
+            yield ': keep-alive\n\n'
+            last_sent = time.monotonic()
+
+@app.route('/api/tasks/changes', methods=['GET'])
+def api_task_changes():
+    """API endpoint for delta sync from the change feed.
+
+    ``since`` is the ``version`` of an earlier response or the ETag of a
+    ``/api/tasks`` listing, compressed or not, with or without its quotes. Returns the current ``version`` and the latest
+    change of every task changed since then; ``reset`` means the client
+    must download the full list again. Clients sending
+    ``Accept: text/event-stream`` get a live Server-Sent Events stream
+    instead, resuming from ``Last-Event-ID`` on reconnect.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    if since is not None:
+        # Accept an ETag header copied as is, with its quotes or W/ prefix
+        since = identity_etag(unquote_etag(since.strip())[0])
+    if request.accept_mimetypes.best == 'text/event-stream':
+        response = Response(stream_with_context(stream_changes(since)), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    return jsonify(task_manager.changes_since(since))
+
+@app.route('/api/tasks/stats', methods=['GET'])
+def api_task_stats():
+    """API endpoint for task aggregates.
+
+    Returns the per-status ``counts``, tasks created and completed on each
+    of the last ``days`` days (default 30, at most 366) and ``open_age``,
+    the number of open tasks by age.
+    """
+    days = min(request.args.get('days', 30, type=int), 366)
+    try:
+        return jsonify(task_manager.stats(days))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/tasks/search', methods=['GET'])
+def api_search_tasks():
+    """API endpoint to search task descriptions.
+
+    ``q`` supports words, ``prefix*`` and ``"quoted phrases"``; results can
+    be narrowed with ``status`` and capped with ``limit`` (default 20).
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Search query cannot be empty'}), 400
+    limit = min(request.args.get('limit', 20, type=int), MAX_PAGE_SIZE)
+
+    try:
+        tasks = task_manager.search_tasks(query, request.args.get('status'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(tasks)
 
+@app.route('/api/tasks/export', methods=['GET'])
+def api_export_tasks():
+    """API endpoint to stream every task as newline-delimited JSON."""
+    return Response(stream_with_context(iter_ndjson(task_manager)), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename=tasks.ndjson'})
+
+@app.route('/api/tasks/import', methods=['POST'])
+def api_import_tasks():
+    """API endpoint to import tasks from a newline-delimited JSON body.
+
+    The body is read as a stream and saved in chunks of ``chunk_size``
+    records (default 1000). Lines that are not valid UTF-8 JSON are reported
+    as invalid. Returns the import summary.
+    """
+    chunk_size = request.args.get('chunk_size', 1000, type=int)
+    if chunk_size < 1:
+        return jsonify({'error': 'chunk_size must be a positive integer'}), 400
+    # Lines are decoded one by one, so a bad byte only invalidates its own line
+    return jsonify(import_tasks(task_manager, request.stream, chunk_size))
+
 @app.route('/api/tasks', methods=['POST'])
 def api_add_task():
-    """API endpoint to add a task."""
+    """API endpoint to add a task, with optional ``tags``."""
     data = request.get_json()
     description = data.get('description', '').strip()
     
@@ -118,11 +518,73 @@ def api_add_task():
         return jsonify({'error': 'Task description cannot be empty'}), 400
     
     try:
-        task_id = task_manager.add_task(description)
+        task_id = task_manager.add_task(description, data.get('tags'))
         return jsonify({'id': task_id, 'message': 'Task added successfully'}), 201
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
 
+class BulkAborted(Exception):
+    """Raised to roll back an atomic bulk request after a failed operation."""
+
+
+def apply_bulk_operation(operation):
+    """Apply one bulk operation and return its result entry."""
+    if not isinstance(operation, dict):
+        return {'status': 400, 'error': 'Operation must be an object'}
+
+    op = operation.get('op')
+    task_id = operation.get('id')
+    if op != 'add' and not isinstance(task_id, int):
+        return {'status': 400, 'error': 'Task id must be an integer'}
+
+    try:
+        if op == 'add':
+            task_id = task_manager.add_task(str(operation.get('description', '')), operation.get('tags'))
+            return {'status': 201, 'id': task_id}
+        elif op == 'update':
+            found = task_manager.update_task(task_id, str(operation.get('description', '')))
+        elif op == 'delete':
+            found = task_manager.delete_task(task_id)
+        elif op == 'status':
+            found = task_manager.mark_task_status(task_id, operation.get('status'))
+        elif op == 'tags':
+            found = task_manager.set_tags(task_id, operation.get('tags'))
+        else:
+            return {'status': 400, 'error': 'Invalid op. Must be one of: add, update, delete, status, tags'}
+    except ValueError as e:
+        return {'status': 400, 'id': task_id, 'error': str(e)}
+
+    if not found:
+        return {'status': 404, 'id': task_id, 'error': 'Task not found'}
+    return {'status': 200, 'id': task_id}
+
+@app.route('/api/tasks/bulk', methods=['POST'])
+def api_bulk_tasks():
+    """API endpoint to apply many operations in a single transaction.
+
+    Accepts a JSON array of operations such as ``{"op": "add", "description": "..."}``,
+    ``{"op": "update", "id": 1, "description": "..."}``, ``{"op": "delete", "id": 1}``
+    or ``{"op": "status", "id": 1, "status": "done"}``, and returns one result per
+    operation. All successful operations are saved together. With ``?atomic=true``
+    any failed operation rolls back the whole request.
+    """
+    operations = request.get_json(silent=True)
+    if not isinstance(operations, list):
+        return jsonify({'error': 'Request body must be a JSON array of operations'}), 400
+
+    atomic = request.args.get('atomic', '').lower() in ('1', 'true', 'yes')
+    results = []
+    try:
+        with task_manager.batch():
+            for operation in operations:
+                results.append(apply_bulk_operation(operation))
+            if atomic and any(result['status'] >= 400 for result in results):
+                raise BulkAborted()
+    except BulkAborted:
+        return jsonify({'committed': False, 'results': results}), 409
+
+    return jsonify({'committed': True, 'results': results})
+
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def api_update_task(task_id):
     """API endpoint to update a task."""
@@ -169,5 +631,168 @@ def api_change_status(task_id):
     else:
         return jsonify({'error': 'Task not found'}), 404
 
+@app.route('/api/tasks/<int:task_id>/tags', methods=['PUT'])
+def api_set_tags(task_id):
+    """API endpoint replacing a task's tags with ``{"tags": [...]}``."""
+    data = request.get_json()
+    try:
+        if task_manager.set_tags(task_id, data.get('tags', [])):
+            return jsonify(task_manager.get_task(task_id))
+        else:
+            return jsonify({'error': 'Task not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/tasks/count', methods=['GET'])
+def api_count_tasks():
+    """API endpoint counting the tasks matching ``status``, ``tag`` and ``filter``.
+
+    The count comes from the bitmap indexes without listing any task.
+    """
+    try:
+        return jsonify({'count': task_manager.count_matching(request.args.get('status'), **get_tag_filters())})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/tags', methods=['GET'])
+def api_list_tags():
+    """API endpoint listing every tag with the number of tasks carrying it."""
+    return jsonify(task_manager.list_tags())
+
+@app.route('/api/tasks/<int:task_id>/deps', methods=['GET'])
+def api_get_dependencies(task_id):
+    """API endpoint describing what a task waits for and what waits for it."""
+    dependencies = task_manager.get_dependencies(task_id)
+    if dependencies is None:
+        return jsonify({'error': 'Task not found'}), 404
+    return jsonify(dependencies)
+
+@app.route('/api/tasks/<int:task_id>/deps', methods=['PUT'])
+def api_set_dependencies(task_id):
+    """API endpoint replacing the tasks a task waits for with ``{"blockedBy": [...]}``."""
+    data = request.get_json()
+    try:
+        if task_manager.set_dependencies(task_id, data.get('blockedBy', [])):
+            return jsonify(task_manager.get_dependencies(task_id))
+        else:
+            return jsonify({'error': 'Task not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/tasks/<int:task_id>/deps', methods=['POST'])
+def api_add_dependency(task_id):
+    """API endpoint making a task wait for the task ``{"id": ...}``.
+
+    Dependencies that would create a cycle are refused with a 400 naming
+    the existing chain.
+    """
+    data = request.get_json()
+    blocker_id = data.get('id')
+    try:
+        if task_manager.add_dependency(task_id, blocker_id):
+            return jsonify(task_manager.get_dependencies(task_id)), 201
+        else:
+            return jsonify({'error': 'Task not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/tasks/<int:task_id>/deps/<int:blocker_id>', methods=['DELETE'])
+def api_remove_dependency(task_id, blocker_id):
+    """API endpoint to stop a task waiting for another one."""
+    if task_manager.remove_dependency(task_id, blocker_id):
+        return jsonify({'message': 'Dependency removed successfully'})
+    else:
+        return jsonify({'error': 'Dependency not found'}), 404
+
+@app.route('/api/tasks/<int:task_id>/deps/unblocks', methods=['GET'])
+def api_unblocked_by(task_id):
+    """API endpoint listing the tasks that finishing a task would unblock."""
+    tasks = task_manager.unblocked_by(task_id)
+    if tasks is None:
+        return jsonify({'error': 'Task not found'}), 404
+    return jsonify(tasks)
+
+@app.route('/api/tasks/<int:task_id>/deps/critical-path', methods=['GET'])
+def api_task_critical_path(task_id):
+    """API endpoint for the longest chain of open tasks that must finish before a task."""
+    tasks = task_manager.critical_path(task_id)
+    if tasks is None:
+        return jsonify({'error': 'Task not found'}), 404
+    return jsonify(tasks)
+
+@app.route('/api/tasks/unblocked', methods=['GET'])
+def api_unblocked_tasks():
+    """API endpoint listing open tasks whose prerequisites are all done.
+
+    ``?blocked=true`` lists the tasks still waiting instead; ``limit``
+    caps the list (default and maximum 1000).
+    """
+    limit = min(request.args.get('limit', MAX_PAGE_SIZE, type=int), MAX_PAGE_SIZE)
+    if request.args.get('blocked', '').lower() in ('1', 'true', 'yes'):
+        return jsonify(task_manager.blocked_tasks(limit))
+    return jsonify(task_manager.unblocked_tasks(limit))
+
+@app.route('/api/tasks/critical-path', methods=['GET'])
+def api_critical_path():
+    """API endpoint for the longest chain of open dependent tasks in the store."""
+    return jsonify(task_manager.critical_path())
+
+def admin_only(view):
+    """Serve a view only to requests sending ``TASK_TRACKER_ADMIN_TOKEN`` as a bearer token.
+
+    Without a configured token the view answers 404, as if it did not exist.
+    """
+    ADMIN_ENDPOINTS.add(view.__name__)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = app.config['ADMIN_TOKEN']
+        if not token:
+            abort(404)
+        scheme, _, sent = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(sent.strip().encode(), token.encode()):
+            response = jsonify({'error': 'Admin token required'})
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response, 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/admin/backups', methods=['GET'])
+@admin_only
+def api_list_backups():
+    """Admin endpoint listing the store's backups, oldest first."""
+    try:
+        return jsonify(task_manager.list_backups())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/backups', methods=['POST'])
+@admin_only
+def api_create_backup():
+    """Admin endpoint taking an online backup while the app keeps serving.
+
+    Takes an incremental backup when an earlier one exists, or a full one
+    with ``?full=true``. Returns the backup's manifest entry.
+    """
+    full = request.args.get('full', '').lower() in ('1', 'true', 'yes')
+    try:
+        return jsonify(task_manager.backup(full)), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def add_workspace_routes():
+    """Serve every task route for named workspaces as well, under /w/<workspace>.
+
+    The workspace routes share their endpoints with the default list, so
+    views and templates work unchanged for both.
+    """
+    for rule in list(app.url_map.iter_rules()):
+        if rule.endpoint in ('static', 'metrics'):
+            continue
+        app.add_url_rule('/w/<workspace>' + rule.rule, rule.endpoint,
+                         methods=sorted(rule.methods - {'HEAD', 'OPTIONS'}))
+
+add_workspace_routes()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
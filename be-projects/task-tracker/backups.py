@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from locking import FileLock
+from storage import write_atomically
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class TaskBackups:
+    """Directory of full and incremental task backups with a manifest.
+
+    A full backup holds a put record for every task and an incremental one
+    holds the put and delete records that turn the previous backup into the
+    new one, in the mutation record shape used by storage and history.
+    Each backup is one NDJSON file, ``000001-full.ndjson`` or
+    ``000002-incremental.ndjson``, listed in ``manifest.json`` with the
+    backup it builds on, the number of tasks it restores to and the size
+    and SHA-256 of its file. Restoring a backup replays the chain from its
+    full backup, and the checksums and task counts are verified on the way.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.lock = FileLock(self.manifest_path)
+
+    @contextmanager
+    def writing(self):
+        """Hold the manifest lock, shared with other processes, while a backup is taken."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except IOError as e:
+            raise Exception(f"Failed to create backup directory: {e}")
+        with self.lock.acquire():
+            yield self
+
+    def list(self) -> List[Dict]:
+        """Return the manifest entries, oldest first."""
+        if not os.path.exists(self.manifest_path):
+            return []
+        try:
+            with open(self.manifest_path, 'r') as file:
+                return json.load(file)['backups']
+        except (IOError, ValueError, KeyError) as e:
+            raise Exception(f"Failed to read backup manifest: {e}")
+
+    def latest(self) -> Optional[Dict]:
+        """Return the manifest entry of the newest backup, if any."""
+        backups = self.list()
+        return backups[-1] if backups else None
+
+    def get(self, backup_id: Optional[int] = None) -> Dict:
+        """Return the manifest entry of a backup, the newest one by default."""
+        backups = self.list()
+        if not backups:
+            raise ValueError("No backups found")
+        if backup_id is None:
+            return backups[-1]
+        for entry in backups:
+            if entry['id'] == backup_id:
+                return entry
+        raise ValueError(f"Backup {backup_id} not found")
+
+    def write(self, kind: str, records: Iterable[Dict], tasks: int, taken_at: str, version: str) -> Dict:
+        """Write a backup file, then add it to the manifest, and return its entry.
+
+        The caller is inside ``writing()``, so the previous backup stays the
+        newest one while the file is written.
+        """
+        backups = self.list()
+        backup_id = backups[-1]['id'] + 1 if backups else 1
+        entry = {
+            'id': backup_id,
+            'kind': kind,
+            'base': backups[-1]['id'] if kind == 'incremental' else None,
+            'file': f"{backup_id:06d}-{kind}.ndjson",
+            'takenAt': taken_at,
+            'version': version,
+            'tasks': tasks,
+            'records': 0
+        }
+        digest = hashlib.sha256()
+
+        def write_records(file):
+            for record in records:
+                line = json.dumps(record, separators=(',', ':')) + '\n'
+                file.write(line)
+                digest.update(line.encode())
+                entry['records'] += 1
+
+        try:
+            entry['bytes'] = write_atomically(os.path.join(self.directory, entry['file']), write_records, True)
+            entry['sha256'] = digest.hexdigest()
+            write_atomically(self.manifest_path,
+                             lambda file: json.dump({'backups': backups + [entry]}, file, indent=2), True)
+        except IOError as e:
+            raise Exception(f"Failed to write backup: {e}")
+        return entry
+
+    def chain(self, backup_id: Optional[int] = None) -> List[Dict]:
+        """Return the backups to replay for a backup, from its full backup on."""
+        by_id = {entry['id']: entry for entry in self.list()}
+        chain = [self.get(backup_id)]
+        while chain[-1]['kind'] == 'incremental':
+            base = by_id.get(chain[-1]['base'])
+            if base is None:
+                raise Exception(f"Backup {chain[-1]['id']} builds on missing backup {chain[-1]['base']}")
+            chain.append(base)
+        chain.reverse()
+        return chain
+
+    def _read(self, entry: Dict) -> List[Dict]:
+        """Read the records of a backup file, checking its size and checksum."""
+        path = os.path.join(self.directory, entry['file'])
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except IOError as e:
+            raise Exception(f"Failed to read backup {entry['id']}: {e}")
+        if len(data) != entry['bytes'] or hashlib.sha256(data).hexdigest() != entry['sha256']:
+            raise Exception(f"Backup {entry['id']} failed verification: {entry['file']} is damaged")
+        return [json.loads(line) for line in data.splitlines()]
+
+    def load(self, backup_id: Optional[int] = None) -> List[Dict]:
+        """Rebuild the task list of a backup, the newest one by default, in ID order.
+
+        Raises ``ValueError`` for unknown backups and ``Exception`` when a
+        file of the chain is damaged or the result does not have the task
+        count recorded in the manifest.
+        """
+        by_id = {}
+        for entry in self.chain(backup_id):
+            if entry['kind'] == 'full':
+                by_id.clear()
+            for record in self._read(entry):
+                if record['op'] == 'put':
+                    by_id[record['task']['id']] = record['task']
+                elif record['op'] == 'delete':
+                    by_id.pop(record['id'], None)
+            if len(by_id) != entry['tasks']:
+                raise Exception(f"Backup {entry['id']} failed verification: it restores {len(by_id)} tasks, "
+                                f"not {entry['tasks']}")
+        return [by_id[task_id] for task_id in sorted(by_id)]
+
+    def verify(self, backup_id: Optional[int] = None) -> Dict:
+        """Check every backup file and rebuild one backup, the newest by default.
+
+        Returns ``{"backups": ..., "verified": id, "tasks": ...}``; raises
+        like ``load()`` on the first problem found.
+        """
+        backups = self.list()
+        for entry in backups:
+            self._read(entry)
+        tasks = self.load(backup_id)
+        return {'backups': len(backups), 'verified': self.get(backup_id)['id'], 'tasks': len(tasks)}
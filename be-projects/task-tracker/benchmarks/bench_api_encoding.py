@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Response encoding benchmark for the task API
+Times GET /api/tasks through the Flask test client with the standard
+library encoder, the fast JSON provider, gzip compression and the encoded
+body cache, and reports the bytes sent and the latency of each. The test
+client has no network, so the time to transfer the body at a given
+bandwidth is added to show what a client would wait for.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+# Keep the app's default store out of the working directory
+os.environ.setdefault('TASK_TRACKER_FILE', os.path.join(tempfile.mkdtemp(), 'tasks.json'))
+os.environ.setdefault('TASK_TRACKER_HISTORY', 'false')
+
+from flask.json.provider import DefaultJSONProvider
+
+import app
+from response_encoding import FastJSONProvider, orjson
+from task_manager import TaskManager
+from bench_indexes import MemoryStorage
+from bench_search import make_tasks
+
+# (name, JSON provider, compress, cache bodies)
+SETUPS = [
+    ('stdlib json', DefaultJSONProvider, False, False),
+    ('fast json', FastJSONProvider, False, False),
+    ('fast json + gzip', FastJSONProvider, True, False),
+    ('fast json + gzip + cache', FastJSONProvider, True, True),
+]
+
+
+def configure(provider, compress, cache):
+    """Switch the app to one benchmark setup."""
+    app.app.json = provider(app.app)
+    app.app.config['COMPRESS_RESPONSES'] = compress
+    app.body_cache.entries.clear()
+    app.body_cache.size = 0
+    app.body_cache.max_bytes = app.Config.RESPONSE_CACHE_MB << 20 if cache else 0
+
+
+def measure(client, path, repeat):
+    """Request ``path`` ``repeat`` times and return the body size and per-request times."""
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path, headers={'Accept-Encoding': 'gzip, deflate'})
+        size = len(response.get_data())
+        samples.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise Exception(f"GET {path} returned {response.status_code}")
+    return size, sorted(samples)
+
+
+def main():
+    """Compare each setup on full listings of several store sizes."""
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding and compression of /api/tasks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Numbers of tasks to list')
+    parser.add_argument('--repeat', type=int, default=20, help='Requests per setup and size')
+    parser.add_argument('--mbps', type=float, default=100, help='Bandwidth for the transfer estimate, in Mbit/s')
+    args = parser.parse_args()
+
+    print(f"orjson {'installed' if orjson is not None else 'not installed, fast json uses the stdlib'}")
+    client = app.app.test_client()
+    for size in args.sizes:
+        app.task_manager = TaskManager(storage=MemoryStorage(make_tasks(size)))
+        print(f"\nGET /api/tasks with {size:,} tasks")
+        print(f"{'setup':<26} {'bytes':>12} {'p50':>10} {'p95':>10} {'+ transfer':>12}")
+        baseline = None
+        for name, provider, compress, cache in SETUPS:
+            configure(provider, compress, cache)
+            body_bytes, samples = measure(client, '/api/tasks', args.repeat)
+            p50 = samples[len(samples) // 2] * 1000
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000
+            total = p50 + body_bytes * 8 / (args.mbps * 1000)
+            baseline = baseline or total
+            print(f"{name:<26} {body_bytes:>12,} {p50:>8.2f}ms {p95:>8.2f}ms {total:>10.2f}ms  "
+                  f"{baseline / total:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Dependency graph benchmark for TaskManager
+Builds a store where most tasks wait for a few earlier ones, then times
+adding dependencies (with the cycle check), status changes and the
+unblocked, unblocks and critical-path queries, next to recomputing the
+same answers from scratch over every task.
+"""
+
+import os
+import sys
+import time
+import argparse
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from task_manager import TaskManager
+from task_graph import OPEN_STATUSES
+from bench_indexes import MemoryStorage, make_tasks, time_per_op
+
+
+def make_dependent_tasks(count, rng):
+    """Build tasks that each wait for up to three tasks created shortly before them."""
+    tasks = make_tasks(count)
+    for task in tasks[1:]:
+        if rng.random() < 0.8:
+            first = max(1, task['id'] - 50)
+            task['blockedBy'] = sorted(set(rng.randint(first, task['id'] - 1) for _ in range(rng.randint(1, 3))))
+    return tasks
+
+
+def recompute(task_manager):
+    """Find the unblocked tasks and the critical path length by scanning every task."""
+    tasks = task_manager.tasks
+    is_open = lambda task_id: task_id in tasks and tasks[task_id].status in OPEN_STATUSES
+    unblocked = [task.id for task in tasks.values()
+                 if task.blocked_by and is_open(task.id) and not any(map(is_open, task.blocked_by))]
+    depth = {}
+    # Prerequisites have lower IDs here, so one pass in ID order is topological
+    for task_id in sorted(tasks):
+        if is_open(task_id):
+            depth[task_id] = 1 + max((depth.get(prerequisite, 0) for prerequisite in tasks[task_id].blocked_by),
+                                     default=0)
+    return unblocked, max(depth.values(), default=0)
+
+
+def main():
+    """Report the mean latency of each operation."""
+    parser = argparse.ArgumentParser(description="Benchmark TaskManager dependency queries")
+    parser.add_argument('--size', type=int, default=100_000, help='Number of tasks')
+    parser.add_argument('--ops', type=int, default=2000, help='Operations per measurement')
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    tasks = make_dependent_tasks(args.size, rng)
+    started = time.perf_counter()
+    task_manager = TaskManager(storage=MemoryStorage(tasks))
+    print(f"Loaded {args.size:,} tasks and built the graph in {time.perf_counter() - started:.2f}s")
+    print(f"{len(task_manager.graph.depth):,} tasks in the graph, critical path of "
+          f"{len(task_manager.critical_path())} tasks\n")
+
+    ids = list(range(2, args.size + 1))
+    pairs = [(task_id, rng.randint(max(1, task_id - 50), task_id - 1)) for task_id in rng.sample(ids, args.ops)]
+    statuses = [(rng.choice(ids), rng.choice(['todo', 'in-progress', 'done'])) for _ in range(args.ops)]
+    queries = [(rng.choice(ids),) for _ in range(args.ops)]
+
+    results = [
+        ('add_dependency', time_per_op(task_manager.add_dependency, pairs)),
+        ('mark_task_status', time_per_op(task_manager.mark_task_status, statuses)),
+        ('unblocked_tasks(limit=50)', time_per_op(task_manager.unblocked_tasks, [(50,)] * args.ops)),
+        ('unblocked_by', time_per_op(task_manager.unblocked_by, queries)),
+        ('critical_path()', time_per_op(task_manager.critical_path, [()] * args.ops)),
+        ('critical_path(task)', time_per_op(task_manager.critical_path, queries)),
+        ('recompute from scratch', time_per_op(recompute, [(task_manager,)] * 5)),
+    ]
+    for name, micros in results:
+        print(f"{name:<28} {micros:>12.1f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Index benchmark for TaskManager
+Measures the per-operation cost of point operations and filtered listings
+at 10k, 100k and 1M tasks, next to the linear scan they replaced.
+"""
+
+import os
+import sys
+import time
+import argparse
+import random
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from task_manager import TaskManager, VALID_STATUSES
+from storage import StorageBackend
+
+
+class MemoryStorage(StorageBackend):
+    """Storage backend that keeps nothing, so only in-memory work is measured."""
+
+    def __init__(self, tasks):
+        super().__init__(':memory:')
+        self.tasks = tasks
+
+    def load(self):
+        return self.tasks
+
+    def commit(self, records, snapshot):
+        pass
+
+
+def make_tasks(count):
+    """Build a list of synthetic tasks with mixed statuses."""
+    timestamp = datetime.now().isoformat()
+    return [{
+        'id': i,
+        'description': f'Task number {i}',
+        'status': VALID_STATUSES[i % 3],
+        'createdAt': timestamp,
+        'updatedAt': timestamp
+    } for i in range(1, count + 1)]
+
+
+def time_per_op(func, args_list):
+    """Return the mean time per call in microseconds."""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def linear_get(tasks, task_id):
+    """The previous get_task implementation, for comparison."""
+    for task in tasks:
+        if task['id'] == task_id:
+            return task
+    return None
+
+
+def run(size, operations):
+    """Benchmark one store size and return the results in microseconds."""
+    tasks = make_tasks(size)
+    task_manager = TaskManager(storage=MemoryStorage(list(tasks)))
+    ids = [(random.randint(1, size),) for _ in range(operations)]
+    scan_ids = ids[:max(1, operations // 100)]
+
+    results = {
+        'get_task': time_per_op(task_manager.get_task, ids),
+        'get_task (linear scan)': time_per_op(lambda task_id: linear_get(tasks, task_id), scan_ids),
+        'update_task': time_per_op(task_manager.update_task,
+                                   [(task_id, 'Updated') for (task_id,) in ids]),
+        'mark_task_status': time_per_op(task_manager.mark_task_status,
+                                        [(task_id, 'done') for (task_id,) in ids]),
+        'add_task': time_per_op(task_manager.add_task, [('New task',)] * operations),
+        'list_tasks(in-progress)': time_per_op(task_manager.list_tasks, [('in-progress',)] * 3),
+        'delete_task': time_per_op(task_manager.delete_task, ids),
+    }
+    return results
+
+
+def main():
+    """Run the benchmark for each store size."""
+    parser = argparse.ArgumentParser(description="Benchmark TaskManager index operations")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='Store sizes to benchmark')
+    parser.add_argument('--operations', type=int, default=10_000,
+                        help='Point operations per measurement')
+    args = parser.parse_args()
+
+    random.seed(42)
+    print(f"{'operation':<26}" + ''.join(f"{size:>14,}" for size in args.sizes))
+    all_results = [run(size, args.operations) for size in args.sizes]
+    for name in all_results[0]:
+        print(f"{name:<26}" + ''.join(f"{results[name]:>12.2f}us" for results in all_results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the in-memory task representation
+Measures how much memory 1M tasks take as plain dictionaries, the way they
+are loaded from tasks.json, next to the compact Task records TaskManager
+keeps, and how much a whole TaskManager with its indexes takes.
+"""
+
+import gc
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from task_manager import TaskManager
+from task_record import Task
+from bench_indexes import MemoryStorage, make_tasks
+
+
+def measure(build):
+    """Return the result of ``build()`` and the memory it holds in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    """Run the benchmark and print memory per layout."""
+    parser = argparse.ArgumentParser(description="Compare the memory used by task dictionaries and Task records")
+    parser.add_argument('--count', type=int, default=1_000_000, help='Number of tasks')
+    args = parser.parse_args()
+
+    # Round-trip through JSON so every task owns its own strings, as after loading tasks.json
+    encoded = json.dumps(make_tasks(args.count))
+
+    def load_manager():
+        task_manager = TaskManager(storage=MemoryStorage(json.loads(encoded)))
+        task_manager.storage.tasks = None
+        return task_manager
+
+    dicts, dict_size = measure(lambda: {task['id']: task for task in json.loads(encoded)})
+    del dicts
+    records, record_size = measure(lambda: {task['id']: Task.from_dict(task) for task in json.loads(encoded)})
+    del records
+    task_manager, manager_size = measure(load_manager)
+
+    print(f"Tasks:                 {args.count:,}")
+    print(f"Task dictionaries:     {dict_size / 2**20:8.1f} MiB ({dict_size / args.count:.0f} bytes/task)")
+    print(f"Task records:          {record_size / 2**20:8.1f} MiB ({record_size / args.count:.0f} bytes/task)")
+    print(f"Saved:                 {1 - record_size / dict_size:8.1%}")
+    print(f"TaskManager + indexes: {manager_size / 2**20:8.1f} MiB ({manager_size / args.count:.0f} bytes/task)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Search benchmark for TaskManager
+Builds a store of synthetic task descriptions and times token, prefix and
+phrase queries, with and without a status filter.
+"""
+
+import os
+import sys
+import time
+import argparse
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from task_manager import TaskManager, VALID_STATUSES
+from bench_indexes import MemoryStorage
+
+WORDS = ('review update deploy write test fix refactor document plan design migrate '
+         'api database frontend backend release customer invoice report dashboard '
+         'login search cache queue worker metrics alert budget roadmap meeting').split()
+
+QUERIES = [
+    ('token', 'invoice', None),
+    ('two tokens', 'customer invoice', None),
+    ('prefix', 'migr*', None),
+    ('phrase', '"fix login"', None),
+    ('rare token', 'task77777', None),
+    ('token + status', 'dashboard', 'in-progress'),
+]
+
+
+def make_tasks(count):
+    """Build synthetic tasks with random four-word descriptions plus a unique word."""
+    rng = random.Random(7)
+    return [{
+        'id': i,
+        'description': ' '.join(rng.choice(WORDS) for _ in range(4)) + f' task{i}',
+        'status': VALID_STATUSES[i % 3],
+        'createdAt': '2024-01-01T00:00:00',
+        'updatedAt': '2024-01-01T00:00:00'
+    } for i in range(1, count + 1)]
+
+
+def main():
+    """Run each query several times and report the mean latency."""
+    parser = argparse.ArgumentParser(description="Benchmark TaskManager full-text search")
+    parser.add_argument('--size', type=int, default=1_000_000, help='Number of tasks')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    task_manager = TaskManager(storage=MemoryStorage(make_tasks(args.size)))
+    print(f"Indexed {args.size:,} tasks in {time.perf_counter() - started:.1f}s")
+
+    for name, query, status in QUERIES:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            results = task_manager.search_tasks(query, status, limit=20)
+        elapsed = (time.perf_counter() - started) / args.repeat * 1000
+        print(f"{name:<16} {query:<20} {len(results):>3} results  {elapsed:9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
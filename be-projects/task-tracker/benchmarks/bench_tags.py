@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tag filter benchmark for TaskManager
+Builds a store of tagged tasks (1M by default) and times boolean filters
+over status and tags: counting the matches and fetching the first page from
+the bitmap indexes, next to checking a predicate against every task. Also
+reports how much memory the status and tag bitmaps take.
+"""
+
+import os
+import sys
+import time
+import argparse
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from task_manager import TaskManager
+from task_filter import parse_filter
+from bench_indexes import MemoryStorage, make_tasks
+
+# Tags with how often they occur: a few common labels and a long tail
+TAGS = [('backend', 0.3), ('frontend', 0.25), ('blocked', 0.05), ('urgent', 0.02), ('bug', 0.15),
+        ('docs', 0.05)] + [(f'team-{n}', 0.01) for n in range(40)]
+
+FILTERS = [
+    'tag=backend',
+    'status=todo AND tag=backend AND NOT tag=blocked',
+    'tag=urgent AND (tag=bug OR tag=blocked)',
+    '(tag=backend OR tag=frontend) AND NOT status=done',
+    'tag=team-7 AND status=in-progress',
+    'NOT tag=backend',
+]
+
+
+def make_tagged_tasks(count, rng):
+    """Build synthetic tasks with a random set of tags each."""
+    tasks = make_tasks(count)
+    for task in tasks:
+        tags = [tag for tag, share in TAGS if rng.random() < share]
+        if tags:
+            task['tags'] = tags
+    return tasks
+
+
+def compile_predicate(node):
+    """Compile a parsed filter to a Python predicate over one task, as a scan would check it."""
+    def source(node):
+        kind = node[0]
+        if kind == 'term':
+            return f"task.status == {node[2]!r}" if node[1] == 'status' else f"{node[2]!r} in task.tags"
+        if kind == 'not':
+            return f"not ({source(node[1])})"
+        return f" {kind} ".join(f"({source(child)})" for child in node[1])
+    return eval(f"lambda task: {source(node)}")
+
+
+def timed(func, repeat):
+    """Return the result of ``func`` and its mean duration in milliseconds."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def bitmap_bytes(bitmaps):
+    """Return the memory taken by bitmap chunk words and their tables."""
+    return sum(sys.getsizeof(bitmap.chunks) + sys.getsizeof(bitmap.keys)
+               + sum(map(sys.getsizeof, bitmap.chunks.values())) for bitmap in bitmaps)
+
+
+def main():
+    """Report the latency of each filter with and without the bitmap indexes."""
+    parser = argparse.ArgumentParser(description="Benchmark TaskManager tag filters")
+    parser.add_argument('--size', type=int, default=1_000_000, help='Number of tasks')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement')
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    started = time.perf_counter()
+    task_manager = TaskManager(storage=MemoryStorage(make_tagged_tasks(args.size, rng)))
+    print(f"Loaded {args.size:,} tasks with {len(task_manager.tag_index)} tags "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"Status bitmaps: {bitmap_bytes(task_manager.status_index.values()) / 1024:,.0f} KB, "
+          f"tag bitmaps: {bitmap_bytes(task_manager.tag_index.values()) / 1024:,.0f} KB\n")
+
+    print(f"{'filter':<50} {'matches':>9} {'count':>9} {'page':>9} {'scan':>10}")
+    tasks = list(task_manager.tasks.values())
+    for expression in FILTERS:
+        predicate = compile_predicate(parse_filter(expression))
+        count, count_ms = timed(lambda: task_manager.count_matching(filter_expression=expression), args.repeat)
+        _, page_ms = timed(lambda: task_manager.page_tasks(limit=50, filter_expression=expression), args.repeat)
+        scanned, scan_ms = timed(lambda: sum(1 for task in tasks if predicate(task)), 1)
+        if scanned != count:
+            raise Exception(f"{expression}: bitmaps found {count} tasks, the scan {scanned}")
+        print(f"{expression:<50} {count:>9,} {count_ms:>7.2f}ms {page_ms:>7.2f}ms {scan_ms:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
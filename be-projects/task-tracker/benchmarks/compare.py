@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark suite or load test result files
+Matches results by group, operation and store size, prints the change in
+latency and exits with status 1 when any result got slower than the
+threshold allows, so it can gate a CI job.
+"""
+
+import sys
+import json
+import argparse
+
+
+def load_results(path):
+    """Load a results file as a ``(group, name, size) -> result`` mapping."""
+    with open(path, 'r') as file:
+        report = json.load(file)
+    return report['meta'], {(result['group'], result['name'], result['size']): result
+                            for result in report['results']}
+
+
+def main():
+    """Print the per-result change between a baseline and a current run."""
+    parser = argparse.ArgumentParser(description="Compare two benchmark suite result files")
+    parser.add_argument('baseline', help='Results of the reference commit')
+    parser.add_argument('current', help='Results to check')
+    parser.add_argument('--metric', default='p50_ms', choices=['mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown reported as a regression (default: 0.2 = 20%%)')
+    parser.add_argument('--min-ms', type=float, default=0.05,
+                        help='Ignore differences smaller than this many milliseconds')
+    args = parser.parse_args()
+
+    baseline_meta, baseline = load_results(args.baseline)
+    current_meta, current = load_results(args.current)
+    print(f"Baseline: {baseline_meta.get('commit')} ({baseline_meta.get('date')}, {baseline_meta.get('backend')})")
+    print(f"Current:  {current_meta.get('commit')} ({current_meta.get('date')}, {current_meta.get('backend')})")
+    print(f"\n{'group':<12}{'operation':<30}{'size':>10}{'baseline':>12}{'current':>12}{'change':>9}")
+
+    regressions = []
+    for key in sorted(baseline.keys() & current.keys(), key=lambda key: (key[2], key[0], key[1])):
+        if args.metric not in baseline[key] or args.metric not in current[key]:
+            continue  # p99_ms is only reported by load tests
+        before = baseline[key][args.metric]
+        after = current[key][args.metric]
+        change = (after - before) / before if before else 0.0
+        regressed = change > args.threshold and after - before > args.min_ms
+        if regressed:
+            regressions.append(key)
+        group, name, size = key
+        print(f"{group:<12}{name:<30}{size:>10,}{before:>10.3f}ms{after:>10.3f}ms{change:>+8.1%}"
+              f"{'  ❌' if regressed else ''}")
+
+    missing = baseline.keys() - current.keys()
+    if missing:
+        print(f"\n{len(missing)} results from the baseline are missing in the current run")
+    if regressions:
+        print(f"\n❌ {len(regressions)} results regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
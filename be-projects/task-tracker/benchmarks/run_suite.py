@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Task Tracker
+Seeds stores of 1k, 100k and 1M tasks and measures every TaskManager
+operation, the cold start of task_cli.py commands and the latency and
+throughput of every app.py route through the Flask test client. Results are
+written as JSON so runs can be compared across commits with compare.py.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+
+TRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, TRACKER_DIR)
+
+from task_manager import TaskManager
+from storage import JSONStorage, create_storage
+from bench_search import make_tasks
+
+CLI_PATH = os.path.join(TRACKER_DIR, 'task_cli.py')
+
+
+def summarize(group, name, size, samples):
+    """Turn per-call durations in seconds into one result entry."""
+    samples = sorted(samples)
+    mean = sum(samples) / len(samples)
+    return {
+        'group': group,
+        'name': name,
+        'size': size,
+        'samples': len(samples),
+        'mean_ms': mean * 1000,
+        'p50_ms': samples[len(samples) // 2] * 1000,
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        'per_second': 1 / mean if mean else None
+    }
+
+
+def time_calls(func, args_list):
+    """Call ``func`` once per argument tuple and return each call's duration."""
+    samples = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def seed_store(backend, file_path, size):
+    """Write a store of ``size`` synthetic tasks in the backend's format."""
+    tasks = make_tasks(size)
+    if backend == 'sqlite':
+        storage = create_storage('sqlite', file_path)
+        storage.replace_all(tasks)
+        storage.close()
+    else:
+        JSONStorage(file_path).commit([], lambda: tasks, len(tasks))
+
+
+def bench_task_manager(task_manager, size, args, rng):
+    """Measure each TaskManager operation on a seeded store."""
+    results = []
+    ops = args.operations
+    heavy = [()] * args.heavy_repeat
+    ids = rng.sample(range(1, size + 1), min(size, ops))
+    point_ids = [(task_id,) for task_id in ids]
+    _, cursor = task_manager.page_tasks(limit=50)
+    # Seeded tasks are dated 2024, so this window holds only tasks changed by the benchmark
+    window_start = datetime.now().isoformat()
+
+    def batch_add(count):
+        with task_manager.batch():
+            for i in range(count):
+                task_manager.add_task(f'batched task {i}')
+
+    measurements = [
+        ('get_task', task_manager.get_task, point_ids),
+        ('count_tasks', task_manager.count_tasks, [()] * ops),
+        ('page_tasks (id)', task_manager.page_tasks, [()] * ops),
+        ('page_tasks (second page)', lambda: task_manager.page_tasks(cursor=cursor), [()] * ops),
+        ('page_tasks (createdAt desc)', lambda: task_manager.page_tasks(sort='createdAt', descending=True),
+         [()] * ops),
+        ('page_tasks (status filter)', lambda: task_manager.page_tasks('in-progress', sort='updatedAt'),
+         [()] * ops),
+        ('search_tasks (token)', lambda: task_manager.search_tasks('invoice'), [()] * ops),
+        ('search_tasks (phrase)', lambda: task_manager.search_tasks('"fix login"'), [()] * ops),
+        ('list_tasks (status filter)', lambda: task_manager.list_tasks('done'), heavy),
+        ('list_tasks (all)', task_manager.list_tasks, heavy),
+        ('iter_tasks (all)', lambda: sum(1 for _ in task_manager.iter_tasks()), heavy),
+        ('add_task', task_manager.add_task, [(f'benchmark task {i}',) for i in range(ops)]),
+        ('update_task', task_manager.update_task, [(task_id, 'updated by benchmark') for task_id in ids]),
+        ('mark_task_status', task_manager.mark_task_status, [(task_id, 'in-progress') for task_id in ids]),
+        ('page_tasks (updated_since)', lambda: task_manager.page_tasks(sort='updatedAt', updated_since=window_start),
+         [()] * ops),
+        ('import_task', task_manager.import_task, [({'description': f'imported task {i}'},) for i in range(ops)]),
+        ('batch (100 adds)', batch_add, [(100,)] * max(1, ops // 100)),
+        ('delete_task', task_manager.delete_task, point_ids),
+    ]
+    for name, func, args_list in measurements:
+        results.append(summarize('taskmanager', name, size, time_calls(func, args_list)))
+    return results
+
+
+def bench_cli(task_manager, size, args, env):
+    """Measure task_cli.py from process start to exit, with and without the daemon."""
+    from daemon import TaskDaemon
+
+    def run(*command):
+        subprocess.run([sys.executable, CLI_PATH, *command], env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    runs = [()] * args.cli_runs
+    task_id = str(next(iter(task_manager.tasks)))
+    results = [
+        summarize('cli', 'add', size, time_calls(lambda: run('--no-daemon', 'add', 'cli task'), runs)),
+        summarize('cli', 'mark-done', size, time_calls(lambda: run('--no-daemon', 'mark-done', task_id), runs)),
+        summarize('cli', 'search', size, time_calls(lambda: run('--no-daemon', 'search', 'invoice'), runs)),
+    ]
+
+    server = TaskDaemon(task_manager, env['TASK_TRACKER_SOCKET'])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        results.append(summarize('cli', 'add (daemon)', size,
+                                 time_calls(lambda: run('add', 'cli task'), runs)))
+        results.append(summarize('cli', 'mark-done (daemon)', size,
+                                 time_calls(lambda: run('mark-done', task_id), runs)))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def bench_api(task_manager, size, args, rng):
+    """Measure every app.py route through the Flask test client.
+
+    Workspace routes share their views with the default list, so one read
+    and one write under ``/w/<name>/`` stand for all of them.
+    """
+    import app
+    from config import Config
+    app.default_task_manager = task_manager
+    app.app.config['ADMIN_TOKEN'] = 'bench'
+    Config.WORKSPACES_DIR = os.path.join(os.path.dirname(os.path.abspath(task_manager.file_path)), 'workspaces')
+    client = app.app.test_client()
+    count = args.requests
+    heavy = args.heavy_repeat
+    # Deleted tasks are never picked again for the other routes
+    task_ids = list(task_manager.tasks)
+    rng.shuffle(task_ids)
+    doomed = iter(task_ids[:2 * count])
+    kept = task_ids[2 * count:] or task_ids
+    pick = lambda: rng.choice(kept)
+    bulk = [{'op': 'add', 'description': f'bulk task {i}'} for i in range(10)]
+    ndjson = ''.join(json.dumps({'description': f'imported task {i}'}) + '\n' for i in range(10))
+    admin = {'Authorization': 'Bearer bench'}
+    # Distinct edges from a later to an earlier task, which can never close a cycle
+    edges = set()
+    while len(edges) < min(count, len(kept) * (len(kept) - 1) // 2):
+        first, second = rng.sample(kept, 2)
+        edges.add((max(first, second), min(first, second)))
+    added = iter(sorted(edges))
+    removed = iter(sorted(edges))
+
+    def recent_changes():
+        """Return a delta sync path starting 50 versions back."""
+        return f'/api/tasks/changes?since={task_manager.store_token}-{max(0, task_manager.store_version - 50)}'
+
+    def add_dependency():
+        task_id, blocker_id = next(added)
+        return client.post(f'/api/tasks/{task_id}/deps', json={'id': blocker_id})
+
+    def remove_dependency():
+        task_id, blocker_id = next(removed)
+        return client.delete(f'/api/tasks/{task_id}/deps/{blocker_id}')
+
+    def request(method, path, **kwargs):
+        """Return a callable making one request and checking its status."""
+        def call():
+            response = getattr(client, method)(path() if callable(path) else path, **kwargs)
+            response.get_data()
+            if response.status_code >= 400:
+                raise Exception(f"{method.upper()} {response.request.path} returned {response.status_code}")
+        return call
+
+    def checked(name, send):
+        """Return a callable making the request built by ``send`` and checking its status."""
+        def call():
+            response = send()
+            response.get_data()
+            if response.status_code >= 400:
+                raise Exception(f"{name} returned {response.status_code}")
+        return call
+
+    routes = [
+        ('GET /', request('get', '/'), count),
+        ('GET /filter/<status>', request('get', '/filter/done'), count),
+        ('GET /add', request('get', '/add'), count),
+        ('POST /add', request('post', '/add', data={'description': 'web task'}), count),
+        ('GET /edit/<id>', request('get', lambda: f'/edit/{pick()}'), count),
+        ('POST /edit/<id>', request('post', lambda: f'/edit/{pick()}', data={'description': 'edited'}), count),
+        ('POST /status/<id>/<status>', request('post', lambda: f'/status/{pick()}/done'), count),
+        ('GET /api/tasks?limit=50', request('get', '/api/tasks?limit=50'), count),
+        ('GET /api/tasks', request('get', '/api/tasks'), heavy),
+        ('GET /api/tasks/search', request('get', '/api/tasks/search?q=invoice'), count),
+        ('GET /api/tasks/export', request('get', '/api/tasks/export'), heavy),
+        ('POST /api/tasks', request('post', '/api/tasks', json={'description': 'api task'}), count),
+        ('POST /api/tasks/bulk', request('post', '/api/tasks/bulk', json=bulk), count),
+        ('POST /api/tasks/import', request('post', '/api/tasks/import', data=ndjson), count),
+        ('PUT /api/tasks/<id>', request('put', lambda: f'/api/tasks/{pick()}', json={'description': 'put'}),
+         count),
+        ('PUT /api/tasks/<id>/status', request('put', lambda: f'/api/tasks/{pick()}/status',
+                                               json={'status': 'in-progress'}), count),
+        ('DELETE /api/tasks/<id>', request('delete', lambda: f'/api/tasks/{next(doomed)}'), count),
+        ('POST /delete/<id>', request('post', lambda: f'/delete/{next(doomed)}'), count),
+        ('GET /api/tasks/stats', request('get', '/api/tasks/stats'), count),
+        ('GET /api/tasks/changes', request('get', recent_changes), count),
+        ('GET /api/tasks/count', request('get', '/api/tasks/count?filter=status=todo OR status=done'), count),
+        ('GET /api/tags', request('get', '/api/tags'), count),
+        ('PUT /api/tasks/<id>/tags', request('put', lambda: f'/api/tasks/{pick()}/tags',
+                                             json={'tags': ['bench', 'api']}), count),
+        ('POST /api/tasks/<id>/deps', checked('POST /api/tasks/<id>/deps', add_dependency), len(edges)),
+        ('GET /api/tasks/<id>/deps', request('get', lambda: f'/api/tasks/{pick()}/deps'), count),
+        ('GET /api/tasks/<id>/deps/unblocks', request('get', lambda: f'/api/tasks/{pick()}/deps/unblocks'), count),
+        ('GET /api/tasks/<id>/deps/critical-path',
+         request('get', lambda: f'/api/tasks/{pick()}/deps/critical-path'), count),
+        ('GET /api/tasks/unblocked', request('get', '/api/tasks/unblocked'), count),
+        ('GET /api/tasks/critical-path', request('get', '/api/tasks/critical-path'), count),
+        ('DELETE /api/tasks/<id>/deps/<id>', checked('DELETE /api/tasks/<id>/deps/<id>', remove_dependency),
+         len(edges)),
+        ('PUT /api/tasks/<id>/deps', request('put', lambda: f'/api/tasks/{pick()}/deps', json={'blockedBy': []}),
+         count),
+        ('GET /metrics', request('get', '/metrics'), count),
+        ('GET /api/admin/backups', request('get', '/api/admin/backups', headers=admin), count),
+        ('POST /api/admin/backups', request('post', '/api/admin/backups', headers=admin), heavy),
+        # The first write creates the workspace
+        ('POST /w/<name>/api/tasks', request('post', '/w/bench/api/tasks', json={'description': 'workspace task'}),
+         count),
+        ('GET /w/<name>/api/tasks?limit=50', request('get', '/w/bench/api/tasks?limit=50'), count),
+    ]
+    return [summarize('api', name, size, time_calls(call, [()] * repeat)) for name, call, repeat in routes]
+
+
+def git_commit():
+    """Return the current git commit, or None outside a checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=TRACKER_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Run the suite for each store size and write the results file."""
+    parser = argparse.ArgumentParser(description="Benchmark TaskManager, the CLI and the Flask API")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000],
+                        help='Store sizes to benchmark')
+    parser.add_argument('--backend', default='sqlite', choices=['json', 'log', 'sqlite'])
+    parser.add_argument('--groups', nargs='+', default=['taskmanager', 'cli', 'api'],
+                        choices=['taskmanager', 'cli', 'api'], help='Parts of the suite to run')
+    parser.add_argument('--operations', type=int, default=500, help='Calls per TaskManager operation')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per API route')
+    parser.add_argument('--cli-runs', type=int, default=3, help='Runs per CLI command')
+    parser.add_argument('--heavy-repeat', type=int, default=3,
+                        help='Runs of operations that return the whole store')
+    parser.add_argument('--output', default='benchmark-results.json', help='Results file')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    store_dir = tempfile.mkdtemp(prefix='task-tracker-bench-')
+    os.environ['TASK_TRACKER_FILE'] = os.path.join(store_dir, 'app-placeholder.json')
+    results = []
+    for size in args.sizes:
+        file_path = os.path.join(store_dir, f'tasks-{size}.db' if args.backend == 'sqlite' else f'tasks-{size}.json')
+        print(f"Seeding {size:,} tasks ({args.backend})...", flush=True)
+        seed_store(args.backend, file_path, size)
+        env = dict(os.environ, TASK_TRACKER_BACKEND=args.backend, TASK_TRACKER_FILE=file_path,
+                   TASK_TRACKER_SHARED='false', TASK_TRACKER_SOCKET=file_path + '.sock')
+
+        started = time.perf_counter()
+        task_manager = TaskManager(file_path, backend=args.backend)
+        results.append(summarize('taskmanager', 'load', size, [time.perf_counter() - started]))
+
+        if 'taskmanager' in args.groups:
+            print("  TaskManager operations", flush=True)
+            results.extend(bench_task_manager(task_manager, size, args, rng))
+        if 'api' in args.groups:
+            print("  Flask routes", flush=True)
+            results.extend(bench_api(task_manager, size, args, rng))
+        if 'cli' in args.groups:
+            print("  CLI commands", flush=True)
+            results.extend(bench_cli(task_manager, size, args, env))
+        task_manager.close()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.backend,
+            'sizes': args.sizes
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print(f"\n{'group':<12}{'operation':<40}{'size':>10}{'p50':>12}{'p95':>12}")
+    for result in results:
+        print(f"{result['group']:<12}{result['name']:<40}{result['size']:>10,}"
+              f"{result['p50_ms']:>10.3f}ms{result['p95_ms']:>10.3f}ms")
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Multi-process stress test for the Task Tracker API
+Starts several worker processes, each with its own copy of app.py sharing one
+store (as gunicorn workers would), hammers the API from all of them at once
+and then checks that no update was lost.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+TRACKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, TRACKER_DIR)
+
+
+def worker(worker_id, operations, start_event, results):
+    """Add tasks and change their status through this worker's own app instance."""
+    import app
+    client = app.app.test_client()
+    start_event.wait()
+
+    added = {}
+    started = time.perf_counter()
+    for i in range(operations):
+        response = client.post('/api/tasks', json={'description': f'worker {worker_id} task {i}'})
+        task_id = response.get_json()['id']
+        added[task_id] = 'todo'
+        if i % 2 == 0:
+            client.put(f'/api/tasks/{task_id}/status', json={'status': 'done'})
+            added[task_id] = 'done'
+        client.get('/api/tasks?limit=20')
+    results.put((worker_id, added, time.perf_counter() - started))
+
+
+def run(args, store_dir):
+    """Run the workers against a store in ``store_dir`` and return whether updates were lost."""
+    store_file = os.path.join(store_dir, 'tasks.db' if args.backend == 'sqlite' else 'tasks.json')
+    os.environ['TASK_TRACKER_BACKEND'] = args.backend
+    os.environ['TASK_TRACKER_FILE'] = store_file
+    os.environ['TASK_TRACKER_SHARED'] = 'false' if args.no_shared else 'true'
+
+    context = multiprocessing.get_context('spawn')
+    start_event = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(i, args.operations, start_event, results))
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+    time.sleep(1)
+    started = time.perf_counter()
+    start_event.set()
+    outcomes = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    from task_manager import TaskManager
+    task_manager = TaskManager(store_file, backend=args.backend)
+    expected = {}
+    duplicate_ids = 0
+    for _, added, _ in outcomes:
+        duplicate_ids += len(expected.keys() & added.keys())
+        expected.update(added)
+    missing = [task_id for task_id in expected if task_manager.get_task(task_id) is None]
+    wrong_status = [task_id for task_id, status in expected.items()
+                    if task_id not in missing and task_manager.get_task(task_id)['status'] != status]
+
+    # One POST and one GET per task, plus a PUT for every task marked done
+    requests_made = sum(2 * len(added) + list(added.values()).count('done') for _, added, _ in outcomes)
+    print(f"Backend:          {args.backend} ({'unshared' if args.no_shared else 'shared'})")
+    print(f"Workers:          {args.workers}")
+    print(f"Tasks expected:   {args.workers * args.operations}")
+    print(f"Tasks in store:   {len(task_manager.list_tasks())}")
+    print(f"Duplicate IDs:    {duplicate_ids}")
+    print(f"Lost tasks:       {len(missing)}")
+    print(f"Lost status sets: {len(wrong_status)}")
+    print(f"Requests:         {requests_made} in {elapsed:.2f}s ({requests_made / elapsed:.0f} req/s)")
+    task_manager.close()
+
+    lost = bool(duplicate_ids or missing or wrong_status)
+    print("❌ Updates were lost" if lost else "✅ No update was lost")
+    return lost
+
+
+
+def main():
+    """Run the stress test and report lost updates and throughput."""
+    parser = argparse.ArgumentParser(description="Stress test a shared task store from several processes")
+    parser.add_argument('--workers', type=int, default=4, help='Number of worker processes')
+    parser.add_argument('--operations', type=int, default=200, help='Tasks added per worker')
+    parser.add_argument('--backend', default='json', choices=['json', 'log', 'sqlite'])
+    parser.add_argument('--no-shared', action='store_true',
+                        help='Disable cross-process coordination to demonstrate lost updates')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='task-tracker-stress-') as store_dir:
+        lost = run(args, store_dir)
+    sys.exit(1 if lost else 0)
+
+if __name__ == "__main__":
+    main()
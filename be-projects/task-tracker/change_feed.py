@@ -0,0 +1,47 @@
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+# Kinds of change recorded in the feed
+CHANGE_KINDS = ['add', 'update', 'status', 'delete']
+
+
+class ChangeFeed:
+    """Bounded, ordered log of recent task changes for delta sync.
+
+    Entries are ``(seq, kind, task_id, task)`` tuples in commit order, where
+    ``seq`` is the store version that committed the change, ``kind`` is one
+    of ``CHANGE_KINDS`` and ``task`` is the new task record, or ``None`` for
+    a delete tombstone. Only the newest ``max_size`` entries are kept;
+    ``floor`` is the newest version whose changes may have been dropped, so
+    clients that synced before it have to download everything again.
+    """
+
+    def __init__(self, version: int = 0, max_size: int = 10000):
+        self.entries = deque()
+        self.max_size = max_size
+        self.floor = version
+
+    def append(self, seq: int, changes: Iterable[Tuple[str, int, object]]):
+        """Record the ``(kind, task_id, task)`` changes committed as version ``seq``."""
+        for kind, task_id, task in changes:
+            self.entries.append((seq, kind, task_id, task))
+        while len(self.entries) > self.max_size:
+            self.floor = self.entries.popleft()[0]
+
+    def since(self, seq: int) -> Optional[List[Tuple[int, str, int, object]]]:
+        """Return the changes committed after version ``seq``.
+
+        Only the latest change of each task is returned, in commit order, so
+        the result never grows beyond the number of tasks that changed.
+        Returns ``None`` if changes after ``seq`` have already been dropped.
+        """
+        if seq < self.floor:
+            return None
+        latest = {}
+        for entry in reversed(self.entries):
+            if entry[0] <= seq:
+                break
+            latest.setdefault(entry[2], entry)
+        changes = list(latest.values())
+        changes.reverse()
+        return changes
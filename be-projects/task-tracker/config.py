@@ -0,0 +1,39 @@
+import os
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY') or 'task-tracker-secret-key-2024'
+    # Storage engine: 'json' (single file), 'log' (snapshot + append-only log) or 'sqlite'
+    STORAGE_BACKEND = os.environ.get('TASK_TRACKER_BACKEND', 'json')
+    # Defaults to tasks.json, or tasks.db for the sqlite backend
+    TASKS_FILE = os.environ.get('TASK_TRACKER_FILE')
+    LOG_COMPACT_THRESHOLD = int(os.environ.get('TASK_TRACKER_COMPACT_THRESHOLD', '1000'))
+    # Set when several processes (e.g. gunicorn workers) share one store
+    SHARED_STORE = os.environ.get('TASK_TRACKER_SHARED', 'false').lower() in ('1', 'true', 'yes')
+    # Unix socket of the optional task daemon; defaults to <store file>.sock
+    DAEMON_SOCKET = os.environ.get('TASK_TRACKER_SOCKET')
+    # Number of recent changes kept for /api/tasks/changes delta sync
+    CHANGE_FEED_SIZE = int(os.environ.get('TASK_TRACKER_CHANGE_FEED_SIZE', '10000'))
+    # 'fsync' (every commit), 'periodic' (at most every FSYNC_INTERVAL_MS) or 'buffered' (OS decides)
+    DURABILITY = os.environ.get('TASK_TRACKER_DURABILITY', 'periodic')
+    FSYNC_INTERVAL_MS = int(os.environ.get('TASK_TRACKER_FSYNC_INTERVAL_MS', '1000'))
+    # Persist changes from a background thread, grouped every FLUSH_INTERVAL_MS or FLUSH_MUTATIONS tasks
+    WRITE_BEHIND = os.environ.get('TASK_TRACKER_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+    FLUSH_INTERVAL_MS = int(os.environ.get('TASK_TRACKER_FLUSH_MS', '50'))
+    FLUSH_MUTATIONS = int(os.environ.get('TASK_TRACKER_FLUSH_MUTATIONS', '1000'))
+    # Record every change for point-in-time queries (/api/tasks?as_of=, list --as-of)
+    HISTORY = os.environ.get('TASK_TRACKER_HISTORY', 'false').lower() in ('1', 'true', 'yes')
+    # Minimum size of the changes logged between two history snapshots
+    HISTORY_SNAPSHOT_KB = int(os.environ.get('TASK_TRACKER_HISTORY_SNAPSHOT_KB', '1024'))
+    # Named task lists (/w/<name>/..., --workspace) live here, one store file each
+    WORKSPACES_DIR = os.environ.get('TASK_TRACKER_WORKSPACES_DIR', 'workspaces')
+    # Most workspaces kept loaded at once; the least recently used idle ones are closed
+    MAX_LOADED_WORKSPACES = int(os.environ.get('TASK_TRACKER_MAX_LOADED_WORKSPACES', '64'))
+    # gzip/deflate responses of at least COMPRESS_MIN_BYTES for clients that accept it
+    COMPRESS_RESPONSES = os.environ.get('TASK_TRACKER_COMPRESS', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESS_MIN_BYTES = int(os.environ.get('TASK_TRACKER_COMPRESS_MIN_BYTES', '1024'))
+    COMPRESS_LEVEL = int(os.environ.get('TASK_TRACKER_COMPRESS_LEVEL', '1'))
+    # Memory for encoded /api/tasks bodies reused while the store version is unchanged; 0 disables
+    RESPONSE_CACHE_MB = int(os.environ.get('TASK_TRACKER_RESPONSE_CACHE_MB', '32'))
+    # Bearer token for the /api/admin/ endpoints; without one they are disabled
+    ADMIN_TOKEN = os.environ.get('TASK_TRACKER_ADMIN_TOKEN', '')
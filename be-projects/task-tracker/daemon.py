@@ -0,0 +1,192 @@
+import functools
+import json
+import os
+import socket
+import socketserver
+from itertools import islice
+from typing import Dict, IO, Iterator, Optional
+
+from ndjson_io import import_tasks
+
+# TaskManager methods a client may call through the daemon
+METHODS = {'add_task', 'update_task', 'delete_task', 'mark_task_status', 'list_tasks',
+           'count_tasks', 'page_tasks', 'search_tasks', 'get_task', 'tasks_as_of',
+           'backup', 'restore_backup', 'list_backups', 'verify_backup', 'set_dependencies',
+           'add_dependency', 'remove_dependency', 'get_dependencies', 'unblocked_tasks', 'blocked_tasks',
+           'unblocked_by', 'critical_path', 'set_tags', 'add_tags', 'remove_tags', 'list_tags',
+           'count_matching'}
+
+
+def socket_path_for(config) -> str:
+    """Return the daemon socket path for a configuration such as ``config.Config``."""
+    if config.DAEMON_SOCKET:
+        return config.DAEMON_SOCKET
+    from storage import DEFAULT_FILES
+    return (config.TASKS_FILE or DEFAULT_FILES[config.STORAGE_BACKEND]) + '.sock'
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Answer newline-delimited JSON requests on one client connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            response = self.server.dispatch(line)
+            self.wfile.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+            self.wfile.flush()
+
+
+class TaskDaemon(socketserver.ThreadingUnixStreamServer):
+    """Serves one TaskManager to local clients over a Unix domain socket.
+
+    The store is parsed once when the daemon starts and then answered from
+    memory. Each request is a JSON line such as
+    ``{"method": "add_task", "args": ["Buy milk"]}`` and gets back
+    ``{"result": ...}`` or ``{"error": "...", "type": "ValueError"}``.
+    Requests with a ``"workspace"`` name are answered from that workspace,
+    loaded through the daemon's WorkspacePool.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, task_manager, socket_path: str, workspaces=None):
+        """Bind the socket, replacing a stale one left by a daemon that died."""
+        if os.path.exists(socket_path):
+            probe = DaemonClient.connect(socket_path)
+            if probe is not None:
+                probe.close()
+                raise Exception(f"A task daemon is already listening on {socket_path}")
+            os.unlink(socket_path)
+        self.task_manager = task_manager
+        self.workspaces = workspaces
+        self.socket_path = socket_path
+        super().__init__(socket_path, DaemonRequestHandler)
+
+    def server_bind(self):
+        """Bind the socket and restrict it to its owner.
+
+        Clients can run any method in ``METHODS``, including restores from a
+        directory of their choice, so no other user may connect.
+        """
+        super().server_bind()
+        os.chmod(self.socket_path, 0o600)
+
+    def dispatch(self, line: bytes) -> Dict:
+        """Run one request and return the response object."""
+        try:
+            request = json.loads(line)
+            workspace = request.get('workspace')
+            if workspace is None:
+                return {'result': self.run(self.task_manager, request)}
+            if self.workspaces is None:
+                raise ValueError("This task daemon does not serve workspaces")
+            with self.workspaces.workspace(workspace) as task_manager:
+                return {'result': self.run(task_manager, request)}
+        except ValueError as e:
+            return {'error': str(e), 'type': 'ValueError'}
+        except Exception as e:
+            return {'error': str(e), 'type': 'Exception'}
+
+    @staticmethod
+    def run(task_manager, request: Dict):
+        """Call the requested method on a task manager and return its result."""
+        method = request['method']
+        args = request.get('args', [])
+        task_manager.refresh()
+        if method == 'import_lines':
+            lines, first_line = args
+            return import_tasks(task_manager, lines, max(len(lines), 1), first_line=first_line)
+        if method not in METHODS:
+            raise ValueError(f"Unknown method: {method}")
+        return getattr(task_manager, method)(*args, **request.get('kwargs', {}))
+
+    def server_close(self):
+        """Stop listening and remove the socket file."""
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class DaemonClient:
+    """Thin client for a running TaskDaemon.
+
+    It offers the same read and write methods as TaskManager, so callers can
+    use either one. Errors raised in the daemon are raised again here.
+    With a ``workspace`` name, every call goes to that workspace.
+    """
+
+    def __init__(self, socket_path: str, workspace: Optional[str] = None):
+        self.workspace = workspace
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.socket.connect(socket_path)
+        except OSError:
+            self.socket.close()
+            raise
+        self.file = self.socket.makefile('rwb')
+
+    @classmethod
+    def connect(cls, socket_path: str, workspace: Optional[str] = None) -> Optional['DaemonClient']:
+        """Connect to the daemon, or return ``None`` if none is listening."""
+        if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+            return None
+        try:
+            return cls(socket_path, workspace)
+        except OSError:
+            return None
+
+    def call(self, method: str, *args, **kwargs):
+        """Call a method in the daemon and return its result."""
+        request = {'method': method, 'args': args}
+        if kwargs:
+            request['kwargs'] = kwargs
+        if self.workspace is not None:
+            request['workspace'] = self.workspace
+        try:
+            self.file.write(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+            self.file.flush()
+            line = self.file.readline()
+        except OSError as e:
+            raise Exception(f"Failed to reach task daemon: {e}")
+        if not line:
+            raise Exception("Task daemon closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise (ValueError if response['type'] == 'ValueError' else Exception)(response['error'])
+        return response['result']
+
+    def __getattr__(self, name: str):
+        if name in METHODS:
+            return functools.partial(self.call, name)
+        raise AttributeError(name)
+
+    def iter_tasks(self, chunk_size: int = 1000) -> Iterator[Dict]:
+        """Iterate over all tasks in ID order, one page per request."""
+        cursor = None
+        while True:
+            tasks, cursor = self.call('page_tasks', limit=chunk_size, cursor=cursor)
+            yield from tasks
+            if cursor is None:
+                return
+
+    def import_tasks(self, file: IO[str], chunk_size: int = 1000, max_errors: int = 20) -> Dict:
+        """Send NDJSON records to the daemon one chunk per request.
+
+        Returns the same summary as ``ndjson_io.import_tasks``.
+        """
+        summary = {'imported': 0, 'duplicates': 0, 'invalid': 0, 'errors': []}
+        first_line = 1
+        lines = iter(file)
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                return summary
+            result = self.call('import_lines', chunk, first_line)
+            for key in ('imported', 'duplicates', 'invalid'):
+                summary[key] += result[key]
+            summary['errors'].extend(result['errors'][:max_errors - len(summary['errors'])])
+            first_line += len(chunk)
+
+    def close(self):
+        """Close the connection to the daemon."""
+        self.file.close()
+        self.socket.close()
@@ -0,0 +1,263 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+class SortedIndex:
+    """Sorted collection of unique keys split into bounded chunks.
+
+    Keys live in a list of sorted chunks of at most ``2 * chunk_size`` items,
+    with ``maxes`` holding the last key of each chunk. Inserts and removals
+    bisect to one chunk and only shift that chunk, so they stay cheap for
+    millions of keys, and iteration can start right after any key.
+    """
+
+    def __init__(self, keys=(), chunk_size: int = 1000):
+        self.chunk_size = chunk_size
+        self.chunks: List[List[Any]] = []
+        self.maxes: List[Any] = []
+        self.size = 0
+        for key in sorted(keys):
+            if not self.chunks or len(self.chunks[-1]) >= chunk_size:
+                self.chunks.append([])
+                self.maxes.append(None)
+            self.chunks[-1].append(key)
+            self.maxes[-1] = key
+            self.size += 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key) -> bool:
+        position = bisect_left(self.maxes, key)
+        if position == len(self.maxes):
+            return False
+        chunk = self.chunks[position]
+        index = bisect_left(chunk, key)
+        return index < len(chunk) and chunk[index] == key
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self.chunks:
+            yield from chunk
+
+    def add(self, key):
+        """Insert a key; keys already present are ignored."""
+        if not self.maxes:
+            self.chunks.append([key])
+            self.maxes.append(key)
+            self.size = 1
+            return
+
+        position = bisect_left(self.maxes, key)
+        if position == len(self.maxes):
+            position -= 1
+            chunk = self.chunks[position]
+            chunk.append(key)
+            self.maxes[position] = key
+        else:
+            chunk = self.chunks[position]
+            index = bisect_left(chunk, key)
+            if index < len(chunk) and chunk[index] == key:
+                return
+            insort(chunk, key)
+        self.size += 1
+
+        if len(chunk) > 2 * self.chunk_size:
+            self.chunks.insert(position + 1, chunk[self.chunk_size:])
+            del chunk[self.chunk_size:]
+            self.maxes.insert(position, chunk[-1])
+
+    def discard(self, key):
+        """Remove a key if it is present."""
+        position = bisect_left(self.maxes, key)
+        if position == len(self.maxes):
+            return
+        chunk = self.chunks[position]
+        index = bisect_left(chunk, key)
+        if index == len(chunk) or chunk[index] != key:
+            return
+
+        del chunk[index]
+        self.size -= 1
+        if not chunk:
+            del self.chunks[position]
+            del self.maxes[position]
+        elif index == len(chunk):
+            self.maxes[position] = chunk[-1]
+
+    def iter_after(self, key=None, reverse: bool = False, inclusive: bool = False) -> Iterator[Any]:
+        """Iterate keys after ``key`` in the given direction.
+
+        ``key`` itself is skipped unless ``inclusive`` is set. With ``key`` of
+        ``None`` iteration starts at the first (or, when reversed, the last) key.
+        """
+        if not self.chunks:
+            return
+
+        if not reverse:
+            bisect = bisect_left if inclusive else bisect_right
+            if key is None:
+                position, index = 0, 0
+            else:
+                position = bisect(self.maxes, key)
+                if position == len(self.maxes):
+                    return
+                index = bisect(self.chunks[position], key)
+            yield from self.chunks[position][index:]
+            for chunk in self.chunks[position + 1:]:
+                yield from chunk
+        else:
+            bisect = bisect_right if inclusive else bisect_left
+            if key is None:
+                position, index = len(self.chunks) - 1, len(self.chunks[-1])
+            else:
+                position = bisect(self.maxes, key)
+                if position == len(self.maxes):
+                    position, index = len(self.chunks) - 1, len(self.chunks[-1])
+                else:
+                    index = bisect(self.chunks[position], key)
+            yield from reversed(self.chunks[position][:index])
+            for chunk in reversed(self.chunks[:position]):
+                yield from reversed(chunk)
+
+
+try:
+    _count_bits = int.bit_count
+except AttributeError:  # Python < 3.10
+    def _count_bits(word: int) -> int:
+        """Return the number of set bits in a non-negative integer."""
+        return bin(word).count('1')
+
+
+class BitmapIndex:
+    """Set of non-negative integers such as task IDs, stored as a compressed bitmap.
+
+    IDs are split by their high bits into chunks of ``CHUNK_SIZE``. Each
+    chunk holding any ID is one Python integer used as a bit set, only as
+    long as its highest bit, and chunks without IDs are not stored at all,
+    so a dense set costs about one bit per ID and a sparse one no more than
+    the chunks it touches. Intersections, unions and differences work on
+    whole chunks with integer operations, rather than ID by ID, and return
+    new indexes. Iteration is in ascending ID order and can start right
+    after any ID, as with ``SortedIndex``.
+    """
+
+    CHUNK_BITS = 12
+    CHUNK_SIZE = 1 << CHUNK_BITS
+    CHUNK_MASK = CHUNK_SIZE - 1
+
+    def __init__(self, ids: Iterable[int] = ()):
+        buffers: Dict[int, bytearray] = {}
+        for task_id in ids:
+            buffer = buffers.get(task_id >> self.CHUNK_BITS)
+            if buffer is None:
+                buffer = buffers[task_id >> self.CHUNK_BITS] = bytearray(self.CHUNK_SIZE >> 3)
+            offset = task_id & self.CHUNK_MASK
+            buffer[offset >> 3] |= 1 << (offset & 7)
+        self._set_chunks({chunk: int.from_bytes(buffer, 'little') for chunk, buffer in buffers.items()})
+
+    @classmethod
+    def _from_chunks(cls, chunks: Dict[int, int]) -> 'BitmapIndex':
+        """Build an index from ``chunk number -> bit set`` words."""
+        index = cls.__new__(cls)
+        index._set_chunks(chunks)
+        return index
+
+    def _set_chunks(self, chunks: Dict[int, int]):
+        """Take over chunk words, dropping empty ones."""
+        self.chunks = {chunk: word for chunk, word in chunks.items() if word}
+        self.keys: List[int] = sorted(self.chunks)
+        self.size = sum(map(_count_bits, self.chunks.values()))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, task_id) -> bool:
+        return bool(self.chunks.get(task_id >> self.CHUNK_BITS, 0) >> (task_id & self.CHUNK_MASK) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iter_after()
+
+    def add(self, task_id: int):
+        """Insert an ID; IDs already present are ignored."""
+        chunk = task_id >> self.CHUNK_BITS
+        bit = 1 << (task_id & self.CHUNK_MASK)
+        word = self.chunks.get(chunk)
+        if word is None:
+            insort(self.keys, chunk)
+            self.chunks[chunk] = bit
+        elif not word & bit:
+            self.chunks[chunk] = word | bit
+        else:
+            return
+        self.size += 1
+
+    def discard(self, task_id: int):
+        """Remove an ID if it is present."""
+        chunk = task_id >> self.CHUNK_BITS
+        bit = 1 << (task_id & self.CHUNK_MASK)
+        word = self.chunks.get(chunk, 0)
+        if not word & bit:
+            return
+        word ^= bit
+        self.size -= 1
+        if word:
+            self.chunks[chunk] = word
+        else:
+            del self.chunks[chunk]
+            del self.keys[bisect_left(self.keys, chunk)]
+
+    def __and__(self, other: 'BitmapIndex') -> 'BitmapIndex':
+        small, large = (self, other) if len(self.chunks) <= len(other.chunks) else (other, self)
+        return self._from_chunks({chunk: word & large.chunks[chunk] for chunk, word in small.chunks.items()
+                                  if chunk in large.chunks})
+
+    def __or__(self, other: 'BitmapIndex') -> 'BitmapIndex':
+        chunks = dict(self.chunks)
+        for chunk, word in other.chunks.items():
+            chunks[chunk] = chunks.get(chunk, 0) | word
+        return self._from_chunks(chunks)
+
+    def __sub__(self, other: 'BitmapIndex') -> 'BitmapIndex':
+        return self._from_chunks({chunk: word & ~other.chunks.get(chunk, 0) for chunk, word in self.chunks.items()})
+
+    def iter_after(self, task_id: Optional[int] = None, reverse: bool = False,
+                   inclusive: bool = False) -> Iterator[int]:
+        """Iterate IDs after ``task_id`` in the given direction, like ``SortedIndex.iter_after``.
+
+        The set bits of each chunk are found by searching its binary string
+        representation, so the cost is per ID listed, not per bit.
+        """
+        if task_id is None:
+            positions = range(len(self.keys) - 1, -1, -1) if reverse else range(len(self.keys))
+            first = None
+        else:
+            first = task_id >> self.CHUNK_BITS
+            offset = task_id & self.CHUNK_MASK
+            if not reverse:
+                start = bisect_left(self.keys, first)
+                positions = range(start, len(self.keys))
+                # Bits from ``offset`` (or just after it) up stay in the first chunk
+                keep = ~((1 << (offset if inclusive else offset + 1)) - 1)
+            else:
+                start = bisect_right(self.keys, first)
+                positions = range(start - 1, -1, -1)
+                keep = (1 << (offset + 1 if inclusive else offset)) - 1
+        for position in positions:
+            chunk = self.keys[position]
+            word = self.chunks[chunk]
+            if chunk == first:
+                word &= keep
+            base = chunk << self.CHUNK_BITS
+            if not reverse:
+                bits = bin(word)[:1:-1]
+                index = bits.find('1')
+                while index >= 0:
+                    yield base + index
+                    index = bits.find('1', index + 1)
+            else:
+                bits = bin(word)[2:]
+                top = base + len(bits) - 1
+                index = bits.find('1')
+                while index >= 0:
+                    yield top - index
+                    index = bits.find('1', index + 1)
@@ -0,0 +1,143 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Advisory lock on ``<file_path>.lock`` shared by every process using a store.
+
+    Writers take the lock exclusively; readers reloading the store take it
+    shared so they never see a half-written file. On Windows, where only
+    exclusive locks are available, shared requests lock exclusively too.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path + '.lock'
+
+    @contextmanager
+    def acquire(self, shared: bool = False):
+        """Hold the lock for the duration of the block."""
+        with open(self.file_path, 'a+') as file:
+            if fcntl:
+                fcntl.flock(file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+                else:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class VersionStamp:
+    """Store version counter kept in ``<file_path>.version``.
+
+    Every committed change bumps the counter by replacing the file, so other
+    processes detect a change with a single ``os.stat`` and only read the
+    number when the file's identity or modification time has moved. The
+    file's modification time, as of the last read, is kept in ``modified_at``.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path + '.version'
+        self._stat_key = None
+        self._version = 0
+        self.modified_at = None
+
+    def read(self) -> int:
+        """Return the current store version."""
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return 0
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stat_key != self._stat_key:
+            try:
+                with open(self.file_path, 'r') as file:
+                    self._version = int(file.read() or 0)
+            except (IOError, ValueError):
+                return self._version
+            self._stat_key = stat_key
+            self.modified_at = stat.st_mtime
+        return self._version
+
+    def write(self, version: int):
+        """Publish a new store version atomically."""
+        temp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as file:
+            file.write(str(version))
+        os.replace(temp_path, self.file_path)
+
+
+class ReadWriteLock:
+    """Reader-writer lock for threads sharing one TaskManager.
+
+    Any number of readers may hold the lock together; a writer holds it
+    alone. Waiting writers take precedence over new readers so a steady
+    stream of reads cannot starve them. Both modes are re-entrant, and the
+    writing thread may also take the lock for reading.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        """Hold the lock shared for the duration of the block."""
+        depth = getattr(self._local, 'read_depth', 0)
+        if depth or self._writer == threading.get_ident():
+            self._local.read_depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.read_depth = depth
+            return
+        with self._condition:
+            while self._writer is not None or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        self._local.read_depth = 1
+        try:
+            yield
+        finally:
+            self._local.read_depth = 0
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively for the duration of the block."""
+        thread_id = threading.get_ident()
+        with self._condition:
+            if self._writer != thread_id:
+                self._writers_waiting += 1
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+                self._writers_waiting -= 1
+                self._writer = thread_id
+            self._write_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._condition.notify_all()
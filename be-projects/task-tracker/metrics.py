@@ -0,0 +1,234 @@
+import bisect
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, from 10 microseconds to 10 seconds
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds in bytes, from 256 bytes to 256 MiB
+SIZE_BUCKETS = tuple(256 * 4 ** power for power in range(11))
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    """Format label pairs as ``{name="value",...}``, or nothing without labels."""
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value: float) -> str:
+    """Format a sample value, keeping integers free of a decimal point."""
+    if value == float('inf'):
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A named metric family, with one child per combination of label values.
+
+    ``labels(...)`` returns the child for the given label values, creating it
+    on first use; callers on hot paths can keep the child around. Metrics
+    without labels are used directly.
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the child metric for the given label values."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels: {', '.join(self.label_names)}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        """Create the value holder for one combination of label values."""
+        raise NotImplementedError
+
+    def _sorted_children(self) -> List[Tuple[tuple, object]]:
+        """Return ``(label values, child)`` pairs, copied under the lock ``labels()`` inserts with."""
+        with self._lock:
+            children = list(self._children.items())
+        return sorted(children, key=lambda item: item[0])
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield ``(name suffix, formatted labels, value)`` samples."""
+        raise NotImplementedError
+
+    @property
+    def exposed_name(self) -> str:
+        """Name of the family in the text format."""
+        return self.name
+
+    def render(self) -> str:
+        """Return the metric family in the Prometheus text format."""
+        name = self.exposed_name
+        lines = [f'# HELP {name} {self.documentation}', f'# TYPE {name} {self.kind}']
+        lines += [f'{name}{suffix}{labels} {format_value(value)}' for suffix, labels, value in self.samples()]
+        return '\n'.join(lines) + '\n'
+
+
+class _CounterChild:
+    """Value of one counter."""
+
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        """Increase the counter."""
+        with self._lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    """A value that only goes up, such as a number of requests."""
+
+    kind = 'counter'
+
+    @property
+    def exposed_name(self) -> str:
+        """Counters are exposed with a ``_total`` suffix."""
+        return self.name + '_total'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        """Increase the counter of a metric without labels."""
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in self._sorted_children():
+            yield '', format_labels(self.label_names, values), child.value
+
+
+class Gauge(Metric):
+    """A value read when metrics are collected, such as the number of tasks.
+
+    ``callback`` returns a mapping from label value tuples (``()`` without
+    labels) to the current values.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[tuple, float]]] = None):
+        super().__init__(name, documentation, label_names)
+        self.callback = callback
+
+    def samples(self):
+        values = self.callback() if self.callback else {}
+        for label_values, value in sorted(values.items()):
+            yield '', format_labels(self.label_names, label_values), value
+
+
+class _HistogramChild:
+    """Bucket counts and sum of one histogram."""
+
+    __slots__ = ('buckets', 'counts', 'sum', '_lock')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Count one observation in its bucket."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets, such as latencies.
+
+    Observing a value costs a binary search over the bucket bounds and one
+    increment, so histograms are cheap enough for every request and every
+    store operation.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        """Observe a value of a metric without labels."""
+        self.labels().observe(value)
+
+    def samples(self):
+        for values, child in self._sorted_children():
+            # A consistent copy, so _count always matches the buckets
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield '_bucket', format_labels(self.label_names, values, f'le="{format_value(bound)}"'), cumulative
+            yield '_sum', format_labels(self.label_names, values), total
+            yield '_count', format_labels(self.label_names, values), cumulative
+
+
+class Registry:
+    """Collection of metric families rendered together at ``/metrics``."""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self._names = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric, or return the one already registered under its name."""
+        existing = self._names.get(metric.name)
+        if existing is not None:
+            return existing
+        self._names[metric.name] = metric
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """Register a counter."""
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = (),
+              callback: Optional[Callable[[], Dict[tuple, float]]] = None) -> Gauge:
+        """Register a gauge read through ``callback``."""
+        return self.register(Gauge(name, documentation, label_names, callback))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Register a histogram."""
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        """Return every registered metric in the Prometheus text format."""
+        return ''.join(metric.render() for metric in self.metrics)
+
+
+# Process-wide registry used by TaskManager and app.py
+REGISTRY = Registry()
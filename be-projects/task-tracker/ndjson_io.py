@@ -0,0 +1,66 @@
+import json
+from typing import AnyStr, Dict, IO, Iterable, Iterator
+
+
+def iter_ndjson(task_manager, chunk_size: int = 1000) -> Iterator[str]:
+    """Yield every task as one line of newline-delimited JSON."""
+    for task in task_manager.iter_tasks(chunk_size):
+        yield json.dumps(task, separators=(',', ':')) + '\n'
+
+
+def export_tasks(task_manager, file: IO[str], chunk_size: int = 1000) -> int:
+    """Write all tasks to a file as NDJSON and return how many were written."""
+    count = 0
+    for line in iter_ndjson(task_manager, chunk_size):
+        file.write(line)
+        count += 1
+    return count
+
+
+def import_tasks(task_manager, file: Iterable[AnyStr], chunk_size: int = 1000, max_errors: int = 20,
+                 first_line: int = 1) -> Dict:
+    """Read NDJSON task records from a file and add them in chunks.
+
+    Lines may be text or UTF-8 bytes. Records are validated one by one.
+    Records whose ID already exists, in the store or earlier in the same
+    file, are skipped, and records without an ID get a new one. Up to
+    ``chunk_size`` records are read and parsed first and then saved together
+    in one batch, so memory stays bounded by the chunk size, not the file
+    size, and a slow reader never holds the store's locks.
+
+    Returns a summary with the counts of imported, duplicate and invalid
+    records plus up to ``max_errors`` error messages. Errors are reported
+    with line numbers counted from ``first_line``.
+    """
+    summary = {'imported': 0, 'duplicates': 0, 'invalid': 0, 'errors': []}
+
+    def invalid(line_number, message):
+        summary['invalid'] += 1
+        if len(summary['errors']) < max_errors:
+            summary['errors'].append(f"line {line_number}: {message}")
+
+    line_number = first_line - 1
+    lines = iter(file)
+    while True:
+        records = []
+        for line_number, line in enumerate(lines, line_number + 1):
+            if line.strip():
+                try:
+                    records.append((line_number, json.loads(line)))
+                except ValueError as e:
+                    # Also catches bytes that are not valid UTF-8
+                    invalid(line_number, f"invalid JSON ({e})")
+            if len(records) == chunk_size:
+                break
+        if records:
+            with task_manager.batch():
+                for record_line, record in records:
+                    try:
+                        if task_manager.import_task(record) is None:
+                            summary['duplicates'] += 1
+                        else:
+                            summary['imported'] += 1
+                    except ValueError as e:
+                        invalid(record_line, e)
+        if len(records) < chunk_size:
+            return summary
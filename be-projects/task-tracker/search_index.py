@@ -0,0 +1,158 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from indexes import SortedIndex
+
+TOKEN_PATTERN = re.compile(r'\w+')
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """Incremental inverted index over task descriptions.
+
+    ``postings`` maps each token to the IDs of the tasks containing it, and
+    the sorted ``vocabulary`` answers prefix queries. Ranking needs each
+    task's token count (``lengths``) and term frequencies, of which only
+    those above one are stored (``frequencies``). Phrases are checked
+    against the description text of candidate tasks only, which keeps the
+    index itself small.
+    """
+
+    # BM25 ranking parameters
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, get_text: Callable[[int], str]):
+        """Initialize an empty index; ``get_text`` returns a task's description."""
+        self.get_text = get_text
+        self.postings: Dict[str, Set[int]] = {}
+        self.vocabulary = SortedIndex()
+        self.lengths: Dict[int, int] = {}
+        self.frequencies: Dict[Tuple[str, int], int] = {}
+        self.total_length = 0
+
+    def add(self, task_id: int, text: str):
+        """Index a task's description."""
+        tokens = tokenize(text)
+        for token, frequency in Counter(tokens).items():
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                self.vocabulary.add(token)
+            ids.add(task_id)
+            if frequency > 1:
+                self.frequencies[token, task_id] = frequency
+        self.lengths[task_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, task_id: int, text: str):
+        """Remove a task's previously indexed description."""
+        tokens = tokenize(text)
+        for token in set(tokens):
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(task_id)
+            self.frequencies.pop((token, task_id), None)
+            if not ids:
+                del self.postings[token]
+                self.vocabulary.discard(token)
+        self.total_length -= self.lengths.pop(task_id, 0)
+
+    @staticmethod
+    def parse_query(query: str) -> List[Tuple[str, List[str]]]:
+        """Parse a query into ``(kind, tokens)`` clauses.
+
+        Quoted text is a phrase, a word ending in ``*`` is a prefix and any
+        other word is a plain token. All clauses must match.
+        """
+        clauses = []
+        for phrase, word in QUERY_PATTERN.findall(query):
+            if phrase:
+                tokens = tokenize(phrase)
+                if len(tokens) > 1:
+                    clauses.append(('phrase', tokens))
+                elif tokens:
+                    clauses.append(('token', tokens))
+            elif word.endswith('*') and tokenize(word):
+                clauses.append(('prefix', tokenize(word)[:1]))
+            else:
+                clauses.extend(('token', [token]) for token in tokenize(word))
+        return clauses
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        """Return every indexed token starting with ``prefix``."""
+        tokens = []
+        for token in self.vocabulary.iter_after(prefix, inclusive=True):
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def search(self, query: str, accept: Optional[Callable[[int], bool]] = None,
+               limit: int = 20) -> List[Tuple[int, float]]:
+        """Return up to ``limit`` ``(task_id, score)`` pairs, best match first.
+
+        ``accept`` can reject candidate IDs, for example by status, before
+        they are ranked.
+        """
+        clauses = self.parse_query(query)
+        if not clauses:
+            raise ValueError("Search query cannot be empty")
+
+        # Each clause matches a set of IDs and is ranked as one or more terms.
+        # A prefix counts as a single term matching any of its expansions.
+        matches = []
+        terms = []
+        for kind, tokens in clauses:
+            if kind == 'prefix':
+                expanded = self._expand_prefix(tokens[0])
+                ids = set().union(*(self.postings[token] for token in expanded)) if expanded else set()
+                terms.append((None, len(ids)))
+            else:
+                postings = sorted((self.postings.get(token, set()) for token in tokens), key=len)
+                ids = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+                terms.extend((token, len(self.postings.get(token, ()))) for token in tokens)
+            matches.append((kind, tokens, ids))
+
+        matches.sort(key=lambda match: len(match[2]))
+        candidates = set(matches[0][2])
+        for _, _, ids in matches[1:]:
+            candidates &= ids
+            if not candidates:
+                return []
+
+        document_count = len(self.lengths)
+        average_length = self.total_length / document_count if document_count else 1
+        weights = [(token, math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5)))
+                   for token, frequency in terms]
+        phrases = [' '.join(tokens) for kind, tokens, _ in matches if kind == 'phrase']
+
+        scored = []
+        for task_id in candidates:
+            if accept is not None and not accept(task_id):
+                continue
+            if phrases:
+                joined = f" {' '.join(tokenize(self.get_text(task_id)))} "
+                if any(f' {phrase} ' not in joined for phrase in phrases):
+                    continue
+            scored.append((self._score(task_id, weights, average_length), task_id))
+
+        return [(task_id, score) for score, task_id in heapq.nlargest(limit, scored)]
+
+    def _score(self, task_id: int, weights: List[Tuple[Optional[str], float]],
+               average_length: float) -> float:
+        """Compute the BM25 score of one task for the weighted query terms."""
+        length_norm = self.K1 * (1 - self.B + self.B * self.lengths[task_id] / average_length)
+        score = 0.0
+        for token, weight in weights:
+            frequency = self.frequencies.get((token, task_id), 1) if token else 1
+            score += weight * frequency * (self.K1 + 1) / (frequency + length_norm)
+        return score
@@ -0,0 +1,495 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Callable, Collection, Dict, List, Optional
+
+# How hard a backend pushes committed changes to disk:
+# 'fsync'    - fsync every commit before returning
+# 'periodic' - fsync at most once per fsync interval
+# 'buffered' - leave writing back to the operating system
+DURABILITY_LEVELS = ['fsync', 'periodic', 'buffered']
+
+
+def fsync_directory(path: str):
+    """Make a rename inside the directory holding ``path`` durable."""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomically(path: str, write: Callable, sync: bool = False) -> int:
+    """Write a file through a temporary file renamed over it, returning its size.
+
+    Readers and crashes only ever see the old or the new contents. With
+    ``sync`` the data and the rename are fsynced before returning.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w') as file:
+            write(file)
+            size = file.tell()
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if sync:
+        fsync_directory(path)
+    return size
+
+
+class TaskLog:
+    """Append-only log of task mutations stored next to the JSON snapshot.
+
+    Each line is a small JSON record, either ``{"op": "put", "task": {...}}``
+    or ``{"op": "delete", "id": 1}``. Replaying the log on top of the
+    snapshot rebuilds the current task list. ``offset`` is the end of the
+    last record this instance replayed, appended or read with ``read_tail``.
+    """
+
+    def __init__(self, file_path: str, compact_threshold: int = 1000):
+        """Initialize the log for the given snapshot file path."""
+        self.snapshot_path = file_path
+        self.file_path = file_path + '.log'
+        self.compact_threshold = compact_threshold
+        self.record_count = 0
+        self.offset = 0
+        self._snapshot_id = None
+
+    def _stat_snapshot(self) -> Optional[tuple]:
+        """Identify the current snapshot file; a compaction replaces it with a new one."""
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def replay(self, tasks: List[Dict]) -> List[Dict]:
+        """Apply logged records to the snapshot tasks and return the result."""
+        self.record_count = 0
+        self.offset = 0
+        self._snapshot_id = self._stat_snapshot()
+        if not os.path.exists(self.file_path):
+            return tasks
+
+        by_id = {task['id']: task for task in tasks}
+        valid_size = 0
+        with open(self.file_path, 'rb') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn trailing record from an interrupted append
+                    break
+                if record['op'] == 'put':
+                    by_id[record['task']['id']] = record['task']
+                elif record['op'] == 'delete':
+                    by_id.pop(record['id'], None)
+                valid_size += len(line)
+                self.record_count += 1
+
+        if valid_size < os.path.getsize(self.file_path):
+            with open(self.file_path, 'r+b') as file:
+                file.truncate(valid_size)
+        self.offset = valid_size
+        return list(by_id.values())
+
+    def read_tail(self) -> Optional[List[Dict]]:
+        """Return the records appended by others since ``offset`` and move past them.
+
+        Returns ``None`` when the log was compacted in the meantime, because
+        its records were then folded into a new snapshot.
+        """
+        if self._stat_snapshot() != self._snapshot_id:
+            return None
+        try:
+            with open(self.file_path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size < self.offset:
+                    return None
+                file.seek(self.offset)
+                records = []
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn trailing record, truncated by the next full replay
+                        break
+                    records.append(record)
+                    self.offset += len(line)
+        except FileNotFoundError:
+            return None if self.offset else []
+        self.record_count += len(records)
+        return records
+
+    def append(self, records: List[Dict], sync: bool = False) -> int:
+        """Append mutation records to the log and return the bytes written.
+
+        The records are fsynced if ``sync`` is set.
+        """
+        data = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+        try:
+            with open(self.file_path, 'a') as file:
+                file.write(data)
+                if sync:
+                    file.flush()
+                    os.fsync(file.fileno())
+        except IOError as e:
+            raise Exception(f"Failed to append to task log: {e}")
+        self.record_count += len(records)
+        self.offset += len(data)
+        return len(data)
+
+    def needs_compaction(self, task_count: int) -> bool:
+        """Check whether the log has grown enough to be folded into the snapshot.
+
+        The threshold scales with the store size, so the cost of rewriting
+        the snapshot is amortized over at least as many appended records.
+        """
+        return self.record_count >= max(self.compact_threshold, task_count)
+
+    def compact(self, snapshot_path: str, tasks: List[Dict], sync: bool = False) -> int:
+        """Write a fresh snapshot atomically, truncate the log and return the snapshot size."""
+        try:
+            size = write_atomically(snapshot_path,
+                                    lambda file: json.dump(tasks, file, separators=(',', ':')), sync)
+            # Records already folded into the snapshot are safe to replay again,
+            # so a crash between the rename and the truncate loses nothing.
+            open(self.file_path, 'w').close()
+        except IOError as e:
+            raise Exception(f"Failed to compact task log: {e}")
+        self.record_count = 0
+        self.offset = 0
+        self._snapshot_id = self._stat_snapshot()
+        return size
+
+
+class StorageBackend:
+    """Base class for task persistence engines.
+
+    A backend loads the full task list once and is then handed the mutation
+    records produced by every change, ``{"op": "put", "task": {...}}`` or
+    ``{"op": "delete", "id": 1}``, along with the current number of tasks.
+    ``snapshot`` returns a sized collection of all current tasks for engines
+    that need to rewrite everything. It may copy the whole task index, so
+    engines that only apply the records should not call it.
+
+    When other processes share the store, ``changes`` returns the records
+    they committed since this instance last loaded or committed, so only
+    those tasks need to be reloaded.
+
+    ``durability`` is one of ``DURABILITY_LEVELS``; with ``periodic``, a
+    commit is fsynced when ``fsync_interval`` seconds have passed since the
+    last fsync, and ``sync()`` forces one.
+    """
+
+    def __init__(self, file_path: str, durability: str = 'periodic', fsync_interval: float = 1.0):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Invalid durability. Must be one of: {', '.join(DURABILITY_LEVELS)}")
+        self.file_path = file_path
+        self.durability = durability
+        self.fsync_interval = fsync_interval
+        self._last_sync = time.monotonic()
+
+    def _sync_due(self) -> bool:
+        """Check whether the commit being written should be fsynced."""
+        if self.durability == 'fsync':
+            return True
+        if self.durability == 'periodic' and time.monotonic() - self._last_sync >= self.fsync_interval:
+            self._last_sync = time.monotonic()
+            return True
+        return False
+
+    def load(self) -> List[Dict]:
+        """Load all tasks from storage."""
+        raise NotImplementedError
+
+    def commit(self, records: List[Dict], snapshot: Callable[[], Collection[Dict]],
+               task_count: int) -> Optional[int]:
+        """Persist a group of mutation records and return the bytes written, if known."""
+        raise NotImplementedError
+
+    def changes(self) -> Optional[List[Dict]]:
+        """Return the records committed by other processes since the last load, commit or call.
+
+        Records of one task may be merged into its latest version. ``None``
+        means the changes cannot be told apart and everything must be loaded
+        again, which is all a backend that rewrites the whole store can offer.
+        """
+        return None
+
+    def sync(self):
+        """Force everything committed so far onto disk."""
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class JSONStorage(StorageBackend):
+    """Stores all tasks in a single JSON file, rewritten on every change.
+
+    Each rewrite goes to a temporary file that is renamed over the store,
+    so a crash never leaves a half-written file behind.
+    """
+
+    def load(self) -> List[Dict]:
+        """Load tasks from JSON file or create empty list if file doesn't exist."""
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, 'r') as file:
+                    return json.load(file)
+            except (json.JSONDecodeError, IOError):
+                return []
+        return []
+
+    def commit(self, records: List[Dict], snapshot: Callable[[], Collection[Dict]], task_count: int) -> int:
+        """Save tasks to JSON file."""
+        try:
+            tasks = list(snapshot())
+            return write_atomically(self.file_path, lambda file: json.dump(tasks, file, indent=2),
+                                    self._sync_due())
+        except IOError as e:
+            raise Exception(f"Failed to save tasks: {e}")
+
+    def sync(self):
+        """Fsync the store file and the directory entry pointing to it."""
+        if os.path.exists(self.file_path):
+            with open(self.file_path, 'r') as file:
+                os.fsync(file.fileno())
+            fsync_directory(self.file_path)
+        self._last_sync = time.monotonic()
+
+
+class LogStorage(JSONStorage):
+    """Stores a JSON snapshot plus an append-only log of changes."""
+
+    def __init__(self, file_path: str, compact_threshold: int = 1000, **options):
+        super().__init__(file_path, **options)
+        self.log = TaskLog(file_path, compact_threshold)
+
+    def load(self) -> List[Dict]:
+        """Load the snapshot and replay the log on top of it."""
+        return self.log.replay(super().load())
+
+    def commit(self, records: List[Dict], snapshot: Callable[[], Collection[Dict]], task_count: int) -> int:
+        """Append the records and compact once the log outgrows the store."""
+        written = self.log.append(records, self._sync_due())
+        if self.log.needs_compaction(task_count):
+            written += self.compact(snapshot)
+        return written
+
+    def changes(self) -> Optional[List[Dict]]:
+        """Return the records appended to the log since it was last read."""
+        return self.log.read_tail()
+
+    def compact(self, snapshot: Callable[[], Collection[Dict]]) -> int:
+        """Fold the mutation log into the JSON snapshot and return its size."""
+        return self.log.compact(self.file_path, list(snapshot()), self.durability != 'buffered')
+
+    def sync(self):
+        """Fsync the mutation log."""
+        if os.path.exists(self.log.file_path):
+            with open(self.log.file_path, 'a') as file:
+                os.fsync(file.fileno())
+        self._last_sync = time.monotonic()
+
+
+class SQLiteStorage(StorageBackend):
+    """Stores tasks as rows in a SQLite database running in WAL mode.
+
+    ``id`` is the primary key, so every change only touches the affected
+    rows. Reads are answered by TaskManager's in-memory indexes, so the
+    database is only read in full by ``load``.
+
+    Every commit also logs the IDs it touched in ``task_changes``, so other
+    processes sharing the database reload only those rows. At least the
+    last ``MIN_KEPT_CHANGES`` entries, and as many as there are tasks, are
+    kept; a process further behind than that loads everything again.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            blocked_by TEXT NOT NULL DEFAULT '',
+            tags TEXT NOT NULL DEFAULT ''
+        );
+        -- Nothing queries by status; older databases drop the index so writes stop maintaining it
+        DROP INDEX IF EXISTS idx_tasks_status;
+        -- A NULL task_id means every row was replaced. Only the oldest rows are
+        -- ever deleted, so seq keeps growing without AUTOINCREMENT's extra write
+        CREATE TABLE IF NOT EXISTS task_changes (
+            seq INTEGER PRIMARY KEY,
+            task_id INTEGER
+        );
+    """
+    MIN_KEPT_CHANGES = 1000
+
+    COLUMNS = 'id, description, status, created_at, updated_at, blocked_by, tags'
+    # Columns added after the first release, created on open in older databases
+    ADDED_COLUMNS = {'blocked_by': "TEXT NOT NULL DEFAULT ''", 'tags': "TEXT NOT NULL DEFAULT ''"}
+
+    # synchronous setting per durability level; in WAL mode NORMAL syncs at checkpoints
+    SYNCHRONOUS = {'fsync': 'FULL', 'periodic': 'NORMAL', 'buffered': 'OFF'}
+
+    def __init__(self, file_path: str, **options):
+        super().__init__(file_path, **options)
+        self.connection = sqlite3.connect(file_path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(f'PRAGMA synchronous={self.SYNCHRONOUS[self.durability]}')
+        self.connection.executescript(self.SCHEMA)
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(tasks)')]
+        for column, definition in self.ADDED_COLUMNS.items():
+            if column not in columns:
+                with self.connection:
+                    self.connection.execute(f'ALTER TABLE tasks ADD COLUMN {column} {definition}')
+        self.last_change = 0
+
+    @staticmethod
+    def _row_to_task(row) -> Dict:
+        """Convert a database row to the task dictionary shape."""
+        task = {
+            'id': row[0],
+            'description': row[1],
+            'status': row[2],
+            'createdAt': row[3],
+            'updatedAt': row[4]
+        }
+        if row[5]:
+            task['blockedBy'] = [int(task_id) for task_id in row[5].split(',')]
+        if row[6]:
+            task['tags'] = row[6].split(',')
+        return task
+
+    @staticmethod
+    def _task_to_row(task: Dict) -> tuple:
+        """Convert a task dictionary to a database row."""
+        return (task['id'], task['description'], task['status'],
+                task['createdAt'], task['updatedAt'], ','.join(map(str, task.get('blockedBy', ()))),
+                ','.join(task.get('tags', ())))
+
+    def load(self) -> List[Dict]:
+        """Load all tasks ordered by ID."""
+        self.last_change = self.connection.execute('SELECT COALESCE(MAX(seq), 0) FROM task_changes').fetchone()[0]
+        rows = self.connection.execute(f'SELECT {self.COLUMNS} FROM tasks ORDER BY id')
+        return [self._row_to_task(row) for row in rows]
+
+    def changes(self) -> Optional[List[Dict]]:
+        """Return the current rows of the tasks changed since the last load, commit or call.
+
+        Tasks whose row is gone are returned as deletions.
+        """
+        changes = self.connection.execute('SELECT seq, task_id FROM task_changes WHERE seq > ? ORDER BY seq',
+                                          (self.last_change,)).fetchall()
+        if not changes:
+            return []
+        if changes[0][0] > self.last_change + 1 or any(task_id is None for _, task_id in changes):
+            return None
+        task_ids = list(dict.fromkeys(task_id for _, task_id in changes))
+        tasks = {}
+        # Stay below SQLite's limit on query parameters
+        for start in range(0, len(task_ids), 500):
+            chunk = task_ids[start:start + 500]
+            rows = self.connection.execute(
+                f'SELECT {self.COLUMNS} FROM tasks WHERE id IN ({",".join("?" * len(chunk))})', chunk)
+            tasks.update((row[0], self._row_to_task(row)) for row in rows)
+        self.last_change = changes[-1][0]
+        return [{'op': 'put', 'task': tasks[task_id]} if task_id in tasks else {'op': 'delete', 'id': task_id}
+                for task_id in task_ids]
+
+    def commit(self, records: List[Dict], snapshot: Callable[[], Collection[Dict]], task_count: int) -> int:
+        """Apply the records to the affected rows in one transaction.
+
+        Returns the size of the row data written, which leaves out SQLite's
+        own page and journal overhead.
+        """
+        written = 0
+        last_change = self.last_change
+        try:
+            with self.connection:
+                for record in records:
+                    if record['op'] == 'put':
+                        row = self._task_to_row(record['task'])
+                        self.connection.execute(
+                            f'INSERT OR REPLACE INTO tasks ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)', row)
+                        written += 8 + sum(len(value.encode()) for value in row[1:])
+                        task_id = row[0]
+                    elif record['op'] == 'delete':
+                        self.connection.execute('DELETE FROM tasks WHERE id = ?', (record['id'],))
+                        task_id = record['id']
+                    else:
+                        continue
+                    last_change = self.connection.execute(
+                        'INSERT INTO task_changes (task_id) VALUES (?)', (task_id,)).lastrowid
+                # Pruned once per MIN_KEPT_CHANGES entries, so it costs little per commit
+                if last_change // self.MIN_KEPT_CHANGES != self.last_change // self.MIN_KEPT_CHANGES:
+                    self.connection.execute('DELETE FROM task_changes WHERE seq <= ?',
+                                            (last_change - max(self.MIN_KEPT_CHANGES, task_count),))
+        except sqlite3.Error as e:
+            raise Exception(f"Failed to save tasks: {e}")
+        self.last_change = last_change
+        return written
+
+    def replace_all(self, tasks: List[Dict]):
+        """Replace the table contents with the given tasks."""
+        with self.connection:
+            self.connection.execute('DELETE FROM tasks')
+            self.connection.executemany(
+                f'INSERT INTO tasks ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self._task_to_row(task) for task in tasks))
+            self.last_change = self.connection.execute(
+                'INSERT INTO task_changes (task_id) VALUES (NULL)').lastrowid
+
+    def sync(self):
+        """Checkpoint the write-ahead log into the database file."""
+        self.connection.execute('PRAGMA wal_checkpoint(FULL)')
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+
+BACKENDS = {
+    'json': JSONStorage,
+    'log': LogStorage,
+    'sqlite': SQLiteStorage
+}
+
+DEFAULT_FILES = {
+    'json': 'tasks.json',
+    'log': 'tasks.json',
+    'sqlite': 'tasks.db'
+}
+
+
+def create_storage(backend: str = 'json', file_path: Optional[str] = None, **options) -> StorageBackend:
+    """Create a storage backend by name."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Invalid storage backend. Must be one of: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](file_path or DEFAULT_FILES[backend], **options)
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> int:
+    """Copy every task from a tasks.json file into a SQLite database.
+
+    Existing rows in the database are replaced. Returns the number of
+    migrated tasks.
+    """
+    tasks = LogStorage(json_path).load() if os.path.exists(json_path + '.log') \
+        else JSONStorage(json_path).load()
+    storage = SQLiteStorage(db_path)
+    try:
+        storage.replace_all(tasks)
+    finally:
+        storage.close()
+    return len(tasks)
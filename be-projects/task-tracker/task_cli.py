@@ -3,9 +3,18 @@
 Task Tracker CLI - A simple command-line task management tool
 """
 
+import os
 import sys
+import signal
 import argparse
-from task_manager import TaskManager
+from functools import partial
+from config import Config
+from ndjson_io import export_tasks, import_tasks
+
+try:
+    from daemon import DaemonClient, TaskDaemon, socket_path_for
+except AttributeError:  # No Unix domain sockets on this platform
+    DaemonClient = None
 
 
 def print_task(task):
@@ -16,7 +25,8 @@ def print_task(task):
         'done': '✅'
     }
     icon = status_icons.get(task['status'], '❓')
-    print(f"{icon} [{task['id']}] {task['description']} ({task['status']})")
+    tags = ''.join(f" #{tag}" for tag in task.get('tags', []))
+    print(f"{icon} [{task['id']}] {task['description']} ({task['status']}){tags}")
 
 
 def print_tasks(tasks):
@@ -29,6 +39,210 @@ def print_tasks(tasks):
         print_task(task)
 
 
+def open_task_manager(use_daemon=True, workspace=None):
+    """Connect to the task daemon if one is running, else open the store directly.
+
+    The store is only imported and parsed when no daemon answers. With a
+    ``workspace`` name, that workspace is used instead of the default list.
+    """
+    if use_daemon and DaemonClient is not None:
+        client = DaemonClient.connect(socket_path_for(Config), workspace)
+        if client is not None:
+            return client
+    if workspace is not None:
+        from workspaces import open_workspace
+        return open_workspace(Config, workspace)
+    from task_manager import TaskManager
+    return TaskManager.from_config(Config)
+
+
+def run_daemon(socket_path=None):
+    """Serve the store over a Unix socket until interrupted."""
+    if DaemonClient is None:
+        raise Exception("The task daemon needs Unix domain sockets, which this platform lacks")
+    from task_manager import TaskManager
+    from workspaces import WorkspacePool, open_workspace
+    socket_path = socket_path or socket_path_for(Config)
+    task_manager = TaskManager.from_config(Config)
+    workspaces = WorkspacePool(partial(open_workspace, Config), Config.MAX_LOADED_WORKSPACES)
+    server = TaskDaemon(task_manager, socket_path, workspaces)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Task daemon listening on {socket_path} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        workspaces.close()
+        task_manager.close()
+
+
+def print_backup(entry):
+    """Print one backup manifest entry."""
+    print(f"[{entry['id']}] {entry['kind']} backup taken {entry['takenAt']}: "
+          f"{entry['tasks']} tasks, {entry['records']} records, {entry['bytes']} bytes")
+
+
+def run_command(task_manager, args):
+    """Run a parsed store command against a task manager or daemon client."""
+    if args.command == 'add':
+        tags = [tag.strip() for tag in args.tags.split(',') if tag.strip()] if args.tags else None
+        task_id = task_manager.add_task(args.description, tags)
+        print(f"Task added successfully (ID: {task_id})")
+        
+    elif args.command == 'update':
+        if task_manager.update_task(args.task_id, args.description):
+            print(f"Task {args.task_id} updated successfully")
+        else:
+            print(f"Task {args.task_id} not found")
+            sys.exit(1)
+            
+    elif args.command == 'delete':
+        if task_manager.delete_task(args.task_id):
+            print(f"Task {args.task_id} deleted successfully")
+        else:
+            print(f"Task {args.task_id} not found")
+            sys.exit(1)
+            
+    elif args.command == 'mark-in-progress':
+        if task_manager.mark_task_status(args.task_id, 'in-progress'):
+            print(f"Task {args.task_id} marked as in progress")
+        else:
+            print(f"Task {args.task_id} not found")
+            sys.exit(1)
+            
+    elif args.command == 'mark-done':
+        if task_manager.mark_task_status(args.task_id, 'done'):
+            print(f"Task {args.task_id} marked as done")
+        else:
+            print(f"Task {args.task_id} not found")
+            sys.exit(1)
+            
+    elif args.command == 'list':
+        time_filters = {'created_after': args.created_after, 'created_before': args.created_before,
+                        'updated_since': args.updated_since}
+        tag_filters = {'tags': args.tag, 'filter_expression': args.filter}
+        if args.as_of:
+            if any(time_filters.values()) or any(tag_filters.values()):
+                raise ValueError("--as-of cannot be combined with time or tag filters")
+            tasks = task_manager.tasks_as_of(args.as_of, args.status)
+        elif any(time_filters.values()) or any(tag_filters.values()):
+            tasks = task_manager.list_tasks(args.status, **time_filters, **tag_filters)
+        else:
+            tasks = task_manager.list_tasks(args.status)
+        heading = f"Tasks with status '{args.status}'" if args.status else "All tasks"
+        print(f"{heading} as of {args.as_of}:" if args.as_of else f"{heading}:")
+        print_tasks(tasks)
+        
+    elif args.command == 'search':
+        tasks = task_manager.search_tasks(args.query, args.status, args.limit)
+        print(f"Tasks matching '{args.query}':")
+        print_tasks(tasks)
+        
+    elif args.command == 'export':
+        if args.file:
+            with open(args.file, 'w') as file:
+                count = export_tasks(task_manager, file)
+            print(f"Exported {count} tasks to {args.file}")
+        else:
+            export_tasks(task_manager, sys.stdout)
+            
+    elif args.command == 'import':
+        if args.chunk_size < 1:
+            raise ValueError("Chunk size must be a positive integer")
+        if DaemonClient is not None and isinstance(task_manager, DaemonClient):
+            run_import = task_manager.import_tasks
+        else:
+            run_import = lambda file, chunk_size: import_tasks(task_manager, file, chunk_size)
+        if args.file == '-':
+            summary = run_import(sys.stdin, args.chunk_size)
+        else:
+            with open(args.file, 'r') as file:
+                summary = run_import(file, args.chunk_size)
+        print(f"Imported {summary['imported']} tasks "
+              f"({summary['duplicates']} duplicates skipped, {summary['invalid']} invalid)")
+        for error in summary['errors']:
+            print(f"  {error}")
+    
+    elif args.command in ('backup', 'backups', 'restore'):
+        # The daemon may run in another directory
+        directory = os.path.abspath(args.dir) if args.dir else None
+        if args.command == 'backup':
+            print_backup(task_manager.backup(args.full, directory))
+        elif args.command == 'backups':
+            backups = task_manager.list_backups(directory)
+            if not backups:
+                print("No backups found.")
+            for entry in backups:
+                print_backup(entry)
+            if backups and args.verify:
+                result = task_manager.verify_backup(None, directory)
+                print(f"Verified {result['backups']} backup files; "
+                      f"backup {result['verified']} restores {result['tasks']} tasks")
+        else:
+            summary = task_manager.restore_backup(args.backup_id, directory)
+            print(f"Restored backup {summary['restored']} ({summary['tasks']} tasks): "
+                  f"{summary['added']} added, {summary['updated']} updated, {summary['deleted']} deleted")
+    
+    elif args.command in ('tag', 'untag'):
+        change = task_manager.add_tags if args.command == 'tag' else task_manager.remove_tags
+        if change(args.task_id, args.tags):
+            print_task(task_manager.get_task(args.task_id))
+        else:
+            print(f"Task {args.task_id} not found")
+            sys.exit(1)
+            
+    elif args.command == 'tags':
+        tags = task_manager.list_tags()
+        if not tags:
+            print("No tags found.")
+        for tag, count in tags.items():
+            print(f"#{tag} ({count} tasks)")
+            
+    elif args.command == 'depend':
+        if task_manager.add_dependency(args.task_id, args.blocker_id):
+            print(f"Task {args.task_id} now waits for task {args.blocker_id}")
+        else:
+            print(f"Task {args.task_id} not found")
+            sys.exit(1)
+            
+    elif args.command == 'undepend':
+        if task_manager.remove_dependency(args.task_id, args.blocker_id):
+            print(f"Task {args.task_id} no longer waits for task {args.blocker_id}")
+        else:
+            print(f"Task {args.task_id} does not wait for task {args.blocker_id}")
+            sys.exit(1)
+            
+    elif args.command == 'deps':
+        dependencies = task_manager.get_dependencies(args.task_id)
+        if dependencies is None:
+            print(f"Task {args.task_id} not found")
+            sys.exit(1)
+        state = 'blocked' if dependencies['blocked'] else 'not blocked'
+        print(f"Task {args.task_id} is {state}")
+        for label, key in (('Waits for', 'blockedBy'), ('Still open', 'openBlockers'),
+                           ('Blocking', 'blocking'), ('Finishing it unblocks', 'unblocks'),
+                           ('Critical path', 'criticalPath')):
+            print(f"  {label}: {', '.join(map(str, dependencies[key])) or '-'}")
+            
+    elif args.command == 'unblocked':
+        if args.blocked:
+            print("Blocked tasks:")
+            print_tasks(task_manager.blocked_tasks())
+        else:
+            print("Unblocked tasks:")
+            print_tasks(task_manager.unblocked_tasks())
+            
+    elif args.command == 'critical-path':
+        tasks = task_manager.critical_path(args.task_id)
+        if tasks is None:
+            print(f"Task {args.task_id} not found")
+            sys.exit(1)
+        print(f"Critical path ({len(tasks)} open tasks):")
+        print_tasks(tasks)
+
+
 def main():
     """Main CLI function."""
     parser = argparse.ArgumentParser(
@@ -45,14 +259,45 @@ Examples:
   task-cli list done
   task-cli list todo
   task-cli list in-progress
+  task-cli list done --as-of 2024-06-07T18:00
+  task-cli list todo --created-before 2024-06-01
+  task-cli list --updated-since 2024-06-07T17:00
+  task-cli add "Fix the login API" --tags backend,api
+  task-cli tag 1 urgent
+  task-cli untag 1 urgent
+  task-cli tags
+  task-cli list todo --tag backend
+  task-cli list --filter "status=todo AND tag=backend AND NOT tag=blocked"
+  task-cli search "groceries"
+  task-cli search "proj*" --status todo
+  task-cli migrate tasks.json tasks.db
+  task-cli export tasks.ndjson
+  task-cli import tasks.ndjson --chunk-size 5000
+  task-cli daemon
+  task-cli --workspace work add "Prepare the release notes"
+  task-cli --workspace work list todo
+  task-cli backup
+  task-cli backup --full
+  task-cli backups --verify
+  task-cli restore 3
+  task-cli depend 3 1
+  task-cli undepend 3 1
+  task-cli deps 3
+  task-cli unblocked
+  task-cli critical-path
+  task-cli critical-path 3
         """
     )
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Open the store directly even if a task daemon is running')
+    parser.add_argument('--workspace', help='Use this named task list instead of the default one')
     
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # Add task command
     add_parser = subparsers.add_parser('add', help='Add a new task')
     add_parser.add_argument('description', help='Task description')
+    add_parser.add_argument('--tags', help='Comma-separated tags, e.g. backend,api')
     
     # Update task command
     update_parser = subparsers.add_parser('update', help='Update an existing task')
@@ -74,6 +319,81 @@ Examples:
     list_parser = subparsers.add_parser('list', help='List tasks')
     list_parser.add_argument('status', nargs='?', choices=['todo', 'in-progress', 'done'], 
                            help='Filter tasks by status')
+    list_parser.add_argument('--as-of', help='List the tasks as they were at this ISO 8601 date or time')
+    list_parser.add_argument('--created-after', help='Only tasks created after this ISO 8601 date or time')
+    list_parser.add_argument('--created-before', help='Only tasks created before this ISO 8601 date or time')
+    list_parser.add_argument('--updated-since', help='Only tasks updated at or after this ISO 8601 date or time')
+    list_parser.add_argument('--tag', action='append', default=[], help='Only tasks with this tag (repeatable)')
+    list_parser.add_argument('--filter', help='Boolean filter, e.g. "tag=backend AND NOT tag=blocked"')
+    
+    # Tag commands
+    tag_parser = subparsers.add_parser('tag', help='Add tags to a task')
+    tag_parser.add_argument('task_id', type=int, help='Task ID')
+    tag_parser.add_argument('tags', nargs='+', help='Tags to add')
+    
+    untag_parser = subparsers.add_parser('untag', help='Remove tags from a task')
+    untag_parser.add_argument('task_id', type=int, help='Task ID')
+    untag_parser.add_argument('tags', nargs='+', help='Tags to remove')
+    
+    subparsers.add_parser('tags', help='List tags with their number of tasks')
+    
+    # Search tasks command
+    search_parser = subparsers.add_parser('search', help='Search task descriptions')
+    search_parser.add_argument('query', help='Words, prefix* or "quoted phrase"')
+    search_parser.add_argument('--status', choices=['todo', 'in-progress', 'done'],
+                               help='Only search tasks with this status')
+    search_parser.add_argument('--limit', type=int, default=20, help='Maximum number of results')
+    
+    # Migrate storage command
+    migrate_parser = subparsers.add_parser('migrate', help='Copy tasks from a JSON file into a SQLite database')
+    migrate_parser.add_argument('source', help='Source tasks.json file')
+    migrate_parser.add_argument('destination', help='Destination SQLite database file')
+    
+    # Export/import commands
+    export_parser = subparsers.add_parser('export', help='Export all tasks as newline-delimited JSON')
+    export_parser.add_argument('file', nargs='?', help='Output file (default: standard output)')
+    
+    import_parser = subparsers.add_parser('import', help='Import tasks from a newline-delimited JSON file')
+    import_parser.add_argument('file', help='Input file, or - for standard input')
+    import_parser.add_argument('--chunk-size', type=int, default=1000,
+                               help='Number of records saved per transaction')
+    
+    # Daemon command
+    daemon_parser = subparsers.add_parser('daemon', help='Keep the store in memory and serve CLI calls over a Unix socket')
+    daemon_parser.add_argument('--socket', help='Socket path (default: TASK_TRACKER_SOCKET or <store file>.sock)')
+    
+    # Backup commands
+    backup_parser = subparsers.add_parser('backup', help='Back up the store while it stays in use')
+    backup_parser.add_argument('--full', action='store_true',
+                               help='Back up every task instead of the changes since the last backup')
+    backup_parser.add_argument('--dir', help='Backup directory (default: <store file>.backups)')
+    
+    backups_parser = subparsers.add_parser('backups', help='List backups')
+    backups_parser.add_argument('--verify', action='store_true',
+                                help='Check every backup file and that the newest backup restores')
+    backups_parser.add_argument('--dir', help='Backup directory (default: <store file>.backups)')
+    
+    restore_parser = subparsers.add_parser('restore', help='Restore the tasks of a verified backup')
+    restore_parser.add_argument('backup_id', type=int, nargs='?', help='Backup to restore (default: the newest)')
+    restore_parser.add_argument('--dir', help='Backup directory (default: <store file>.backups)')
+    
+    # Dependency commands
+    depend_parser = subparsers.add_parser('depend', help='Make a task wait for another task')
+    depend_parser.add_argument('task_id', type=int, help='Task ID')
+    depend_parser.add_argument('blocker_id', type=int, help='ID of the task it waits for')
+    
+    undepend_parser = subparsers.add_parser('undepend', help='Stop a task waiting for another task')
+    undepend_parser.add_argument('task_id', type=int, help='Task ID')
+    undepend_parser.add_argument('blocker_id', type=int, help='ID of the task it waits for')
+    
+    deps_parser = subparsers.add_parser('deps', help="Show a task's dependencies")
+    deps_parser.add_argument('task_id', type=int, help='Task ID')
+    
+    unblocked_parser = subparsers.add_parser('unblocked', help='List open tasks whose prerequisites are all done')
+    unblocked_parser.add_argument('--blocked', action='store_true', help='List the tasks still waiting instead')
+    
+    critical_path_parser = subparsers.add_parser('critical-path', help='Show the longest chain of open dependent tasks')
+    critical_path_parser.add_argument('task_id', type=int, nargs='?', help='Show the chain ending at this task')
     
     args = parser.parse_args()
     
@@ -82,48 +402,24 @@ Examples:
         return
     
     try:
-        task_manager = TaskManager()
+        if args.command == 'migrate':
+            from storage import migrate_json_to_sqlite
+            count = migrate_json_to_sqlite(args.source, args.destination)
+            print(f"Migrated {count} tasks to {args.destination}")
+            return
         
-        if args.command == 'add':
-            task_id = task_manager.add_task(args.description)
-            print(f"Task added successfully (ID: {task_id})")
-            
-        elif args.command == 'update':
-            if task_manager.update_task(args.task_id, args.description):
-                print(f"Task {args.task_id} updated successfully")
-            else:
-                print(f"Task {args.task_id} not found")
-                sys.exit(1)
-                
-        elif args.command == 'delete':
-            if task_manager.delete_task(args.task_id):
-                print(f"Task {args.task_id} deleted successfully")
-            else:
-                print(f"Task {args.task_id} not found")
-                sys.exit(1)
-                
-        elif args.command == 'mark-in-progress':
-            if task_manager.mark_task_status(args.task_id, 'in-progress'):
-                print(f"Task {args.task_id} marked as in progress")
-            else:
-                print(f"Task {args.task_id} not found")
-                sys.exit(1)
-                
-        elif args.command == 'mark-done':
-            if task_manager.mark_task_status(args.task_id, 'done'):
-                print(f"Task {args.task_id} marked as done")
-            else:
-                print(f"Task {args.task_id} not found")
-                sys.exit(1)
-                
-        elif args.command == 'list':
-            tasks = task_manager.list_tasks(args.status)
-            if args.status:
-                print(f"Tasks with status '{args.status}':")
-            else:
-                print("All tasks:")
-            print_tasks(tasks)
-            
+        if args.command == 'daemon':
+            run_daemon(args.socket)
+            return
+        
+        task_manager = open_task_manager(not args.no_daemon, args.workspace)
+        
+        try:
+            run_command(task_manager, args)
+        finally:
+            # Flushes pending writes and closes the store, the history or the daemon connection
+            task_manager.close()
+
     except ValueError as e:
         print(f"Error: {e}")
         sys.exit(1)
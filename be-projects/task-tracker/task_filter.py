@@ -0,0 +1,135 @@
+import re
+from typing import Callable, List, Tuple
+
+from indexes import BitmapIndex
+
+# Fields a filter term can test
+FILTER_FIELDS = ('status', 'tag')
+MAX_FILTER_TERMS = 64
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|([A-Za-z]+)\s*=\s*([^\s()]+)|([^\s()]+))')
+
+
+def tokenize(text: str) -> List[Tuple]:
+    """Split a filter expression into ``('(',)``, ``(')',)``, ``('term', field, value)`` and keyword tokens."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise ValueError(f"Invalid filter near: {text[position:]}")
+        opening, closing, field, value, word = match.groups()
+        if opening or closing:
+            tokens.append((opening or closing,))
+        elif field is not None:
+            if field.lower() not in FILTER_FIELDS:
+                raise ValueError(f"Invalid filter field: {field}. Must be one of: {', '.join(FILTER_FIELDS)}")
+            tokens.append(('term', field.lower(), value))
+        elif word.upper() in ('AND', 'OR', 'NOT'):
+            tokens.append((word.upper(),))
+        else:
+            raise ValueError(f"Invalid filter term: {word}. Expected field=value, AND, OR, NOT or parentheses")
+        position = match.end()
+    return tokens
+
+
+def parse_filter(text: str) -> Tuple:
+    """Parse a boolean filter expression into a tree of tuples.
+
+    Terms are ``status=<status>`` and ``tag=<tag>``, combined with ``AND``,
+    ``OR`` and ``NOT`` (in decreasing order of precedence: ``NOT``, ``AND``,
+    ``OR``) and grouped with parentheses, for example
+    ``status=todo AND tag=backend AND NOT tag=blocked``. Keywords are not
+    case sensitive. Nodes are ``('term', field, value)``, ``('not', node)``,
+    ``('and', [nodes])`` and ``('or', [nodes])``. Raises ``ValueError`` for
+    malformed expressions.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        raise ValueError("Filter cannot be empty")
+    if sum(1 for token in tokens if token[0] == 'term') > MAX_FILTER_TERMS:
+        raise ValueError(f"Filter cannot have more than {MAX_FILTER_TERMS} terms")
+    position = 0
+
+    def peek():
+        return tokens[position][0] if position < len(tokens) else None
+
+    def unexpected():
+        if position == len(tokens):
+            return ValueError("Invalid filter: unexpected end of expression")
+        token = tokens[position]
+        label = f"{token[1]}={token[2]}" if token[0] == 'term' else token[0]
+        return ValueError(f"Invalid filter: unexpected {label}")
+
+    def parse_or():
+        nonlocal position
+        nodes = [parse_and()]
+        while peek() == 'OR':
+            position += 1
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nonlocal position
+        nodes = [parse_not()]
+        while peek() == 'AND':
+            position += 1
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not():
+        nonlocal position
+        kind = peek()
+        if kind == 'NOT':
+            position += 1
+            return ('not', parse_not())
+        if kind == 'term':
+            position += 1
+            return tokens[position - 1]
+        if kind == '(':
+            position += 1
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError("Invalid filter: missing closing parenthesis")
+            position += 1
+            return node
+        raise unexpected()
+
+    tree = parse_or()
+    if position < len(tokens):
+        raise unexpected()
+    return tree
+
+
+def evaluate_filter(node: Tuple, lookup: Callable[[str, str], BitmapIndex],
+                    universe: Callable[[], BitmapIndex]) -> BitmapIndex:
+    """Evaluate a parsed filter to the bitmap of matching IDs.
+
+    ``lookup(field, value)`` returns the bitmap of one term and
+    ``universe()`` the bitmap of every ID, which is only needed for
+    negations that are not part of an ``AND``. An ``AND`` intersects its
+    smallest operands first and subtracts its negated ones, so
+    ``a AND NOT b`` is one difference rather than a complement and an
+    intersection.
+    """
+    kind = node[0]
+    if kind == 'term':
+        return lookup(node[1], node[2])
+    if kind == 'not':
+        return universe() - evaluate_filter(node[1], lookup, universe)
+    if kind == 'or':
+        result = evaluate_filter(node[1][0], lookup, universe)
+        for child in node[1][1:]:
+            result = result | evaluate_filter(child, lookup, universe)
+        return result
+
+    included = [evaluate_filter(child, lookup, universe) for child in node[1] if child[0] != 'not']
+    excluded = [evaluate_filter(child[1], lookup, universe) for child in node[1] if child[0] == 'not']
+    included.sort(key=len)
+    result = included[0] if included else universe()
+    for bitmap in included[1:]:
+        result = result & bitmap
+    for bitmap in excluded:
+        result = result - bitmap
+    return result
@@ -0,0 +1,267 @@
+import heapq
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from indexes import SortedIndex
+
+# Statuses of tasks that still have to be finished
+OPEN_STATUSES = ('todo', 'in-progress')
+
+
+def topological_order(prerequisites: Mapping[int, Iterable[int]]) -> List[int]:
+    """Order every task of a ``task_id -> prerequisite IDs`` mapping after its prerequisites.
+
+    Prerequisites that are not keys of the mapping are included too, before
+    the tasks waiting for them. Among the tasks that are ready, lower IDs
+    come first, so the order is by ID wherever tasks only wait for older
+    ones and new dependencies on older tasks rarely need reordering. Raises ``ValueError`` naming the tasks
+    involved if the dependencies contain a cycle.
+    """
+    dependents: Dict[int, List[int]] = {}
+    waiting = {task_id: 0 for task_id in prerequisites}
+    for task_id, blockers in prerequisites.items():
+        for prerequisite in blockers:
+            dependents.setdefault(prerequisite, []).append(task_id)
+            waiting.setdefault(prerequisite, 0)
+            waiting[task_id] += 1
+    ready = [task_id for task_id, count in waiting.items() if not count]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        task_id = heapq.heappop(ready)
+        order.append(task_id)
+        for dependent in dependents.get(task_id, ()):
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                heapq.heappush(ready, dependent)
+    if len(order) < len(waiting):
+        cycle = sorted(task_id for task_id, count in waiting.items() if count)
+        raise ValueError(f"Tasks {', '.join(map(str, cycle))} depend on each other")
+    return order
+
+
+class DependencyGraph:
+    """Dependencies between tasks, with indexes kept up to date on every change.
+
+    A task lists the tasks it waits for in ``Task.blocked_by``. The graph
+    mirrors those edges (``prerequisites``) and keeps the reverse ones
+    (``dependents``). A prerequisite is open while it exists and is not
+    done; a task with open prerequisites is ``blocked``, and an open task
+    whose prerequisites are all finished is ``unblocked``. Prerequisites
+    that do not exist (yet) count as finished, so records can be imported
+    in any order.
+
+    ``depth`` is the number of open tasks on the longest chain of
+    dependencies ending at an open task, kept for every open task that has
+    prerequisites or dependents; ``by_depth`` orders them for the critical
+    path. Each change only revisits the changed task, its direct
+    dependents and the descendants whose depth actually changes.
+
+    ``order`` numbers the tasks with dependencies so that prerequisites
+    come first, and is repaired on each new edge by renumbering only the
+    tasks between its two ends (Pearce and Kelly's dynamic topological
+    sort). Cycle checks only search that stretch, and a dependency on a
+    task that is already ordered before its dependent is accepted at once.
+    """
+
+    def __init__(self, status_of: Callable[[int], Optional[str]]):
+        """``status_of(task_id)`` returns a task's status, or ``None`` if it does not exist."""
+        self.status_of = status_of
+        self.prerequisites: Dict[int, Tuple[int, ...]] = {}
+        self.dependents: Dict[int, Set[int]] = {}
+        self.open_blockers: Dict[int, int] = {}
+        self.blocked = SortedIndex()
+        self.unblocked = SortedIndex()
+        self.depth: Dict[int, int] = {}
+        self.by_depth = SortedIndex()
+        self.order: Dict[int, int] = {}
+        # Numbers for tasks that join the graph before or after all others
+        self._first_order = 0
+        self._next_order = 0
+
+    def is_open(self, task_id: int) -> bool:
+        """Check whether a task exists and still has to be finished."""
+        return self.status_of(task_id) in OPEN_STATUSES
+
+    def build(self, tasks: Iterable):
+        """Index the dependencies of freshly loaded task records.
+
+        Raises ``Exception`` if the records contain a dependency cycle,
+        which only a hand-edited store can.
+        """
+        for task in tasks:
+            if task.blocked_by:
+                self.prerequisites[task.id] = task.blocked_by
+                for prerequisite in task.blocked_by:
+                    self.dependents.setdefault(prerequisite, set()).add(task.id)
+        for task_id in self.prerequisites:
+            self._refresh_blocked(task_id)
+
+        try:
+            order = topological_order(self.prerequisites)
+        except ValueError as e:
+            raise Exception(f"Failed to load tasks: {e}")
+        for position, task_id in enumerate(order):
+            self.order[task_id] = position
+            self._set_depth(task_id, self._compute_depth(task_id))
+        self._next_order = len(order)
+
+    def put(self, old, new):
+        """Update the indexes after a task record changed from ``old`` to ``new``.
+
+        Either may be ``None`` for a task that was added or removed; the
+        task store already holds ``new``.
+        """
+        task_id = (new or old).id
+        old_prerequisites = set(old.blocked_by) if old is not None else set()
+        new_prerequisites = set(new.blocked_by) if new is not None else set()
+        for prerequisite in old_prerequisites - new_prerequisites:
+            dependents = self.dependents[prerequisite]
+            dependents.discard(task_id)
+            if not dependents:
+                del self.dependents[prerequisite]
+        for prerequisite in new_prerequisites - old_prerequisites:
+            self.dependents.setdefault(prerequisite, set()).add(task_id)
+        if new is not None and new.blocked_by:
+            self.prerequisites[task_id] = new.blocked_by
+        else:
+            self.prerequisites.pop(task_id, None)
+        for prerequisite in new_prerequisites - old_prerequisites:
+            self._order_edge(prerequisite, task_id)
+        for node in (task_id, *(old_prerequisites - new_prerequisites)):
+            if node not in self.prerequisites and node not in self.dependents:
+                self.order.pop(node, None)
+
+        self._refresh_blocked(task_id)
+        was_open = old is not None and old.status in OPEN_STATUSES
+        if was_open != (new is not None and new.status in OPEN_STATUSES):
+            for dependent in self.dependents.get(task_id, ()):
+                self._refresh_blocked(dependent)
+        # Prerequisites that gained or lost their only dependent join or leave the graph
+        self._propagate([task_id, *(old_prerequisites ^ new_prerequisites)])
+
+    def _order_edge(self, prerequisite: int, task_id: int):
+        """Keep ``order`` topological after ``task_id`` started waiting for ``prerequisite``."""
+        if task_id not in self.order:
+            self.order[task_id] = self._next_order
+            self._next_order += 1
+        if prerequisite not in self.order:
+            self._first_order -= 1
+            self.order[prerequisite] = self._first_order
+        lower, upper = self.order[task_id], self.order[prerequisite]
+        if upper < lower:
+            return
+        # Only tasks numbered between the two ends can be on the wrong side of the new edge
+        after = self._reachable(task_id, self.dependents, lambda node: self.order[node] <= upper)
+        if prerequisite in after:
+            raise ValueError(f"Task {prerequisite} already depends on task {task_id}")
+        before = self._reachable(prerequisite, self.prerequisites, lambda node: self.order[node] >= lower)
+        nodes = sorted(before, key=self.order.get) + sorted(after, key=self.order.get)
+        for node, position in zip(nodes, sorted(self.order[node] for node in nodes)):
+            self.order[node] = position
+
+    @staticmethod
+    def _reachable(start: int, edges: Mapping[int, Iterable[int]], within: Callable[[int], bool]) -> Set[int]:
+        """Return the tasks reachable from ``start`` along ``edges`` without leaving ``within``."""
+        seen = {start}
+        stack = [start]
+        while stack:
+            for node in edges.get(stack.pop(), ()):
+                if node not in seen and within(node):
+                    seen.add(node)
+                    stack.append(node)
+        return seen
+
+    def _refresh_blocked(self, task_id: int):
+        """Recount a task's open prerequisites and file it as blocked or unblocked."""
+        self.blocked.discard(task_id)
+        self.unblocked.discard(task_id)
+        prerequisites = self.prerequisites.get(task_id)
+        if not prerequisites or not self.is_open(task_id):
+            self.open_blockers.pop(task_id, None)
+            return
+        count = sum(1 for prerequisite in prerequisites if self.is_open(prerequisite))
+        self.open_blockers[task_id] = count
+        (self.blocked if count else self.unblocked).add(task_id)
+
+    def _compute_depth(self, task_id: int) -> int:
+        """Return a node's depth from the depths of its prerequisites, 0 outside the graph."""
+        if not self.is_open(task_id) or (task_id not in self.prerequisites and task_id not in self.dependents):
+            return 0
+        return 1 + max((self.depth.get(prerequisite, 1 if self.is_open(prerequisite) else 0)
+                        for prerequisite in self.prerequisites.get(task_id, ())), default=0)
+
+    def _set_depth(self, task_id: int, depth: int):
+        """Store a node's depth, dropping nodes that left the graph."""
+        previous = self.depth.pop(task_id, None)
+        if previous is not None:
+            self.by_depth.discard((previous, task_id))
+        if depth:
+            self.depth[task_id] = depth
+            self.by_depth.add((depth, task_id))
+
+    def _propagate(self, task_ids: Iterable[int]):
+        """Recompute depths from the given tasks on, only following changed ones."""
+        queue = deque(task_ids)
+        while queue:
+            task_id = queue.popleft()
+            depth = self._compute_depth(task_id)
+            if depth != self.depth.get(task_id, 0):
+                self._set_depth(task_id, depth)
+                queue.extend(self.dependents.get(task_id, ()))
+
+    def find_path(self, start: int, target: int) -> Optional[List[int]]:
+        """Return a chain of prerequisites leading from ``start`` to ``target``, if there is one.
+
+        Prerequisites are numbered before their dependents, so only tasks
+        numbered between ``target`` and ``start`` are searched.
+        """
+        if start != target and self.order.get(start, -1) < self.order.get(target, self._next_order):
+            return None
+        lower = self.order.get(target)
+        parents = {start: None}
+        stack = [start]
+        while stack:
+            task_id = stack.pop()
+            if task_id == target:
+                path = []
+                while task_id is not None:
+                    path.append(task_id)
+                    task_id = parents[task_id]
+                return path[::-1]
+            for prerequisite in self.prerequisites.get(task_id, ()):
+                if prerequisite not in parents and self.order[prerequisite] >= lower:
+                    parents[prerequisite] = task_id
+                    stack.append(prerequisite)
+        return None
+
+    def unblocks(self, task_id: int) -> List[int]:
+        """Return the tasks that finishing ``task_id`` would unblock, in ID order."""
+        if not self.is_open(task_id):
+            return []
+        return sorted(dependent for dependent in self.dependents.get(task_id, ())
+                      if self.open_blockers.get(dependent) == 1)
+
+    def critical_path(self, task_id: Optional[int] = None) -> List[int]:
+        """Return the longest chain of open tasks ending at ``task_id``, first task first.
+
+        Without ``task_id`` the chain ends at the deepest task of the whole
+        graph. The walk follows one prerequisite per step, so it costs the
+        length of the chain times the prerequisites per task.
+        """
+        if task_id is None:
+            deepest = next(self.by_depth.iter_after(reverse=True), None)
+            if deepest is None:
+                return []
+            task_id = deepest[1]
+        elif not self.is_open(task_id):
+            return []
+        path = [task_id]
+        depth = self.depth.get(task_id, 1)
+        while depth > 1:
+            task_id = min(prerequisite for prerequisite in self.prerequisites[task_id]
+                          if self.depth.get(prerequisite) == depth - 1)
+            path.append(task_id)
+            depth -= 1
+        path.reverse()
+        return path
@@ -0,0 +1,144 @@
+import bisect
+import json
+import os
+from typing import Collection, Dict, List, Tuple
+
+from storage import fsync_directory, write_atomically
+from task_record import format_timestamp, parse_timestamp
+
+SNAPSHOT_PREFIX = 'snapshot-'
+
+
+class TaskHistory:
+    """Event-sourced history of every task change, with periodic snapshots.
+
+    History lives in the ``<store file>.history`` directory. ``events.ndjson``
+    holds one line per change, the mutation record plus the time it was
+    committed: ``{"at": "...", "op": "put", "task": {...}}`` or
+    ``{"at": "...", "op": "delete", "id": 1}``. Every so often the full task
+    list is written to ``snapshot-<time>-<offset>.json``, where ``offset`` is
+    the size of the event file at that moment. The state at any time is
+    rebuilt from the newest snapshot taken before it plus the events logged
+    after that snapshot, so queries never replay the whole history.
+    """
+
+    def __init__(self, file_path: str, min_snapshot_bytes: int = 1 << 20, durability: str = 'periodic'):
+        """Initialize the history kept next to the given store file."""
+        self.directory = file_path + '.history'
+        self.events_path = os.path.join(self.directory, 'events.ndjson')
+        self.min_snapshot_bytes = min_snapshot_bytes
+        self.durability = durability
+        self.snapshot_offset = 0
+        self.snapshot_size = 0
+        self._file = None
+
+    def open(self, tasks: Collection[Dict], now: int):
+        """Start recording, taking a first snapshot of ``tasks`` for a new history.
+
+        History only covers changes made while it is recorded, so queries
+        for earlier times are refused.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.events_path, 'ab')
+            snapshots = self._list_snapshots()
+            if not snapshots:
+                self.snapshot(tasks, now)
+            else:
+                _, self.snapshot_offset, name = snapshots[-1]
+                self.snapshot_size = os.path.getsize(os.path.join(self.directory, name))
+        except IOError as e:
+            raise Exception(f"Failed to open task history: {e}")
+
+    def _list_snapshots(self) -> List[Tuple[int, int, str]]:
+        """Return ``(time, offset, file name)`` for every snapshot, oldest first."""
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SNAPSHOT_PREFIX) and name.endswith('.json'):
+                at, _, offset = name[len(SNAPSHOT_PREFIX):-len('.json')].partition('-')
+                if at.isdigit() and offset.isdigit():
+                    snapshots.append((int(at), int(offset), name))
+        snapshots.sort()
+        return snapshots
+
+    def append(self, at: int, records: List[Dict]):
+        """Log the mutation records committed at time ``at``."""
+        stamp = format_timestamp(at)
+        try:
+            self._file.write(''.join(json.dumps(dict(record, at=stamp), separators=(',', ':')) + '\n'
+                                     for record in records).encode())
+            self._file.flush()
+            if self.durability == 'fsync':
+                os.fsync(self._file.fileno())
+        except IOError as e:
+            raise Exception(f"Failed to record task history: {e}")
+
+    def needs_snapshot(self) -> bool:
+        """Check whether enough events were logged to take a new snapshot.
+
+        A snapshot is due once the events logged since the last one take as
+        much space as that snapshot, and at least ``min_snapshot_bytes``.
+        Writing snapshots then costs amortized constant time per event, and
+        a query never reads more events than the snapshot it starts from.
+        """
+        return self._file.tell() - self.snapshot_offset >= max(self.min_snapshot_bytes, self.snapshot_size)
+
+    def snapshot(self, tasks: Collection[Dict], now: int):
+        """Write the full task list as of the end of the event file."""
+        offset = self._file.tell()
+        path = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{now}-{offset}.json")
+        try:
+            write_atomically(path, lambda file: json.dump(list(tasks), file, separators=(',', ':')),
+                             self.durability != 'buffered')
+            self.snapshot_size = os.path.getsize(path)
+        except IOError as e:
+            raise Exception(f"Failed to write task history snapshot: {e}")
+        self.snapshot_offset = offset
+
+    def tasks_at(self, at: int) -> List[Dict]:
+        """Return the task list as it was at time ``at``, in ID order.
+
+        Raises ``ValueError`` for times before the history starts.
+        """
+        snapshots = self._list_snapshots()
+        index = bisect.bisect_right(snapshots, (at, float('inf'), ''))
+        if index == 0:
+            start = format_timestamp(snapshots[0][0]) if snapshots else 'now'
+            raise ValueError(f"No task history before {start}")
+        _, offset, name = snapshots[index - 1]
+
+        try:
+            with open(os.path.join(self.directory, name), 'r') as file:
+                by_id = {task['id']: task for task in json.load(file)}
+            with open(self.events_path, 'rb') as file:
+                file.seek(offset)
+                for line in file:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A change still being appended
+                        break
+                    if parse_timestamp(event['at']) > at:
+                        break
+                    if event['op'] == 'put':
+                        by_id[event['task']['id']] = event['task']
+                    elif event['op'] == 'delete':
+                        by_id.pop(event['id'], None)
+        except IOError as e:
+            raise Exception(f"Failed to read task history: {e}")
+        return [by_id[task_id] for task_id in sorted(by_id)]
+
+    def sync(self):
+        """Fsync the event file."""
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+            fsync_directory(self.events_path)
+
+    def close(self):
+        """Stop recording, fsyncing the event file unless durability is buffered."""
+        if self._file is None:
+            return
+        if self.durability != 'buffered':
+            self.sync()
+        self._file.close()
+        self._file = None
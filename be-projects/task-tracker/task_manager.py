@@ -1,110 +1,1397 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Dict, Optional, Tuple
+import base64
+import functools
+import heapq
 import json
-import os
-from datetime import datetime
-from typing import List, Dict, Optional
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+from itertools import chain, islice, repeat, takewhile
+from backups import TaskBackups
+from change_feed import ChangeFeed
+from indexes import BitmapIndex, SortedIndex
+from locking import FileLock, ReadWriteLock, VersionStamp
+from metrics import REGISTRY, SIZE_BUCKETS
+from search_index import SearchIndex
+from storage import StorageBackend, create_storage
+from task_filter import evaluate_filter, parse_filter
+from task_graph import DependencyGraph, topological_order
+from task_history import TaskHistory
+from task_record import Task, TaskDictView, format_timestamp, parse_timestamp, to_micros
+from task_stats import TaskStats
+from write_behind import WriteBehind
+
+VALID_STATUSES = ['todo', 'in-progress', 'done']
+TIMESTAMP_FIELDS = ['createdAt', 'updatedAt']
+TIMESTAMP_ATTRIBUTES = {'createdAt': 'created_at', 'updatedAt': 'updated_at'}
+SORT_FIELDS = ['id', 'createdAt', 'updatedAt', 'status']
+TAG_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_.:/-]{0,49}$')
+MAX_TAGS = 20
+# Selections of fewer than sqrt(SELECTIVE_PAGE * tasks) tasks are sorted
+# rather than picked out of a walk over a sort index
+SELECTIVE_PAGE = 64
+
+OPERATION_SECONDS = REGISTRY.histogram(
+    'task_tracker_operation_seconds', 'Duration of TaskManager operations once their lock is held', ['operation'])
+LOCK_WAIT_SECONDS = REGISTRY.histogram(
+    'task_tracker_lock_wait_seconds', 'Time spent waiting for TaskManager locks', ['lock'])
+STORE_SECONDS = REGISTRY.histogram(
+    'task_tracker_store_seconds', 'Duration of store loads, commits and maintenance', ['operation'])
+STORE_WRITTEN_BYTES = REGISTRY.counter(
+    'task_tracker_store_written_bytes', 'Bytes written by store commits')
+COMMIT_BYTES = REGISTRY.histogram(
+    'task_tracker_store_commit_bytes', 'Bytes written per store commit', buckets=SIZE_BUCKETS)
+HISTORY_ERRORS = REGISTRY.counter(
+    'task_tracker_history_errors', 'Failed task history writes, after which history stops recording')
+
+logger = logging.getLogger(__name__)
+
+# Lock waits: 'writer' serializes writers in this process, 'file' is the lock
+# of a shared store, 'reader' and 'state' guard the in-memory state
+WRITER_WAIT = LOCK_WAIT_SECONDS.labels('writer')
+FILE_LOCK_WAIT = LOCK_WAIT_SECONDS.labels('file')
+READER_WAIT = LOCK_WAIT_SECONDS.labels('reader')
+STATE_WAIT = LOCK_WAIT_SECONDS.labels('state')
+
+
+def mutation(method):
+    """Run a TaskManager method while holding the store's write lock."""
+    seconds = OPERATION_SECONDS.labels(method.__name__)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._writing():
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                seconds.observe(time.perf_counter() - started)
+    return wrapper
+
+
+def reader(method):
+    """Run a TaskManager method while holding the in-memory state for reading."""
+    seconds = OPERATION_SECONDS.labels(method.__name__)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        with self._state_lock.read():
+            acquired = time.perf_counter()
+            READER_WAIT.observe(acquired - started)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                seconds.observe(time.perf_counter() - acquired)
+    return wrapper
 
 
 class TaskManager:
-    def __init__(self, file_path: str = "tasks.json"):
-        """Initialize TaskManager with JSON file path."""
-        self.file_path = file_path
-        self.tasks = self._load_tasks()
-        self.next_id = self._get_next_id()
-
-    def _load_tasks(self) -> List[Dict]:
-        """Load tasks from JSON file or create empty list if file doesn't exist."""
-        if os.path.exists(self.file_path):
+    def __init__(self, file_path: Optional[str] = None, backend: str = "json",
+                 storage: Optional[StorageBackend] = None, shared: bool = False,
+                 change_feed_size: int = 10000, write_behind: bool = False,
+                 flush_interval: float = 0.05, flush_mutations: int = 1000, history: bool = False,
+                 min_snapshot_bytes: int = 1 << 20, **storage_options):
+        """Initialize TaskManager with a storage backend.
+
+        ``backend`` names one of the engines in ``storage.BACKENDS`` and
+        ``file_path`` defaults to that engine's usual file (``tasks.json``
+        or ``tasks.db``). An already constructed ``storage`` takes precedence.
+
+        Set ``shared`` when several processes use the same store. Changes are
+        then made under an exclusive file lock after reloading any newer
+        version, and ``refresh()`` picks up changes made by other processes.
+
+        ``store_version`` is bumped by every committed change and
+        ``last_modified`` records when that happened; ``version_info()``
+        turns them into cache validators. The last ``change_feed_size``
+        changes are kept in a ``ChangeFeed`` for ``changes_since()``.
+
+        With ``write_behind`` changes are acknowledged once applied in memory
+        and persisted by a background thread in groups, every
+        ``flush_interval`` seconds or once ``flush_mutations`` tasks are
+        waiting. ``close()`` and process exit write out what is left. It
+        cannot be combined with ``shared``, since other processes would not
+        see changes that have not been written yet.
+
+        With ``history`` every change is also recorded in a ``TaskHistory``
+        next to the store, with snapshots taken as described there, so
+        ``tasks_as_of()`` can rebuild the task list at any earlier time.
+
+        A single instance may be used from many threads. Writers run one at a
+        time and only hold the in-memory state exclusively while applying a
+        change, not while it is written to storage. Tasks are held as compact
+        ``task_record.Task`` records that are never modified after they are
+        published, and callers are handed task dictionaries built from them.
+        """
+        if write_behind and shared:
+            raise ValueError("Write-behind persistence cannot be used with a shared store")
+        self.storage = storage or create_storage(backend, file_path, **storage_options)
+        self.file_path = self.storage.file_path
+        self.lock = FileLock(self.file_path) if shared else None
+        self.version_stamp = VersionStamp(self.file_path) if shared else None
+        self.store_version = 0
+        self.last_modified = datetime.now(timezone.utc)
+        # Unshared counters restart with each process, so their tags carry a
+        # token of this instance; shared counters persist in the version file.
+        self.store_token = 'shared' if shared else uuid.uuid4().hex[:8]
+        self._locked = False
+        self._pending = None
+        self._write_mutex = threading.RLock()
+        self._state_lock = ReadWriteLock()
+        self._changed = threading.Condition()
+        self.tasks = None
+        if shared:
+            with self.lock.acquire(shared=True):
+                self._reload()
+        else:
+            self.tasks = self._load_tasks()
+            self.next_id = self._get_next_id()
+        self.changes = ChangeFeed(self.store_version, change_feed_size)
+        self.write_behind = WriteBehind(self._persist, flush_interval, flush_mutations) \
+            if write_behind else None
+        self.history = None
+        self.history_error: Optional[Exception] = None
+        if history:
+            self.history = TaskHistory(self.file_path, min_snapshot_bytes, self.storage.durability)
+            self.history.open(TaskDictView(self.tasks), self._get_timestamp())
+
+    @classmethod
+    def from_config(cls, config, file_path: Optional[str] = None) -> 'TaskManager':
+        """Create a TaskManager from a configuration object such as ``config.Config``.
+
+        ``file_path`` overrides the configured store file, e.g. for a workspace.
+        """
+        options = {}
+        if config.STORAGE_BACKEND == 'log':
+            options['compact_threshold'] = config.LOG_COMPACT_THRESHOLD
+        return cls(file_path or config.TASKS_FILE, backend=config.STORAGE_BACKEND,
+                   shared=config.SHARED_STORE, change_feed_size=config.CHANGE_FEED_SIZE,
+                   write_behind=config.WRITE_BEHIND, flush_interval=config.FLUSH_INTERVAL_MS / 1000,
+                   flush_mutations=config.FLUSH_MUTATIONS, history=config.HISTORY,
+                   min_snapshot_bytes=config.HISTORY_SNAPSHOT_KB * 1024, durability=config.DURABILITY,
+                   fsync_interval=config.FSYNC_INTERVAL_MS / 1000, **options)
+
+    def _reload(self):
+        """Catch up with the store and its version; the caller holds the file lock.
+
+        When the backend can list what other processes changed, only those
+        tasks are reloaded. Otherwise all tasks are, and the changes are found
+        by comparing them with the previous ones. Either way they are added
+        to the change feed under the new version.
+        """
+        previous_tasks = self.tasks
+        started = time.perf_counter()
+        records = self.storage.changes() if previous_tasks is not None else None
+        self.store_version = self.version_stamp.read()
+        if self.version_stamp.modified_at is not None:
+            self.last_modified = datetime.fromtimestamp(self.version_stamp.modified_at, timezone.utc)
+        if records is not None:
+            changes = self._apply_changes(records)
+            STORE_SECONDS.labels('reload').observe(time.perf_counter() - started)
+        else:
+            self.tasks = self._load_tasks()
+            self.next_id = self._get_next_id()
+            if previous_tasks is None:
+                return
+            changes = self._diff_tasks(previous_tasks, self.tasks)
+        self.changes.append(self.store_version, changes)
+        self._notify_changed()
+
+    def _apply_changes(self, records: List[Dict]) -> List[Tuple[str, int, Optional[Task]]]:
+        """Apply mutation records committed by another process and list the changes for the feed.
+
+        The records are reduced to the latest version of each task. Those
+        that gain dependencies are first put without their new edges, so no
+        intermediate state of the graph holds a cycle, whatever the order of
+        the records. ``next_id`` only grows, as it does for local deletions.
+        """
+        latest = {}
+        for record in records:
+            if record['op'] == 'put':
+                task = Task.from_dict(record['task'])
+                latest.pop(task.id, None)
+                latest[task.id] = task
+                self.next_id = max(self.next_id, task.id + 1)
+            else:
+                latest.pop(record['id'], None)
+                latest[record['id']] = None
+        originals = {task_id: self.tasks.get(task_id) for task_id in latest}
+        gaining = []
+        for task_id, task in latest.items():
+            previous = originals[task_id]
+            if task is None:
+                self._remove(task_id)
+                continue
+            kept = set(previous.blocked_by) if previous is not None else set()
+            if kept.issuperset(task.blocked_by):
+                self._put(task)
+            else:
+                self._put(task.replace(blocked_by=tuple(blocker for blocker in task.blocked_by if blocker in kept)))
+                gaining.append(task)
+        for task in gaining:
+            self._put(task)
+        return [(self._change_kind(task, originals[task_id]), task_id, task) for task_id, task in latest.items()
+                if task is not None or originals[task_id] is not None]
+
+    @staticmethod
+    def _diff_tasks(old: Dict[int, Task], new: Dict[int, Task]) -> List[Tuple[str, int, Optional[Task]]]:
+        """List the ``(kind, task_id, task)`` changes that turn ``old`` into ``new``."""
+        changes = []
+        for task_id, task in new.items():
+            previous = old.get(task_id)
+            if previous is None or \
+                    (previous.updated_at, previous.status, previous.description, previous.blocked_by,
+                     previous.tags) != \
+                    (task.updated_at, task.status, task.description, task.blocked_by, task.tags):
+                changes.append((TaskManager._change_kind(task, previous), task_id, task))
+        changes.extend(('delete', task_id, None) for task_id in old.keys() - new.keys())
+        return changes
+
+    @staticmethod
+    def _change_kind(task: Optional[Task], previous: Optional[Task]) -> str:
+        """Classify a change from ``previous`` to ``task`` for the change feed."""
+        if task is None:
+            return 'delete'
+        if previous is None:
+            return 'add'
+        return 'status' if task.status != previous.status else 'update'
+
+    def _notify_changed(self):
+        """Wake up threads waiting in ``wait_for_change()``."""
+        with self._changed:
+            self._changed.notify_all()
+
+    def refresh(self) -> bool:
+        """Reload the store if another process changed it, and return whether it did.
+
+        Checking costs a single ``os.stat`` of the version file when nothing
+        has changed. Only shared stores are ever reloaded.
+        """
+        if self.version_stamp is None or self.version_stamp.read() == self.store_version:
+            return False
+        with self._write_mutex:
+            if self._locked or self.version_stamp.read() == self.store_version:
+                return False
+            with self.lock.acquire(shared=True), self._state_lock.write():
+                self._reload()
+        return True
+
+    @contextmanager
+    def _writing(self):
+        """Serialize writers, holding the exclusive file lock of a shared store.
+
+        A shared store that another process changed is reloaded first.
+        """
+        started = time.perf_counter()
+        with self._write_mutex:
+            WRITER_WAIT.observe(time.perf_counter() - started)
+            if self.lock is None or self._locked:
+                yield
+                return
+            started = time.perf_counter()
+            with self.lock.acquire():
+                FILE_LOCK_WAIT.observe(time.perf_counter() - started)
+                self._locked = True
+                try:
+                    if self.version_stamp.read() != self.store_version:
+                        with self._state_lock.write():
+                            self._reload()
+                    yield
+                finally:
+                    self._locked = False
+
+    def _load_tasks(self) -> Dict[int, Task]:
+        """Load tasks from the storage backend and build the indexes."""
+        started = time.perf_counter()
+        tasks = {}
+        for task in self.storage.load():
+            tasks[task['id']] = Task.from_dict(task)
+        self._build_indexes(tasks)
+        STORE_SECONDS.labels('load').observe(time.perf_counter() - started)
+        return tasks
+
+    def _build_indexes(self, tasks: Dict[int, Task]):
+        """Build the secondary indexes for a freshly loaded task dictionary.
+
+        ``self.tasks`` is the primary ``id -> task`` index, kept in insertion
+        order. ``self.status_index`` and ``self.tag_index`` map each status
+        and tag to a bitmap of the IDs that have it, and ``self.sort_index``
+        keeps ``(timestamp, id)`` keys per timestamp field and status for
+        sorted, paginated listings.
+        ``self.search_index`` is the full-text index over descriptions,
+        ``self.aggregates`` holds the aggregates behind ``stats()`` and
+        ``self.graph`` indexes the dependencies between tasks.
+        """
+        ids = {status: [] for status in VALID_STATUSES}
+        tagged = {}
+        keys = {field: {status: [] for status in VALID_STATUSES} for field in TIMESTAMP_FIELDS}
+        for task in tasks.values():
+            ids[task.status].append(task.id)
+            for tag in task.tags:
+                tagged.setdefault(tag, []).append(task.id)
+            for field, attribute in TIMESTAMP_ATTRIBUTES.items():
+                keys[field][task.status].append((getattr(task, attribute), task.id))
+
+        self.status_index = {status: BitmapIndex(ids[status]) for status in VALID_STATUSES}
+        self.tag_index = {tag: BitmapIndex(task_ids) for tag, task_ids in tagged.items()}
+        self.sort_index = {field: {status: SortedIndex(keys[field][status]) for status in VALID_STATUSES}
+                           for field in TIMESTAMP_FIELDS}
+        self.search_index = SearchIndex(lambda task_id: self.tasks[task_id].description)
+        self.aggregates = TaskStats()
+        for task in tasks.values():
+            self.search_index.add(task.id, task.description)
+            self.aggregates.add(task)
+
+        def status_of(task_id: int) -> Optional[str]:
+            task = tasks.get(task_id)
+            return task.status if task is not None else None
+        self.graph = DependencyGraph(status_of)
+        self.graph.build(tasks.values())
+
+    def _index(self, task: Task):
+        """Add a task to the secondary indexes."""
+        self.status_index[task.status].add(task.id)
+        for tag in task.tags:
+            bitmap = self.tag_index.get(tag)
+            if bitmap is None:
+                bitmap = self.tag_index[tag] = BitmapIndex()
+            bitmap.add(task.id)
+        for field, attribute in TIMESTAMP_ATTRIBUTES.items():
+            self.sort_index[field][task.status].add((getattr(task, attribute), task.id))
+        self.search_index.add(task.id, task.description)
+        self.aggregates.add(task)
+
+    def _unindex(self, task: Task):
+        """Remove a task from the secondary indexes."""
+        self.status_index[task.status].discard(task.id)
+        for tag in task.tags:
+            bitmap = self.tag_index[tag]
+            bitmap.discard(task.id)
+            if not bitmap:
+                del self.tag_index[tag]
+        for field, attribute in TIMESTAMP_ATTRIBUTES.items():
+            self.sort_index[field][task.status].discard((getattr(task, attribute), task.id))
+        self.search_index.remove(task.id, task.description)
+        self.aggregates.remove(task)
+
+    def _snapshot(self) -> TaskDictView:
+        """Return all current tasks as dictionaries for the storage backend.
+
+        Write-behind flushes run alongside writers, so they get a copy of
+        the task index taken under the read lock.
+        """
+        if self.write_behind is None:
+            return TaskDictView(self.tasks)
+        with self._state_lock.read():
+            return TaskDictView(dict(self.tasks))
+
+    @staticmethod
+    def _to_dict_records(records: List[Dict]) -> List[Dict]:
+        """Return mutation records with their ``Task`` objects in dictionary shape."""
+        return [dict(record, task=record['task'].to_dict()) if record['op'] == 'put' else record
+                for record in records]
+
+    def _persist(self, records: List[Dict]):
+        """Persist mutation records through the storage backend."""
+        started = time.perf_counter()
+        written = self.storage.commit(self._to_dict_records(records), self._snapshot, len(self.tasks))
+        STORE_SECONDS.labels('commit').observe(time.perf_counter() - started)
+        if written is not None:
+            STORE_WRITTEN_BYTES.inc(written)
+            COMMIT_BYTES.observe(written)
+
+    def _put(self, task: Task) -> Optional[Task]:
+        """Insert or replace a task in the indexes and return the previous version."""
+        previous = self.tasks.get(task.id)
+        if previous is not None:
+            self._unindex(previous)
+        self.tasks[task.id] = task
+        self._index(task)
+        self.graph.put(previous, task)
+        return previous
+
+    def _remove(self, task_id: int) -> Optional[Task]:
+        """Remove a task from the indexes and return it."""
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            self._unindex(task)
+            self.graph.put(task, None)
+        return task
+
+    def _change(self, record: Dict):
+        """Apply a mutation record in memory and persist it, or queue it in a batch.
+
+        Changed tasks are replaced by new records rather than edited in
+        place, so the previous version can be restored on rollback.
+        """
+        started = time.perf_counter()
+        with self._state_lock.write():
+            STATE_WAIT.observe(time.perf_counter() - started)
+            if record['op'] == 'put':
+                previous = self._put(record['task'])
+            else:
+                previous = self._remove(record['id'])
+
+        if self._pending is not None:
+            self._pending.append((record, previous))
+        else:
+            self._commit([(record, previous)])
+
+    def _commit(self, entries: List[Tuple[Dict, Optional[Task]]]):
+        """Persist applied changes, undoing them in memory if persisting fails."""
+        # Only the last change to each task needs to reach storage
+        records = {}
+        originals = {}
+        for record, previous in entries:
+            task_id = record['task'].id if record['op'] == 'put' else record['id']
+            records.pop(task_id, None)
+            records[task_id] = record
+            originals.setdefault(task_id, previous)
+        try:
+            if self.write_behind is None:
+                self._persist(list(records.values()))
+            elif self.write_behind.error is not None:
+                # Refuse new changes while the background writer cannot save
+                raise Exception(f"Failed to save tasks: {self.write_behind.error}")
+            else:
+                self.write_behind.add(records)
+        except Exception:
+            with self._state_lock.write():
+                self._rollback(entries)
+            raise
+
+        changes = []
+        for task_id, record in records.items():
+            task = record['task'] if record['op'] == 'put' else None
+            # A task added and deleted again within one batch never existed for clients
+            if task is not None or originals[task_id] is not None:
+                changes.append((self._change_kind(task, originals[task_id]), task_id, task))
+        with self._state_lock.write():
+            self.store_version += 1
+            self.last_modified = datetime.now(timezone.utc)
+            self.changes.append(self.store_version, changes)
+        if self.version_stamp is not None:
+            self.version_stamp.write(self.store_version)
+        self._notify_changed()
+        if self.history is not None:
+            try:
+                self._record_history(entries)
+            except Exception as e:
+                self._stop_history(e)
+
+    def _record_history(self, entries: List[Tuple[Dict, Optional[Task]]]):
+        """Log every committed change to the history, snapshotting when one is due.
+
+        Unlike storage, history keeps each change of a batch, not only the
+        last one per task.
+        """
+        started = time.perf_counter()
+        now = self._get_timestamp()
+        self.history.append(now, self._to_dict_records([record for record, _ in entries]))
+        if self.history.needs_snapshot():
+            self.history.snapshot(self._snapshot(), now)
+        STORE_SECONDS.labels('history').observe(time.perf_counter() - started)
+
+    def _stop_history(self, error: Exception):
+        """Stop recording history after a failed write.
+
+        The change is already committed, so the failure is logged and kept in
+        ``history_error`` rather than raised. Recording stops so the history
+        never silently skips a change; it resumes when the store is reopened.
+        """
+        HISTORY_ERRORS.inc()
+        logger.error("Task history stopped recording: %s", error)
+        history, self.history = self.history, None
+        self.history_error = error
+        try:
+            history.close()
+        except Exception:
+            pass
+
+    def _rollback(self, entries: List[Tuple[Dict, Optional[Task]]]):
+        """Restore the in-memory state from before the given changes."""
+        for record, previous in reversed(entries):
+            if previous is not None:
+                self._put(previous)
+            else:
+                self._remove(record['task'].id if record['op'] == 'put' else record['id'])
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into one transaction that is persisted once.
+
+        Changes are applied in memory as they are made and written together
+        when the block exits. If the block raises, every change made inside
+        it is rolled back and the exception propagates. Nested batches join
+        the outermost one. A shared store stays locked for the whole block.
+
+        Readers wait for the whole block, so they never see half a batch;
+        they are released again before the batch is written to storage. The
+        block should therefore only make changes in memory: read files,
+        request bodies and other input before entering it.
+        """
+        with self._writing():
+            if self._pending is not None:
+                yield self
+                return
+
+            self._pending = []
+            next_id = self.next_id
             try:
-                with open(self.file_path, 'r') as file:
-                    return json.load(file)
-            except (json.JSONDecodeError, IOError):
-                return []
-        return []
-
-    def _save_tasks(self):
-        """Save tasks to JSON file."""
+                with self._state_lock.write():
+                    yield self
+            except BaseException:
+                entries, self._pending = self._pending, None
+                with self._state_lock.write():
+                    self._rollback(entries)
+                self.next_id = next_id
+                raise
+            entries, self._pending = self._pending, None
+            if entries:
+                try:
+                    self._commit(entries)
+                except Exception:
+                    self.next_id = next_id
+                    raise
+
+    def compact(self):
+        """Fold the mutation log into the snapshot when using the log backend."""
+        if hasattr(self.storage, 'compact'):
+            with self._writing():
+                self.flush()
+                started = time.perf_counter()
+                self.storage.compact(self._snapshot)
+                STORE_SECONDS.labels('compact').observe(time.perf_counter() - started)
+
+    def _backups(self, directory: Optional[str] = None) -> TaskBackups:
+        """Return the backups in ``directory``, by default ``<store file>.backups``."""
+        return TaskBackups(directory or self.file_path + '.backups')
+
+    def backup(self, full: bool = False, directory: Optional[str] = None) -> Dict:
+        """Take a point-in-time backup while reads and writes go on, and return its manifest entry.
+
+        The first backup, and every backup with ``full``, holds all tasks;
+        the others only hold the changes since the previous backup. Writers
+        only wait while the ``id -> task`` index is copied, which copies
+        references since task records are never modified; the backup is
+        written from that copy with no lock held. Changes since the previous
+        backup come from the change feed when it still covers that backup's
+        version, and from comparing with the previous backup otherwise.
+        """
+        backups = self._backups(directory)
+        with backups.writing():
+            latest = None if full else backups.latest()
+            changed_ids = None
+            with self._writing(), self._state_lock.read():
+                started = time.perf_counter()
+                tasks = dict(self.tasks)
+                version = f"{self.store_token}-{self.store_version}"
+                if latest is not None:
+                    token, _, seq = latest['version'].rpartition('-')
+                    if token == self.store_token and seq.isdigit() and int(seq) <= self.store_version:
+                        entries = self.changes.since(int(seq))
+                        if entries is not None:
+                            changed_ids = sorted(task_id for _, _, task_id, _ in entries)
+                copied = time.perf_counter()
+
+            if latest is None:
+                kind, changed_ids = 'full', sorted(tasks)
+            else:
+                kind = 'incremental'
+                if changed_ids is None:
+                    previous = {task['id']: task for task in backups.load(latest['id'])}
+                    changed_ids = sorted(task_id for task_id in previous.keys() | tasks.keys()
+                                         if task_id not in tasks or previous.get(task_id) != tasks[task_id].to_dict())
+            records = ({'op': 'put', 'task': tasks[task_id].to_dict()} if task_id in tasks
+                       else {'op': 'delete', 'id': task_id} for task_id in changed_ids)
+            entry = backups.write(kind, records, len(tasks), format_timestamp(self._get_timestamp()), version)
+        STORE_SECONDS.labels('backup_copy').observe(copied - started)
+        STORE_SECONDS.labels('backup').observe(time.perf_counter() - started)
+        return entry
+
+    @mutation
+    def restore_backup(self, backup_id: Optional[int] = None, directory: Optional[str] = None) -> Dict:
+        """Restore the tasks of a backup, the newest one by default, and return a summary.
+
+        The backup chain is verified before anything changes. Tasks that
+        differ from the backup are then added, replaced or deleted in one
+        batch, so readers never see a half-restored list and the restore
+        reaches the change feed and the history like any other change.
+        Tasks are put back prerequisites first, so no dependency cycle forms
+        on the way. Finally the store is read back and compared with the backup.
+        """
+        started = time.perf_counter()
+        backups = self._backups(directory)
+        entry = backups.get(backup_id)
         try:
-            with open(self.file_path, 'w') as file:
-                json.dump(self.tasks, file, indent=2)
-        except IOError as e:
-            raise Exception(f"Failed to save tasks: {e}")
+            restored = {task['id']: Task.from_dict(task) for task in backups.load(entry['id'])}
+            order = [task_id for task_id in topological_order({task.id: task.blocked_by for task in restored.values()})
+                     if task_id in restored]
+        except (KeyError, TypeError, ValueError) as e:
+            raise Exception(f"Backup {entry['id']} failed verification: {e}")
+        summary = {'restored': entry['id'], 'tasks': len(restored), 'added': 0, 'updated': 0, 'deleted': 0}
+        with self.batch():
+            for task_id in [task_id for task_id in self.tasks if task_id not in restored]:
+                self._change({'op': 'delete', 'id': task_id})
+                summary['deleted'] += 1
+            for task in map(restored.get, order):
+                current = self.tasks.get(task.id)
+                if current is None:
+                    summary['added'] += 1
+                elif current.to_dict() != task.to_dict():
+                    summary['updated'] += 1
+                else:
+                    continue
+                self._change({'op': 'put', 'task': task})
+            self.next_id = max(self.next_id, max(restored, default=0) + 1)
+
+        self.flush()
+        stored = {task['id']: task for task in self.storage.load()}
+        if stored != {task_id: task.to_dict() for task_id, task in restored.items()}:
+            raise Exception(f"Failed to verify restored tasks: the store does not match backup {entry['id']}")
+        STORE_SECONDS.labels('restore').observe(time.perf_counter() - started)
+        return summary
+
+    def list_backups(self, directory: Optional[str] = None) -> List[Dict]:
+        """Return the manifest entries of the store's backups, oldest first."""
+        return self._backups(directory).list()
+
+    def verify_backup(self, backup_id: Optional[int] = None, directory: Optional[str] = None) -> Dict:
+        """Check every backup file and rebuild one backup, the newest by default."""
+        return self._backups(directory).verify(backup_id)
+
+    def flush(self):
+        """Write changes queued by write-behind persistence to storage now."""
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
+    def close(self):
+        """Write out queued changes and release the storage backend."""
+        if self.write_behind is not None:
+            self.write_behind.close()
+        if self.storage.durability != 'buffered':
+            self.storage.sync()
+        self.storage.close()
+        if self.history is not None:
+            self.history.close()
 
     def _get_next_id(self) -> int:
         """Get the next available task ID."""
         if not self.tasks:
             return 1
-        return max(task['id'] for task in self.tasks) + 1
+        return max(self.tasks) + 1
 
-    def _get_timestamp(self) -> str:
-        """Get current timestamp in ISO format."""
-        return datetime.now().isoformat()
+    def _get_timestamp(self) -> int:
+        """Get current timestamp in microseconds since the epoch."""
+        return to_micros(datetime.now())
 
-    def add_task(self, description: str) -> int:
-        """Add a new task and return its ID."""
+    @staticmethod
+    def _check_tags(tags: List[str]) -> Tuple[str, ...]:
+        """Validate tags and return them lowercased, sorted and without duplicates."""
+        if not isinstance(tags, (list, tuple)):
+            raise ValueError("Tags must be a list of strings")
+        normalized = set()
+        for tag in tags:
+            if not isinstance(tag, str) or not TAG_PATTERN.match(tag.strip().lower()):
+                raise ValueError(f"Invalid tag: {tag!r}. Tags are up to 50 letters, digits and _.:/- "
+                                 "characters, starting with a letter or digit")
+            normalized.add(sys.intern(tag.strip().lower()))
+        if len(normalized) > MAX_TAGS:
+            raise ValueError(f"A task cannot have more than {MAX_TAGS} tags")
+        return tuple(sorted(normalized))
+
+    @mutation
+    def add_task(self, description: str, tags: Optional[List[str]] = None) -> int:
+        """Add a new task, optionally with tags, and return its ID."""
         if not description.strip():
             raise ValueError("Task description cannot be empty")
+        tags = self._check_tags(tags or [])
         
-        task = {
-            'id': self.next_id,
-            'description': description.strip(),
-            'status': 'todo',
-            'createdAt': self._get_timestamp(),
-            'updatedAt': self._get_timestamp()
-        }
+        timestamp = self._get_timestamp()
+        task = Task(self.next_id, description.strip(), 'todo', timestamp, timestamp, tags=tags)
         
-        self.tasks.append(task)
-        self._save_tasks()
+        self._change({'op': 'put', 'task': task})
         self.next_id += 1
-        return task['id']
+        return task.id
 
+    @mutation
     def update_task(self, task_id: int, description: str) -> bool:
         """Update task description and return success status."""
         if not description.strip():
             raise ValueError("Task description cannot be empty")
         
-        for task in self.tasks:
-            if task['id'] == task_id:
-                task['description'] = description.strip()
-                task['updatedAt'] = self._get_timestamp()
-                self._save_tasks()
-                return True
-        return False
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        task = task.replace(description=description.strip(), updated_at=self._get_timestamp())
+        self._change({'op': 'put', 'task': task})
+        return True
 
+    @mutation
     def delete_task(self, task_id: int) -> bool:
-        """Delete a task and return success status."""
-        for i, task in enumerate(self.tasks):
-            if task['id'] == task_id:
-                del self.tasks[i]
-                self._save_tasks()
-                return True
-        return False
+        """Delete a task and return success status.
 
+        Tasks waiting for the deleted one stop depending on it, in the same
+        transaction.
+        """
+        if task_id not in self.tasks:
+            return False
+        dependents = sorted(self.graph.dependents.get(task_id, ()))
+        if not dependents:
+            self._change({'op': 'delete', 'id': task_id})
+            return True
+        timestamp = self._get_timestamp()
+        with self.batch():
+            for dependent_id in dependents:
+                dependent = self.tasks.get(dependent_id)
+                if dependent is not None:
+                    blocked_by = tuple(blocker for blocker in dependent.blocked_by if blocker != task_id)
+                    self._change({'op': 'put', 'task': dependent.replace(blocked_by=blocked_by,
+                                                                         updated_at=timestamp)})
+            self._change({'op': 'delete', 'id': task_id})
+        return True
+
+    @mutation
     def mark_task_status(self, task_id: int, status: str) -> bool:
         """Mark task as todo, in-progress, or done and return success status."""
-        valid_statuses = ['todo', 'in-progress', 'done']
-        if status not in valid_statuses:
-            raise ValueError(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
+        if status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
         
-        for task in self.tasks:
-            if task['id'] == task_id:
-                task['status'] = status
-                task['updatedAt'] = self._get_timestamp()
-                self._save_tasks()
-                return True
-        return False
-
-    def list_tasks(self, status_filter: Optional[str] = None) -> List[Dict]:
-        """List all tasks or filter by status."""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        task = task.replace(status=status, updated_at=self._get_timestamp())
+        self._change({'op': 'put', 'task': task})
+        return True
+
+    @mutation
+    def import_task(self, record: Dict) -> Optional[int]:
+        """Add a complete task record, keeping its ID and timestamps when given.
+
+        Returns the task ID, or ``None`` if a task with that ID already
+        exists. Raises ``ValueError`` for malformed records. ``blockedBy``
+        may name tasks that are imported later, but not create a cycle;
+        ``tags`` are checked like those of new tasks.
+        """
+        if not isinstance(record, dict):
+            raise ValueError("Task record must be an object")
+        description = record.get('description')
+        if not isinstance(description, str) or not description.strip():
+            raise ValueError("Task description cannot be empty")
+        status = record.get('status', 'todo')
+        if status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
+        task_id = record.get('id')
+        if task_id is not None and (not isinstance(task_id, int) or isinstance(task_id, bool) or task_id < 1):
+            raise ValueError("Task id must be a positive integer")
+        timestamps = {}
+        for field in TIMESTAMP_FIELDS:
+            value = record.get(field)
+            if value is None:
+                value = self._get_timestamp()
+            else:
+                try:
+                    value = parse_timestamp(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid {field} timestamp")
+            timestamps[field] = value
+
+        if task_id is None:
+            task_id = self.next_id
+        elif task_id in self.tasks:
+            return None
+        tags = self._check_tags(record.get('tags') or [])
+        blocked_by = self._check_dependencies(task_id, record.get('blockedBy') or [], require_existing=False)
+        task = Task(task_id, description.strip(), status, timestamps['createdAt'], timestamps['updatedAt'],
+                    blocked_by, tags)
+        self._change({'op': 'put', 'task': task})
+        self.next_id = max(self.next_id, task_id + 1)
+        return task_id
+
+    def _check_dependencies(self, task_id: int, blocker_ids: List[int], require_existing: bool = True) -> tuple:
+        """Validate the IDs of the tasks ``task_id`` should wait for and return them as ``blocked_by``.
+
+        Raises ``ValueError`` for malformed or unknown IDs and for
+        dependencies that would close a cycle; only the prerequisites
+        reachable from the new ones are searched for the cycle.
+        """
+        if not isinstance(blocker_ids, list):
+            raise ValueError("blockedBy must be a list of task IDs")
+        blocked_by = set()
+        for blocker_id in blocker_ids:
+            if not isinstance(blocker_id, int) or isinstance(blocker_id, bool) or blocker_id < 1:
+                raise ValueError("Task id must be a positive integer")
+            if blocker_id == task_id:
+                raise ValueError("A task cannot depend on itself")
+            if require_existing and blocker_id not in self.tasks:
+                raise ValueError(f"Task {blocker_id} not found")
+            if blocker_id not in self.graph.prerequisites.get(task_id, ()):
+                cycle = self.graph.find_path(blocker_id, task_id)
+                if cycle:
+                    path = ' -> '.join(map(str, cycle))
+                    raise ValueError(f"Task {blocker_id} already depends on task {task_id} ({path})")
+            blocked_by.add(blocker_id)
+        return tuple(sorted(blocked_by))
+
+    @mutation
+    def set_dependencies(self, task_id: int, blocker_ids: List[int]) -> bool:
+        """Make a task wait for exactly the given tasks and return success status.
+
+        Raises ``ValueError`` for unknown tasks and for dependencies that
+        would create a cycle.
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        blocked_by = self._check_dependencies(task_id, blocker_ids)
+        if blocked_by != task.blocked_by:
+            task = task.replace(blocked_by=blocked_by, updated_at=self._get_timestamp())
+            self._change({'op': 'put', 'task': task})
+        return True
+
+    @mutation
+    def add_dependency(self, task_id: int, blocker_id: int) -> bool:
+        """Make a task wait for another one and return success status."""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        return self.set_dependencies(task_id, [*task.blocked_by, blocker_id])
+
+    @mutation
+    def set_tags(self, task_id: int, tags: List[str]) -> bool:
+        """Replace a task's tags and return success status."""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        tags = self._check_tags(tags)
+        if tags != task.tags:
+            task = task.replace(tags=tags, updated_at=self._get_timestamp())
+            self._change({'op': 'put', 'task': task})
+        return True
+
+    @mutation
+    def add_tags(self, task_id: int, tags: List[str]) -> bool:
+        """Add tags to a task and return success status."""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        return self.set_tags(task_id, [*task.tags, *self._check_tags(tags)])
+
+    @mutation
+    def remove_tags(self, task_id: int, tags: List[str]) -> bool:
+        """Remove tags from a task and return success status; tags it lacks are ignored."""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        removed = self._check_tags(tags)
+        return self.set_tags(task_id, [tag for tag in task.tags if tag not in removed])
+
+    @mutation
+    def remove_dependency(self, task_id: int, blocker_id: int) -> bool:
+        """Stop a task waiting for another one; returns False if it did not."""
+        task = self.tasks.get(task_id)
+        if task is None or blocker_id not in task.blocked_by:
+            return False
+        return self.set_dependencies(task_id, [blocker for blocker in task.blocked_by if blocker != blocker_id])
+
+    def tasks_as_of(self, as_of: str, status_filter: Optional[str] = None) -> List[Dict]:
+        """Return the tasks as they were at the ISO 8601 time ``as_of``, in ID order.
+
+        A date alone stands for its midnight. The list is rebuilt from the
+        task history, which has to be enabled; times before it started
+        recording raise ``ValueError``.
+        """
+        history = self.history
+        if history is None:
+            if self.history_error is not None:
+                raise Exception(f"Task history stopped recording: {self.history_error}")
+            raise ValueError("Task history is not enabled")
+        if status_filter and status_filter not in VALID_STATUSES:
+            raise ValueError(f"Invalid status filter. Must be one of: {', '.join(VALID_STATUSES)}")
+        try:
+            at = parse_timestamp(as_of)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid as_of timestamp")
+        tasks = history.tasks_at(at)
+        if status_filter:
+            tasks = [task for task in tasks if task['status'] == status_filter]
+        return tasks
+
+    def iter_tasks(self, chunk_size: int = 1000) -> Iterator[Dict]:
+        """Iterate over all tasks in ID order, one chunk at a time.
+
+        Each chunk is read under the read lock, which is released while the
+        caller consumes it, so long exports never hold up writers.
+        """
+        cursor = None
+        while True:
+            tasks, cursor = self.page_tasks(limit=chunk_size, cursor=cursor)
+            yield from tasks
+            if cursor is None:
+                return
+
+    def reading(self):
+        """Hold the in-memory state for reading across several calls.
+
+        Use it to answer a request from one consistent version of the store,
+        e.g. ``with task_manager.reading(): ...``.
+        """
+        return self._state_lock.read()
+
+    @reader
+    def version_info(self) -> Tuple[str, datetime]:
+        """Return a tag for the current store version and when it was committed.
+
+        The tag changes with every committed change, so it can serve as an
+        HTTP ETag for anything derived from the task list.
+        """
+        return f"{self.store_token}-{self.store_version}", self.last_modified
+
+    @reader
+    def changes_since(self, since: Optional[str]) -> Dict:
+        """Return the changes made after the store version tagged ``since``.
+
+        ``since`` is a tag from ``version_info()``, such as a listing's ETag
+        or the ``version`` of an earlier call. The result holds the current
+        ``version`` and the latest change of every task changed since, as
+        ``{"seq", "type", "id", "task"}`` objects in commit order; deletes
+        carry no task. ``reset`` is set, with no changes, when the tag is
+        unknown or too old for the feed; the client then has to download
+        the full task list again.
+        """
+        version = f"{self.store_token}-{self.store_version}"
+        token, _, seq = (since or '').rpartition('-')
+        entries = None
+        if token == self.store_token and seq.isdigit() and int(seq) <= self.store_version:
+            entries = self.changes.since(int(seq))
+        if entries is None:
+            return {'version': version, 'reset': True, 'changes': []}
+
+        changes = []
+        for seq, kind, task_id, task in entries:
+            change = {'seq': seq, 'type': kind, 'id': task_id}
+            if task is not None:
+                change['task'] = task.to_dict()
+            changes.append(change)
+        return {'version': version, 'reset': False, 'changes': changes}
+
+    def wait_for_change(self, since: str, timeout: Optional[float] = None) -> bool:
+        """Block until the store version differs from ``since`` or the timeout expires.
+
+        Returns whether the version changed. Changes made by other processes
+        sharing the store are only seen after ``refresh()``.
+        """
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: f"{self.store_token}-{self.store_version}" != since, timeout)
+
+    @reader
+    def list_tasks(self, status_filter: Optional[str] = None, created_after: Optional[str] = None,
+                   created_before: Optional[str] = None, updated_since: Optional[str] = None,
+                   tags: Optional[List[str]] = None, filter_expression: Optional[str] = None) -> List[Dict]:
+        """List all tasks or filter by status, tags and creation or update time.
+
+        Filtered listings only touch the IDs in that status and are ordered by
+        ID. Time filters take ISO 8601 timestamps; ``tags`` and
+        ``filter_expression`` select tasks as in ``page_tasks()``.
+        """
+        if status_filter and status_filter not in VALID_STATUSES:
+            raise ValueError(f"Invalid status filter. Must be one of: {', '.join(VALID_STATUSES)}")
+        ranges = self._time_ranges(created_after, created_before, updated_since)
+        selected = self._select(status_filter, tags, filter_expression)
+        if ranges:
+            statuses = [status_filter] if status_filter else VALID_STATUSES
+            return [self.tasks[task_id].to_dict()
+                    for task_id in self._iter_sort_keys(statuses, 'id', False, None, ranges, selected)]
+        if selected is not None:
+            return [self.tasks[task_id].to_dict() for task_id in selected]
+        if status_filter:
+            return [self.tasks[task_id].to_dict() for task_id in self.status_index[status_filter]]
+        return [task.to_dict() for task in self.tasks.values()]
+
+    @reader
+    def count_tasks(self) -> Dict[str, int]:
+        """Return the number of tasks per status plus the total."""
+        counts = {status: len(self.status_index[status]) for status in VALID_STATUSES}
+        counts['total'] = len(self.tasks)
+        return counts
+
+    @reader
+    def list_tags(self) -> Dict[str, int]:
+        """Return the number of tasks carrying each tag, by tag name."""
+        return {tag: len(self.tag_index[tag]) for tag in sorted(self.tag_index)}
+
+    @reader
+    def count_matching(self, status_filter: Optional[str] = None, tags: Optional[List[str]] = None,
+                       filter_expression: Optional[str] = None) -> int:
+        """Count the tasks matching status, tag and filter criteria without touching any task."""
+        if status_filter and status_filter not in VALID_STATUSES:
+            raise ValueError(f"Invalid status filter. Must be one of: {', '.join(VALID_STATUSES)}")
+        selected = self._select(status_filter, tags, filter_expression)
+        if selected is not None:
+            return len(selected)
+        return len(self.status_index[status_filter]) if status_filter else len(self.tasks)
+
+    def _select(self, status_filter: Optional[str], tags: Optional[List[str]],
+                filter_expression: Optional[str]) -> Optional[BitmapIndex]:
+        """Return the bitmap of the tasks matching tag and filter criteria, or ``None`` without any.
+
+        The status filter, every tag and the filter expression are
+        intersected smallest first, so the cost depends on the number of
+        bitmap chunks involved, not on the number of tasks checked.
+        """
+        if not tags and not filter_expression:
+            return None
+        bitmaps = [self.status_index[status_filter]] if status_filter else []
+        bitmaps.extend(self.tag_index.get(tag, BitmapIndex()) for tag in self._check_tags(tags or []))
+        if filter_expression:
+            bitmaps.append(evaluate_filter(parse_filter(filter_expression), self._filter_term, self._all_ids))
+        bitmaps.sort(key=len)
+        selected = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            selected = selected & bitmap
+        return selected
+
+    def _filter_term(self, field: str, value: str) -> BitmapIndex:
+        """Return the bitmap of one ``status=...`` or ``tag=...`` filter term."""
+        if field == 'status':
+            if value not in VALID_STATUSES:
+                raise ValueError(f"Invalid status filter. Must be one of: {', '.join(VALID_STATUSES)}")
+            return self.status_index[value]
+        return self.tag_index.get(self._check_tags([value])[0], BitmapIndex())
+
+    def _all_ids(self) -> BitmapIndex:
+        """Return the bitmap of every task ID."""
+        ids = BitmapIndex()
+        for bitmap in self.status_index.values():
+            ids = ids | bitmap
+        return ids
+
+    @reader
+    def stats(self, days: int = 30) -> Dict:
+        """Return task aggregates without touching the task list.
+
+        Holds the per-status ``counts``, the number of tasks created and
+        completed on each of the last ``days`` days, and ``open_age``, the
+        number of open tasks by age bucket.
+        """
+        if days < 1:
+            raise ValueError("Days must be a positive integer")
+        report = self.aggregates.report(self._get_timestamp(), days)
+        report['counts'] = self.count_tasks()
+        return report
+
+    @reader
+    def page_tasks(self, status_filter: Optional[str] = None, sort: str = 'id',
+                   descending: bool = False, limit: int = 50, cursor: Optional[str] = None,
+                   created_after: Optional[str] = None, created_before: Optional[str] = None,
+                   updated_since: Optional[str] = None, tags: Optional[List[str]] = None,
+                   filter_expression: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Return one page of tasks and the cursor for the next page.
+
+        Tasks are ordered by ``sort`` with ties broken by ID, so the order is
+        stable across pages. The cursor encodes the sort key of the last task
+        on the page; the next page starts right after it, which keeps each
+        page cheap no matter how many tasks come before it.
+
+        ``created_after``, ``created_before`` and ``updated_since`` are ISO
+        8601 timestamps restricting the tasks to a time window. They are
+        answered from the sorted ``createdAt``/``updatedAt`` indexes, so a
+        window costs O(log n + k) for the k tasks inside it rather than a
+        scan of every task.
+
+        ``tags`` keeps the tasks carrying every one of the given tags, and
+        ``filter_expression`` is a boolean filter such as
+        ``status=todo AND tag=backend AND NOT tag=blocked`` (see
+        ``task_filter.parse_filter()``). Both are evaluated on the status
+        and tag bitmaps, and combine with each other and with the filters
+        above.
+        """
+        if status_filter and status_filter not in VALID_STATUSES:
+            raise ValueError(f"Invalid status filter. Must be one of: {', '.join(VALID_STATUSES)}")
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Invalid sort field. Must be one of: {', '.join(SORT_FIELDS)}")
+        if limit < 1:
+            raise ValueError("Limit must be a positive integer")
+        ranges = self._time_ranges(created_after, created_before, updated_since)
+        selected = self._select(status_filter, tags, filter_expression)
+
+        # Cursors are tied to the filters of the listing they came from
+        filters = [status_filter, created_after, created_before, updated_since] if ranges else status_filter
+        if selected is not None:
+            filters = [filters, sorted(tags or []), filter_expression]
+        after = self._decode_cursor(cursor, sort, descending, filters) if cursor else None
+        statuses = [status_filter] if status_filter else VALID_STATUSES
+        keys = list(islice(self._iter_sort_keys(statuses, sort, descending, after, ranges, selected), limit + 1))
+
+        next_cursor = None
+        if len(keys) > limit:
+            keys = keys[:limit]
+            next_cursor = self._encode_cursor(keys[-1], sort, descending, filters)
+        return [self.tasks[self._key_task_id(key, sort)].to_dict() for key in keys], next_cursor
+
+    @staticmethod
+    def _time_ranges(created_after: Optional[str], created_before: Optional[str],
+                     updated_since: Optional[str]) -> Dict[str, Tuple]:
+        """Turn time filters into ``field -> (low, high)`` bounds on the sort index keys.
+
+        Keys are ``(timestamp, id)`` tuples, so ``(t,)`` sorts before every
+        key at time ``t`` and ``(t, inf)`` after all of them. A key is in
+        range when ``low <= key < high``; ``None`` leaves that side open.
+        """
+        timestamps = {}
+        for name, value in (('created_after', created_after), ('created_before', created_before),
+                            ('updated_since', updated_since)):
+            if value is not None:
+                try:
+                    timestamps[name] = parse_timestamp(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid {name} timestamp")
+
+        ranges = {}
+        if 'created_after' in timestamps or 'created_before' in timestamps:
+            low = (timestamps['created_after'], float('inf')) if 'created_after' in timestamps else None
+            high = (timestamps['created_before'],) if 'created_before' in timestamps else None
+            ranges['createdAt'] = (low, high)
+        if 'updated_since' in timestamps:
+            ranges['updatedAt'] = ((timestamps['updated_since'],), None)
+        return ranges
+
+    @staticmethod
+    def _iter_range(index: SortedIndex, low, high, descending: bool = False, after=None):
+        """Iterate the keys of ``index`` with ``low <= key < high``, starting after ``after``.
+
+        Finding the first key is a binary search, and iteration stops at the
+        first key outside the range, so this costs O(log n + k).
+        """
+        if not descending:
+            if after is not None and (low is None or after >= low):
+                keys = index.iter_after(after)
+            else:
+                keys = index.iter_after(low, inclusive=True)
+            return keys if high is None else takewhile(lambda key: key < high, keys)
+        if after is not None and (high is None or after < high):
+            keys = index.iter_after(after, reverse=True)
+        else:
+            keys = index.iter_after(high, reverse=True)
+        return keys if low is None else takewhile(lambda key: key >= low, keys)
+
+    def _in_ranges(self, task: Task, ranges: Dict[str, Tuple]) -> bool:
+        """Check a task against time ranges on any of its timestamp fields."""
+        for field, (low, high) in ranges.items():
+            key = (getattr(task, TIMESTAMP_ATTRIBUTES[field]), task.id)
+            if (low is not None and key < low) or (high is not None and key >= high):
+                return False
+        return True
+
+    def _sort_key(self, task: Task, sort: str):
+        """Return the key of a task in the given sort order."""
+        if sort == 'id':
+            return task.id
+        if sort == 'status':
+            return VALID_STATUSES.index(task.status), task.id
+        return getattr(task, TIMESTAMP_ATTRIBUTES[sort]), task.id
+
+    def _iter_window_keys(self, statuses: List[str], sort: str, descending: bool, after,
+                          ranges: Dict[str, Tuple]):
+        """Iterate sort keys of the tasks inside time ranges, starting after a key.
+
+        When sorting by a filtered field, its index is walked in order within
+        the range. Otherwise the tasks in the range of one filtered field are
+        collected from its index and sorted, costing O(log n + k log k).
+        Ranges on the other field are checked per task.
+        """
+        if sort in ranges:
+            low, high = ranges[sort]
+            others = {field: bounds for field, bounds in ranges.items() if field != sort}
+            iterators = [self._iter_range(self.sort_index[sort][status], low, high, descending, after)
+                         for status in statuses]
+            keys = iterators[0] if len(iterators) == 1 else heapq.merge(*iterators, reverse=descending)
+            if not others:
+                return keys
+            return (key for key in keys if self._in_ranges(self.tasks[key[1]], others))
+
+        # updated_since usually selects a short recent window, so it drives the lookup
+        field = 'updatedAt' if 'updatedAt' in ranges else 'createdAt'
+        low, high = ranges[field]
+        keys = []
+        for status in statuses:
+            for _, task_id in self._iter_range(self.sort_index[field][status], low, high):
+                task = self.tasks[task_id]
+                if self._in_ranges(task, ranges):
+                    keys.append(self._sort_key(task, sort))
+        keys.sort(reverse=descending)
+        if after is not None:
+            keys = [key for key in keys if (key < after if descending else key > after)]
+        return iter(keys)
+
+    def _iter_sort_keys(self, statuses: List[str], sort: str, descending: bool, after,
+                        ranges: Optional[Dict[str, Tuple]] = None, selected: Optional[BitmapIndex] = None):
+        """Iterate sort keys across the given statuses, starting after a key.
+
+        With a ``selected`` bitmap only those tasks are listed. By ID the
+        bitmap is walked itself and by status its intersection with each
+        status. Other orders pick the selected tasks out of the usual walk,
+        unless so few are selected that sorting them is cheaper.
+        """
+        if selected is not None and sort != 'status' and (
+                (sort == 'id' and not ranges) or len(selected) ** 2 < SELECTIVE_PAGE * len(self.tasks)):
+            return self._iter_selected_keys(selected, sort, descending, after, ranges)
+        if ranges:
+            keys = self._iter_window_keys(statuses, sort, descending, after, ranges)
+            if selected is None:
+                return keys
+            return (key for key in keys if self._key_task_id(key, sort) in selected)
+        if selected is not None and sort != 'status':
+            keys = self._iter_sort_keys(statuses, sort, descending, after)
+            return (key for key in keys if key[1] in selected)
+        if sort == 'status':
+            # Keys are (status rank, id); statuses are walked in rank order
+            ranks = [VALID_STATUSES.index(status) for status in statuses]
+            if descending:
+                ranks.reverse()
+            iterators = []
+            for rank in ranks:
+                if after is not None and (rank > after[0] if descending else rank < after[0]):
+                    continue
+                start = after[1] if after is not None and rank == after[0] else None
+                index = self.status_index[VALID_STATUSES[rank]]
+                if selected is not None:
+                    index = index & selected
+                task_ids = index.iter_after(start, descending)
+                iterators.append(zip(repeat(rank), task_ids))
+            return chain.from_iterable(iterators)
+
+        if sort == 'id':
+            indexes = [self.status_index[status] for status in statuses]
+        else:
+            indexes = [self.sort_index[sort][status] for status in statuses]
+        iterators = [index.iter_after(after, descending) for index in indexes]
+        if len(iterators) == 1:
+            return iterators[0]
+        return heapq.merge(*iterators, reverse=descending)
+
+    def _iter_selected_keys(self, selected: BitmapIndex, sort: str, descending: bool, after,
+                            ranges: Optional[Dict[str, Tuple]] = None):
+        """Iterate sort keys of selected tasks by sorting them, starting after a key.
+
+        Listings by ID without time ranges walk the bitmap in order instead.
+        """
+        if sort == 'id' and not ranges:
+            return selected.iter_after(after, descending)
+        keys = [self._sort_key(task, sort) for task in map(self.tasks.__getitem__, selected)
+                if not ranges or self._in_ranges(task, ranges)]
+        keys.sort(reverse=descending)
+        if after is not None:
+            keys = [key for key in keys if (key < after if descending else key > after)]
+        return iter(keys)
+
+    @staticmethod
+    def _key_task_id(key, sort: str) -> int:
+        """Extract the task ID from a sort key."""
+        return key if sort == 'id' else key[1]
+
+    @staticmethod
+    def _encode_cursor(key, sort: str, descending: bool, filters) -> str:
+        """Encode the position after ``key`` as an opaque cursor string."""
+        payload = json.dumps([sort, descending, filters, key], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str, descending: bool, filters):
+        """Decode a cursor and check that it belongs to the same listing."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            cursor_sort, cursor_descending, cursor_filters, key = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+        if (cursor_sort, cursor_descending, cursor_filters) != (sort, descending, filters):
+            raise ValueError("Cursor does not match the requested sort and filter")
+        return key if sort == 'id' else tuple(key)
+
+    @reader
+    def search_tasks(self, query: str, status_filter: Optional[str] = None,
+                     limit: int = 20) -> List[Dict]:
+        """Search task descriptions and return the best matches first.
+
+        Words match whole tokens, ``word*`` matches a prefix and
+        ``"quoted words"`` matches a phrase; every part must match.
+        """
+        if status_filter and status_filter not in VALID_STATUSES:
+            raise ValueError(f"Invalid status filter. Must be one of: {', '.join(VALID_STATUSES)}")
+        if limit < 1:
+            raise ValueError("Limit must be a positive integer")
+
+        accept = None
         if status_filter:
-            valid_statuses = ['todo', 'in-progress', 'done']
-            if status_filter not in valid_statuses:
-                raise ValueError(f"Invalid status filter. Must be one of: {', '.join(valid_statuses)}")
-            return [task for task in self.tasks if task['status'] == status_filter]
-        return self.tasks
+            accept = lambda task_id: self.tasks[task_id].status == status_filter
+        results = self.search_index.search(query, accept, limit)
+        return [self.tasks[task_id].to_dict() for task_id, _ in results]
 
+    @reader
     def get_task(self, task_id: int) -> Optional[Dict]:
         """Get a specific task by ID."""
-        for task in self.tasks:
-            if task['id'] == task_id:
-                return task
-        return None 
\ No newline at end of file
+        task = self.tasks.get(task_id)
+        return task.to_dict() if task is not None else None
+
+    @reader
+    def get_dependencies(self, task_id: int) -> Optional[Dict]:
+        """Describe a task's place in the dependency graph, or return ``None`` if it does not exist.
+
+        Returns the IDs of the tasks it waits for (``blockedBy``), of those
+        still open (``openBlockers``), of the tasks waiting for it
+        (``blocking``), of the tasks that finishing it would unblock
+        (``unblocks``) and of the longest chain of open tasks ending at it
+        (``criticalPath``), plus whether it is ``blocked``.
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        graph = self.graph
+        return {
+            'id': task_id,
+            'blocked': task_id in graph.blocked,
+            'blockedBy': list(task.blocked_by),
+            'openBlockers': [blocker for blocker in task.blocked_by if graph.is_open(blocker)],
+            'blocking': sorted(graph.dependents.get(task_id, ())),
+            'unblocks': graph.unblocks(task_id),
+            'criticalPath': graph.critical_path(task_id)
+        }
+
+    @reader
+    def unblocked_tasks(self, limit: Optional[int] = None) -> List[Dict]:
+        """List open tasks whose prerequisites are all finished, in ID order.
+
+        Tasks without dependencies are not included; they were never blocked.
+        """
+        return [self.tasks[task_id].to_dict() for task_id in islice(self.graph.unblocked, limit)]
+
+    @reader
+    def blocked_tasks(self, limit: Optional[int] = None) -> List[Dict]:
+        """List open tasks still waiting for an open prerequisite, in ID order."""
+        return [self.tasks[task_id].to_dict() for task_id in islice(self.graph.blocked, limit)]
+
+    @reader
+    def unblocked_by(self, task_id: int) -> Optional[List[Dict]]:
+        """List the tasks that finishing ``task_id`` would unblock, or ``None`` if it does not exist."""
+        if task_id not in self.tasks:
+            return None
+        return [self.tasks[dependent].to_dict() for dependent in self.graph.unblocks(task_id)]
+
+    @reader
+    def critical_path(self, task_id: Optional[int] = None) -> Optional[List[Dict]]:
+        """Return the longest chain of open dependent tasks, first task first.
+
+        With ``task_id`` the chain ends at that task, which is all that has
+        to be finished before it can be; without, it is the longest chain
+        in the whole graph. Returns ``None`` if ``task_id`` does not exist.
+        """
+        if task_id is not None and task_id not in self.tasks:
+            return None
+        return [self.tasks[step].to_dict() for step in self.graph.critical_path(task_id)]
\ No newline at end of file
@@ -0,0 +1,107 @@
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Mapping, Tuple
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value: datetime) -> int:
+    """Convert a datetime to microseconds since the epoch in local time."""
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - EPOCH) // MICROSECOND
+
+
+def parse_timestamp(value: str) -> int:
+    """Parse an ISO 8601 timestamp into microseconds since the epoch."""
+    return to_micros(datetime.fromisoformat(value))
+
+
+def format_timestamp(micros: int) -> str:
+    """Format microseconds since the epoch as an ISO 8601 timestamp."""
+    return (EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+class Task:
+    """Compact in-memory task record.
+
+    Records use ``__slots__`` instead of a per-instance dictionary, share one
+    interned string per status and keep timestamps as integer microseconds,
+    which makes them several times smaller than the equivalent task dict.
+    ``to_dict`` and ``from_dict`` convert to and from the JSON shape used by
+    storage, the API and the CLI. Records are never modified once stored;
+    ``replace`` returns an updated copy.
+
+    ``blocked_by`` is the sorted tuple of IDs of the tasks this one waits
+    for. It appears as ``blockedBy`` in the dictionary shape, only when it
+    is not empty, so tasks without dependencies keep their old shape.
+    ``tags`` is likewise the sorted tuple of the task's labels, each an
+    interned string shared by every task carrying it.
+    """
+
+    __slots__ = ('id', 'description', 'status', 'created_at', 'updated_at', 'blocked_by', 'tags')
+
+    def __init__(self, task_id: int, description: str, status: str,
+                 created_at: int, updated_at: int, blocked_by: Tuple[int, ...] = (),
+                 tags: Tuple[str, ...] = ()):
+        self.id = task_id
+        self.description = description
+        self.status = sys.intern(status)
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.blocked_by = blocked_by
+        self.tags = tags
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Task':
+        """Build a record from a task dictionary with ISO timestamps."""
+        blocked_by = data.get('blockedBy')
+        tags = data.get('tags')
+        return cls(data['id'], data['description'], data['status'],
+                   parse_timestamp(data['createdAt']), parse_timestamp(data['updatedAt']),
+                   tuple(sorted(set(blocked_by))) if blocked_by else (),
+                   tuple(sorted(set(map(sys.intern, tags)))) if tags else ())
+
+    def to_dict(self) -> Dict:
+        """Return the task in its JSON dictionary shape."""
+        task = {
+            'id': self.id,
+            'description': self.description,
+            'status': self.status,
+            'createdAt': format_timestamp(self.created_at),
+            'updatedAt': format_timestamp(self.updated_at)
+        }
+        if self.blocked_by:
+            task['blockedBy'] = list(self.blocked_by)
+        if self.tags:
+            task['tags'] = list(self.tags)
+        return task
+
+    def replace(self, **changes) -> 'Task':
+        """Return a copy of the record with the given fields changed."""
+        task = Task(self.id, self.description, self.status, self.created_at, self.updated_at, self.blocked_by,
+                    self.tags)
+        for field, value in changes.items():
+            setattr(task, field, sys.intern(value) if field == 'status' else value)
+        return task
+
+    def __repr__(self) -> str:
+        return f"Task({self.id!r}, {self.description!r}, {self.status!r})"
+
+
+class TaskDictView:
+    """Sized view presenting stored records as task dictionaries.
+
+    Storage backends that rewrite the whole store iterate over it, so each
+    dictionary only exists while it is being written.
+    """
+
+    def __init__(self, tasks: Mapping[int, Task]):
+        self.tasks = tasks
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (task.to_dict() for task in self.tasks.values())
@@ -0,0 +1,73 @@
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict
+
+MICROS_PER_DAY = 86_400_000_000
+EPOCH_DATE = date(1970, 1, 1)
+OPEN_STATUSES = ('todo', 'in-progress')
+
+# Open task age buckets as (label, minimum age in days)
+AGE_BUCKETS = [('<1d', 0), ('1-7d', 1), ('7-30d', 7), ('30d+', 30)]
+
+
+def day_of(micros: int) -> int:
+    """Return the day number (days since the epoch) of a timestamp."""
+    return micros // MICROS_PER_DAY
+
+
+class TaskStats:
+    """Task aggregates kept up to date on every change.
+
+    Tasks are counted per day of creation, done tasks per day of their last
+    update (when they were completed, unless edited afterwards) and open
+    tasks per day of creation, from which the age distribution follows.
+    Each change adjusts a few counters, and reports only walk the requested
+    days, so neither depends on the number of tasks.
+    """
+
+    def __init__(self):
+        self.created_per_day = Counter()
+        self.completed_per_day = Counter()
+        self.open_created_per_day = Counter()
+
+    def add(self, task):
+        """Count a task."""
+        created = day_of(task.created_at)
+        self.created_per_day[created] += 1
+        if task.status == 'done':
+            self.completed_per_day[day_of(task.updated_at)] += 1
+        elif task.status in OPEN_STATUSES:
+            self.open_created_per_day[created] += 1
+
+    def remove(self, task):
+        """Stop counting a task."""
+        created = day_of(task.created_at)
+        self._decrement(self.created_per_day, created)
+        if task.status == 'done':
+            self._decrement(self.completed_per_day, day_of(task.updated_at))
+        elif task.status in OPEN_STATUSES:
+            self._decrement(self.open_created_per_day, created)
+
+    @staticmethod
+    def _decrement(counter: Counter, day: int):
+        """Decrement a day's count, dropping days that reach zero."""
+        counter[day] -= 1
+        if not counter[day]:
+            del counter[day]
+
+    def report(self, now: int, days: int = 30) -> Dict:
+        """Return per-day counts for the last ``days`` days and the open task ages."""
+        today = day_of(now)
+        window = range(today - days + 1, today + 1)
+        ages = {label: 0 for label, _ in AGE_BUCKETS}
+        for day, count in self.open_created_per_day.items():
+            age = today - day
+            label = next(label for label, minimum in reversed(AGE_BUCKETS) if age >= minimum or minimum == 0)
+            ages[label] += count
+        return {
+            'created_per_day': {(EPOCH_DATE + timedelta(days=day)).isoformat(): self.created_per_day[day]
+                                for day in window},
+            'completed_per_day': {(EPOCH_DATE + timedelta(days=day)).isoformat(): self.completed_per_day[day]
+                                  for day in window},
+            'open_age': ages
+        }
@@ -0,0 +1,49 @@
+"""
+Delta sync tests for /api/tasks/changes
+Runs the Flask app against a throwaway store.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """A test client of an app whose store lives in a temporary directory."""
+    with tempfile.TemporaryDirectory() as directory:
+        from config import Config
+        from task_manager import TaskManager
+        import app
+        task_manager = TaskManager(os.path.join(directory, 'tasks.json'))
+        monkeypatch.setattr(app, 'default_task_manager', task_manager)
+        monkeypatch.setitem(app.app.config, 'COMPRESS_MIN_BYTES', 1)
+        monkeypatch.setattr(Config, 'WORKSPACES_DIR', os.path.join(directory, 'workspaces'))
+        yield app.app.test_client()
+        task_manager.close()
+
+
+@pytest.mark.parametrize('encoding', ['identity', 'gzip'])
+def test_changes_since_raw_etag_header(client, encoding):
+    """A listing's ETag header passed back verbatim, quotes and all, yields deltas."""
+    client.post('/api/tasks', json={'description': 'First'})
+    listing = client.get('/api/tasks', headers={'Accept-Encoding': encoding})
+    etag = listing.headers['ETag']
+    assert etag.startswith('"')
+    client.post('/api/tasks', json={'description': 'Second'})
+
+    for since in (etag, 'W/' + etag, etag.strip('"')):
+        feed = client.get('/api/tasks/changes', query_string={'since': since}).get_json()
+        assert feed['reset'] is False
+        assert [change['task']['description'] for change in feed['changes']] == ['Second']
+
+
+def test_changes_since_unknown_version_resets(client):
+    """A version the feed does not know asks the client to reload."""
+    feed = client.get('/api/tasks/changes', query_string={'since': '"unknown-1"'}).get_json()
+    assert feed['reset'] is True
+    assert feed['changes'] == []
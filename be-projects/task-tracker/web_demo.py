@@ -2,13 +2,31 @@
 """
 Web Demo Script for Task Tracker
 This script demonstrates the web application functionality via API calls.
+With the ``load`` command it instead load-tests the task API of a running
+app.py and writes a report that benchmarks/compare.py can diff.
 """
 
 import requests
+import argparse
 import json
+import random
+import subprocess
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Load test request kinds: (method, path below /api, label)
+LOAD_ENDPOINTS = {
+    'get': ('GET', '/tasks?limit=50', 'GET /api/tasks?limit=50'),
+    'post': ('POST', '/tasks', 'POST /api/tasks'),
+    'put': ('PUT', '/tasks/{id}', 'PUT /api/tasks/<id>'),
+    'status': ('PUT', '/tasks/{id}/status', 'PUT /api/tasks/<id>/status'),
+    'delete': ('DELETE', '/tasks/{id}', 'DELETE /api/tasks/<id>'),
+}
+DEFAULT_MIX = 'get=60,post=15,put=10,status=10,delete=5'
+
 
 def print_section(title):
     """Print a section header."""
@@ -57,7 +75,7 @@ def print_tasks(tasks):
         print(f"{icon} [{task['id']}] {task['description']} ({task['status']})")
 
 
-def main():
+def run_demo():
     """Run the web demo."""
     print("🌐 Task Tracker Web Application Demo")
     print("This demo will showcase the web application's API features.")
@@ -178,5 +196,278 @@ def main():
     print("Use the web interface to test all features.")
 
 
+def parse_mix(spec):
+    """Parse a ``kind=weight,...`` request mix into a ``{kind: weight}`` dict."""
+    mix = {}
+    for item in spec.split(','):
+        kind, _, weight = item.partition('=')
+        kind = kind.strip()
+        if kind not in LOAD_ENDPOINTS:
+            raise ValueError(f"Invalid request kind '{kind}'. Must be one of: {', '.join(LOAD_ENDPOINTS)}")
+        try:
+            mix[kind] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for '{kind}': {weight!r}")
+        if mix[kind] < 0:
+            raise ValueError(f"Invalid weight for '{kind}': weights cannot be negative")
+    if not sum(mix.values()):
+        raise ValueError("The request mix needs at least one positive weight")
+    return mix
+
+
+def percentile(samples, fraction):
+    """Return the given percentile of a sorted list of samples."""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class LoadTest:
+    """Concurrent request generator for the task API.
+
+    Requests are drawn from a weighted mix of kinds. In closed-loop mode
+    ``concurrency`` workers send requests back to back. In open-loop mode
+    requests arrive at ``rate`` per second (Poisson arrivals) whether or not
+    earlier ones have finished, and run on up to ``concurrency`` threads.
+    Latency is then measured from the scheduled arrival, so time spent
+    queued behind a slow server counts too. Requests started during the
+    warm-up are sent but not recorded.
+    """
+
+    def __init__(self, base_url, mix, seed=42):
+        self.api_url = base_url.rstrip('/') + '/api'
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.rng = random.Random(seed)
+        self.task_ids = []
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def session(self):
+        """Return this thread's HTTP session, so connections are kept alive."""
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def prepare(self, seed_tasks):
+        """Collect the IDs of existing tasks, adding tasks until there are ``seed_tasks``."""
+        response = self.session().get(f"{self.api_url}/tasks")
+        response.raise_for_status()
+        self.task_ids = [task['id'] for task in response.json()]
+        missing = seed_tasks - len(self.task_ids)
+        while missing > 0:
+            count = min(missing, 500)
+            response = self.session().post(f"{self.api_url}/tasks/bulk", json=[
+                {'op': 'add', 'description': f'load test seed task {i}'} for i in range(count)])
+            response.raise_for_status()
+            self.task_ids.extend(result['id'] for result in response.json()['results'])
+            missing -= count
+        return len(self.task_ids)
+
+    def choose_kind(self, rng):
+        """Draw the kind of the next request from the mix."""
+        return rng.choices(self.kinds, self.weights)[0]
+
+    def send(self, kind):
+        """Send one request of the given kind and return whether it succeeded."""
+        method, path, _ = LOAD_ENDPOINTS[kind]
+        body = None
+        with self._lock:
+            if '{id}' in path:
+                if not self.task_ids:
+                    return False
+                index = self.rng.randrange(len(self.task_ids))
+                task_id = self.task_ids[index]
+                if kind == 'delete':
+                    # Never hand out an ID that is about to be deleted
+                    self.task_ids[index] = self.task_ids[-1]
+                    self.task_ids.pop()
+                path = path.format(id=task_id)
+            if kind == 'post' or kind == 'put':
+                body = {'description': f'load test task {self.rng.randrange(1_000_000)}'}
+            elif kind == 'status':
+                body = {'status': self.rng.choice(['todo', 'in-progress', 'done'])}
+        try:
+            response = self.session().request(method, f"{self.api_url}{path}", json=body)
+            # Drain the body so the timing covers the complete response
+            _ = response.content
+        except requests.exceptions.RequestException:
+            return False
+        if kind == 'post' and response.status_code == 201:
+            with self._lock:
+                self.task_ids.append(response.json()['id'])
+        return response.status_code < 400
+
+    def record(self, kind, latency, ok):
+        """Record the outcome of one measured request."""
+        label = LOAD_ENDPOINTS[kind][2]
+        with self._lock:
+            self.samples.setdefault(label, []).append(latency)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+    def run_closed(self, concurrency, warmup, duration):
+        """Run ``concurrency`` workers that each send requests back to back."""
+        started = time.perf_counter()
+        measure_from = started + warmup
+        end = measure_from + duration
+
+        def worker(seed):
+            rng = random.Random(seed)
+            while True:
+                request_start = time.perf_counter()
+                if request_start >= end:
+                    return
+                kind = self.choose_kind(rng)
+                ok = self.send(kind)
+                if request_start >= measure_from:
+                    self.record(kind, time.perf_counter() - request_start, ok)
+
+        threads = [threading.Thread(target=worker, args=(self.rng.random(),)) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_open(self, rate, concurrency, warmup, duration):
+        """Send requests arriving at ``rate`` per second on up to ``concurrency`` threads."""
+        rng = random.Random(self.rng.random())
+        started = time.perf_counter()
+        measure_from = started + warmup
+        end = measure_from + duration
+
+        def call(kind, scheduled):
+            ok = self.send(kind)
+            if scheduled >= measure_from:
+                self.record(kind, time.perf_counter() - scheduled, ok)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            scheduled = started
+            while scheduled < end:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(call, self.choose_kind(rng), scheduled)
+                scheduled += rng.expovariate(rate)
+
+    def results(self, duration, size):
+        """Summarize the recorded requests per endpoint and overall."""
+        results = []
+        everything = []
+        for label in sorted(self.samples):
+            results.append(self.summarize(label, self.samples[label], self.errors.get(label, 0),
+                                          duration, size))
+            everything.extend(self.samples[label])
+        if everything:
+            results.append(self.summarize('all', everything, sum(self.errors.values()), duration, size))
+        return results
+
+    @staticmethod
+    def summarize(name, samples, errors, duration, size):
+        """Turn the latencies of one endpoint into a result entry."""
+        samples = sorted(samples)
+        return {
+            'group': 'load',
+            'name': name,
+            'size': size,
+            'samples': len(samples),
+            'errors': errors,
+            'error_rate': errors / len(samples),
+            'per_second': len(samples) / duration,
+            'mean_ms': sum(samples) / len(samples) * 1000,
+            'p50_ms': percentile(samples, 0.50) * 1000,
+            'p95_ms': percentile(samples, 0.95) * 1000,
+            'p99_ms': percentile(samples, 0.99) * 1000,
+            'max_ms': samples[-1] * 1000
+        }
+
+
+def git_commit():
+    """Return the current git commit, or None outside a checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(args, mix):
+    """Load-test a running app.py and write the report file."""
+    load_test = LoadTest(args.url, mix, args.seed)
+    try:
+        size = load_test.prepare(args.seed_tasks)
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Could not reach the task API at {args.url}: {e}")
+        print("Start it first with 'python3 app.py'.")
+        return 1
+
+    mode = f"open loop, {args.rate:g} req/s" if args.rate else "closed loop"
+    print(f"🚦 Load testing {args.url} ({mode}, concurrency {args.concurrency}, {size} tasks)")
+    print(f"   Warm-up {args.warmup:g}s, measuring {args.duration:g}s...")
+    if args.rate:
+        load_test.run_open(args.rate, args.concurrency, args.warmup, args.duration)
+    else:
+        load_test.run_closed(args.concurrency, args.warmup, args.duration)
+
+    results = load_test.results(args.duration, size)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'url': args.url,
+            'backend': 'http',
+            'mode': 'open' if args.rate else 'closed',
+            'rate': args.rate,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'duration': args.duration,
+            'mix': args.mix,
+            'sizes': [size]
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print(f"\n{'endpoint':<30}{'req/s':>9}{'p50':>11}{'p95':>11}{'p99':>11}{'errors':>9}")
+    for result in results:
+        print(f"{result['name']:<30}{result['per_second']:>9.1f}{result['p50_ms']:>9.2f}ms"
+              f"{result['p95_ms']:>9.2f}ms{result['p99_ms']:>9.2f}ms{result['error_rate']:>9.1%}")
+    print(f"\nReport written to {args.output}")
+    return 0
+
+
+def main():
+    """Run the web demo, or a load test with the ``load`` command."""
+    parser = argparse.ArgumentParser(description="Task Tracker web demo and API load generator")
+    subparsers = parser.add_subparsers(dest='command')
+    load_parser = subparsers.add_parser('load', help='Load-test the task API of a running app.py')
+    load_parser.add_argument('--url', default='http://localhost:5000', help='Base URL of app.py')
+    load_parser.add_argument('--mix', default=DEFAULT_MIX,
+                             help=f'Request weights by kind: {", ".join(LOAD_ENDPOINTS)} (default: {DEFAULT_MIX})')
+    load_parser.add_argument('--concurrency', type=int, default=8,
+                             help='Workers (closed loop) or maximum requests in flight (open loop)')
+    load_parser.add_argument('--rate', type=float,
+                             help='Open loop: average arrivals per second (default: closed loop)')
+    load_parser.add_argument('--warmup', type=float, default=5, help='Seconds of unrecorded warm-up')
+    load_parser.add_argument('--duration', type=float, default=30, help='Seconds of measured load')
+    load_parser.add_argument('--seed-tasks', type=int, default=100,
+                             help='Add tasks first until the store holds at least this many')
+    load_parser.add_argument('--seed', type=int, default=42, help='Random seed for the request sequence')
+    load_parser.add_argument('--output', default='load-report.json', help='Report file')
+    args = parser.parse_args()
+
+    if args.command != 'load':
+        run_demo()
+        return
+    if args.concurrency < 1 or args.duration <= 0 or args.warmup < 0 or (args.rate is not None and args.rate <= 0):
+        parser.error("concurrency, duration and rate must be positive and warm-up cannot be negative")
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    sys.exit(run_load_test(args, mix))
+
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
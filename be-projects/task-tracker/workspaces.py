@@ -0,0 +1,166 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from storage import DEFAULT_FILES
+from task_manager import TaskManager
+
+WORKSPACE_NAME = re.compile(r'[A-Za-z0-9][A-Za-z0-9_-]{0,63}')
+
+
+def check_workspace_name(name: str):
+    """Raise ``ValueError`` unless ``name`` is a valid workspace name."""
+    if not isinstance(name, str) or not WORKSPACE_NAME.fullmatch(name):
+        raise ValueError("Invalid workspace name. Use up to 64 letters, digits, '-' and '_'")
+
+
+def workspace_file(config, name: str) -> str:
+    """Return the store file of a workspace for a configuration such as ``config.Config``."""
+    check_workspace_name(name)
+    extension = os.path.splitext(DEFAULT_FILES[config.STORAGE_BACKEND])[1]
+    return os.path.join(config.WORKSPACES_DIR, name + extension)
+
+
+class WorkspaceNotFound(ValueError):
+    """Raised when opening a workspace that does not exist without creating it."""
+
+
+def open_workspace(config, name: str, create: bool = True) -> TaskManager:
+    """Load the TaskManager of a workspace, creating its directory if needed.
+
+    Without ``create``, a workspace whose store does not exist yet raises
+    ``WorkspaceNotFound`` instead of being created, so reads never leave
+    files behind.
+    """
+    file_path = workspace_file(config, name)
+    if not create and not os.path.exists(file_path):
+        raise WorkspaceNotFound(f"Workspace not found: {name}")
+    os.makedirs(config.WORKSPACES_DIR, exist_ok=True)
+    return TaskManager.from_config(config, file_path)
+
+
+class _Entry:
+    """A loaded (or loading) workspace and the number of callers using it."""
+
+    __slots__ = ('manager', 'users', 'error', 'ready')
+
+    def __init__(self):
+        self.manager: Optional[TaskManager] = None
+        self.users = 0
+        self.error: Optional[BaseException] = None
+        self.ready = threading.Event()
+
+
+class WorkspacePool:
+    """Size-bounded LRU of loaded workspace stores.
+
+    A workspace is loaded on first use through ``open_workspace(name, create)``.
+    Once more than ``max_loaded`` workspaces are loaded, the least recently
+    used ones that nobody is using are closed, which flushes their pending
+    writes, and dropped. Memory therefore follows the set of recently active
+    workspaces rather than the number of workspaces on disk. Workspaces in
+    use are never evicted, so the pool can briefly hold more than
+    ``max_loaded`` under load.
+    """
+
+    def __init__(self, open_workspace: Callable[[str, bool], TaskManager], max_loaded: int = 64):
+        if max_loaded < 1:
+            raise ValueError("The workspace pool must hold at least one workspace")
+        self.open_workspace = open_workspace
+        self.max_loaded = max_loaded
+        self.loaded = OrderedDict()
+        self._closing = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.loaded)
+
+    def acquire(self, name: str, create: bool = True) -> TaskManager:
+        """Return the TaskManager of a workspace, loading it if needed.
+
+        Without ``create``, a workspace that does not exist yet raises
+        ``WorkspaceNotFound``. Every ``acquire`` must be paired with a
+        ``release``; ``workspace()`` does both.
+        """
+        check_workspace_name(name)
+        with self._lock:
+            entry = self.loaded.get(name)
+            load = entry is None
+            if load:
+                entry = self.loaded[name] = _Entry()
+                closing = self._closing.get(name)
+            else:
+                self.loaded.move_to_end(name)
+            entry.users += 1
+
+        if load:
+            try:
+                # An evicted copy of this workspace must finish writing first
+                if closing is not None:
+                    closing.wait()
+                entry.manager = self.open_workspace(name, create)
+            except BaseException as e:
+                entry.error = e
+                with self._lock:
+                    if self.loaded.get(name) is entry:
+                        del self.loaded[name]
+                raise
+            finally:
+                entry.ready.set()
+            self._evict()
+        else:
+            entry.ready.wait()
+            if entry.manager is None:
+                # Another caller only looked for the workspace; this one may create it
+                if create and isinstance(entry.error, WorkspaceNotFound):
+                    return self.acquire(name, create)
+                raise Exception(f"Failed to load workspace {name}: {entry.error}")
+        return entry.manager
+
+    def release(self, name: str):
+        """Stop using a workspace returned by ``acquire``."""
+        with self._lock:
+            entry = self.loaded.get(name)
+            if entry is not None:
+                entry.users -= 1
+        self._evict()
+
+    @contextmanager
+    def workspace(self, name: str, create: bool = True) -> Iterator[TaskManager]:
+        """Use a workspace for the duration of a ``with`` block."""
+        task_manager = self.acquire(name, create)
+        try:
+            yield task_manager
+        finally:
+            self.release(name)
+
+    def _evict(self):
+        """Close least recently used idle workspaces until the pool fits its bound."""
+        victims = []
+        with self._lock:
+            excess = len(self.loaded) - self.max_loaded
+            for name, entry in list(self.loaded.items()):
+                if excess <= 0:
+                    break
+                if entry.users == 0 and entry.manager is not None:
+                    del self.loaded[name]
+                    self._closing[name] = threading.Event()
+                    victims.append((name, entry.manager))
+                    excess -= 1
+        for name, manager in victims:
+            try:
+                manager.close()
+            finally:
+                with self._lock:
+                    self._closing.pop(name).set()
+
+    def close(self):
+        """Close every loaded workspace."""
+        with self._lock:
+            managers = [entry.manager for entry in self.loaded.values() if entry.manager is not None]
+            self.loaded.clear()
+        for manager in managers:
+            manager.close()
@@ -0,0 +1,79 @@
+import atexit
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+class WriteBehind:
+    """Background thread that persists queued mutation records in groups.
+
+    Committed changes are queued per task ID, so a task changed many times
+    between two flushes is written once. The queue is flushed every
+    ``interval`` seconds, as soon as ``max_pending`` tasks are waiting, on
+    ``flush()`` and when the process exits. A failed flush keeps its records
+    queued for the next attempt and is reported in ``error``.
+    """
+
+    def __init__(self, persist: Callable[[List[Dict]], None], interval: float = 0.05,
+                 max_pending: int = 1000):
+        self.persist = persist
+        self.interval = interval
+        self.max_pending = max_pending
+        self.pending: Dict[int, Dict] = {}
+        self.error: Optional[Exception] = None
+        self.closed = False
+        self._condition = threading.Condition()
+        self._flush_mutex = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='task-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, records: Dict[int, Dict]):
+        """Queue the latest mutation record of each changed task."""
+        with self._condition:
+            for task_id, record in records.items():
+                self.pending.pop(task_id, None)
+                self.pending[task_id] = record
+            if len(self.pending) >= self.max_pending:
+                self._condition.notify()
+
+    def flush(self):
+        """Persist everything queued so far, raising if that fails."""
+        with self._flush_mutex:
+            with self._condition:
+                records, self.pending = self.pending, {}
+            if not records:
+                return
+            try:
+                self.persist(list(records.values()))
+            except Exception as e:
+                with self._condition:
+                    # Changes queued meanwhile are newer and take precedence
+                    for task_id, record in records.items():
+                        self.pending.setdefault(task_id, record)
+                self.error = e
+                raise
+            self.error = None
+
+    def _run(self):
+        """Flush on every tick until closed."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self.closed or len(self.pending) >= self.max_pending,
+                                         self.interval)
+                if self.closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                pass  # Kept in ``error`` and retried on the next tick
+
+    def close(self):
+        """Stop the thread and write out the remaining records."""
+        with self._condition:
+            if self.closed:
+                return
+            self.closed = True
+            self._condition.notify()
+        atexit.unregister(self.close)
+        self._thread.join()
+        self.flush()